@@ -0,0 +1,50 @@
+import pytest
+from lib.analytics import merge_partials, shop_report, top_spender
+from lib.models.customer import Customer
+from lib.models.coffee import Coffee
+
+class TestAnalytics:
+    """Test suite for the shop report and partial merging"""
+
+    @pytest.fixture
+    def shop(self):
+        coffees = [Coffee(f"Report Coffee {i}") for i in range(3)]
+        customers = [Customer(f"Rep{i}") for i in range(5)]
+        for i in range(60):
+            customers[i % 5].create_order(coffees[i % 3], 1 + (i * 7) % 9 + 0.1)
+        return coffees, customers
+
+    def assert_matches_models(self, report, coffees):
+        for coffee in coffees:
+            row = report[coffee]
+            assert row.num_orders == coffee.num_orders()
+            assert row.total_revenue == coffee.total_revenue()
+            assert row.average_price == coffee.average_price()
+            assert row.most_aficionado is Customer.most_aficionado(coffee)
+            assert row.customers == coffee.customers()
+
+    def test_report_matches_models(self, shop):
+        coffees, _ = shop
+        self.assert_matches_models(shop_report(), coffees)
+
+    def test_report_for_given_coffees(self, shop):
+        coffees, _ = shop
+        report = shop_report(coffees[:2])
+        assert list(report) == coffees[:2]
+        self.assert_matches_models(report, coffees[:2])
+
+    def test_coffee_without_orders(self):
+        coffee = Coffee("Report Empty")
+        row = shop_report()[coffee]
+        assert (row.num_orders, row.average_price, row.most_aficionado, row.customers) == (0, 0.0, None, [])
+
+    def test_merge_partials(self):
+        first = {1: (2, 230, {7: 230}), 2: (1, 300, {7: 300})}
+        second = {1: (1, 120, {8: 120})}
+        merged = merge_partials([first, second])
+        assert merged == {1: (3, 350, {7: 230, 8: 120}), 2: (1, 300, {7: 300})}
+        assert first[1] == (2, 230, {7: 230})  # Inputs are not modified
+
+    def test_top_spender_ties_go_to_lowest_key(self):
+        assert top_spender({5: 200, 3: 200, 9: 100}) == 3
+        assert top_spender({}) is None
@@ -1,7 +1,10 @@
+import gc
+import time
 import pytest
 from lib.models.coffee import Coffee
 from lib.models.order import Order
 from lib.models.customer import Customer
+from lib.models import store
 
 class TestCoffee:
     """Test suite for Coffee class functionality"""
@@ -82,6 +85,38 @@ class TestCoffee:
         
         assert sample_coffee.average_price() == 5.0  # Rounded from 4.9995
 
+    def test_price_stats(self, sample_coffee, sample_customer):
+        """Test running min/max/stddev and revenue"""
+        assert sample_coffee.price_stats()["count"] == 0
+        assert sample_coffee.total_revenue() == 0.0
+
+        Order(sample_customer, sample_coffee, 2.00)
+        Order(sample_customer, sample_coffee, 4.00)
+        Order(sample_customer, sample_coffee, 6.00)
+
+        stats = sample_coffee.price_stats()
+        assert stats["count"] == 3
+        assert stats["min"] == 2.0
+        assert stats["max"] == 6.0
+        assert stats["mean"] == 4.0
+        assert stats["stddev"] == pytest.approx(1.63299, rel=1e-4)
+        assert sample_coffee.total_revenue() == 12.0
+
+    def test_aggregates_follow_reassignment(self, sample_coffee, sample_customer):
+        """Test aggregates update when orders move to another coffee"""
+        cheap = Order(sample_customer, sample_coffee, 1.10)
+        Order(sample_customer, sample_coffee, 5.00)
+        pricey = Order(sample_customer, sample_coffee, 9.90)
+
+        cheap.coffee = Coffee("Mocha")
+        pricey.coffee = Coffee("Mocha")
+
+        stats = sample_coffee.price_stats()
+        assert (stats["min"], stats["max"], stats["stddev"]) == (5.0, 5.0, 0.0)
+        assert sample_coffee.num_orders() == 1
+        assert sample_coffee.average_price() == 5.0
+        assert sample_coffee.total_revenue() == 5.0
+
     # ----- Edge Case Tests -----
     def test_multiple_customers(self, sample_coffee):
         """Test tracking multiple unique customers"""
@@ -93,6 +128,76 @@ class TestCoffee:
         
         assert len(sample_coffee.customers()) == 2
 
+    def test_top_customers(self, sample_coffee):
+        """Test customers are ranked by total spend on this coffee"""
+        bob = Customer("Bob")
+        carol = Customer("Carol")
+        dave = Customer("Dave")
+
+        Order(bob, sample_coffee, 5.00)
+        Order(carol, sample_coffee, 2.50)
+        Order(carol, sample_coffee, 2.50)
+        Order(dave, sample_coffee, 9.00)
+
+        assert sample_coffee.top_customers(2) == [dave, bob]  # Bob beats Carol on the tie
+        assert sample_coffee.top_customers(10) == [dave, bob, carol]
+        assert Coffee("Mocha").top_customers(3) == []
+
+    def test_rolling_stats(self, sample_coffee, sample_customer):
+        """Test rolling windows built from history and kept up to date"""
+        start = 1_700_000_000.0
+        for minute, price in enumerate([2.0, 4.0, 6.0]):
+            sample_customer.create_order(sample_coffee, price, start + minute * 60)
+        stats = sample_coffee.rolling_stats(300, now=start + 120)
+        assert stats == {"count": 3, "revenue": 12.0, "average_price": 4.0, "per_minute": 0.6}
+
+        late = sample_customer.create_order(sample_coffee, 9.0, start + 150)
+        assert sample_coffee.rolling_stats(300, now=start + 150)["count"] == 4
+        assert sample_coffee.rolling_stats(120, now=start + 150)["revenue"] == 19.0  # Orders at +60, +120, +150 s
+        late.cancel()
+        assert sample_coffee.rolling_stats(300, now=start + 150)["revenue"] == 12.0
+
+        expired = sample_coffee.rolling_stats(300, now=start + 3600)
+        assert (expired["count"], expired["average_price"]) == (0, 0.0)
+        assert sample_coffee.num_orders() == 3  # Lifetime aggregates are unaffected
+
+    def test_rolling_stats_ignore_future_orders(self, sample_coffee, sample_customer):
+        """Test a future-dated order doesn't push the window past the current ones"""
+        now = time.time()
+        sample_coffee.rolling_stats(3600, now=now)
+        sample_customer.create_order(sample_coffee, 5.0, now + 86_400)
+        for _ in range(5):
+            sample_customer.create_order(sample_coffee, 2.0, now)
+        assert sample_coffee.rolling_stats(3600, now=now + 1)["count"] == 5
+
+    def test_shop_rankings(self, sample_customer):
+        """Test shop-wide popularity and revenue rankings"""
+        drip, chai, cortado = Coffee("Ranked Drip"), Coffee("Ranked Chai"), Coffee("Ranked Cortado")
+        ours = {drip, chai, cortado}
+        for _ in range(3):
+            sample_customer.create_order(drip, 1.0)
+        sample_customer.create_order(chai, 9.0)
+        sample_customer.create_order(cortado, 2.0)
+        order = sample_customer.create_order(cortado, 2.0)
+
+        def ranked(board):
+            return [c for c in board(len(store.current().coffees)) if c in ours]
+
+        assert ranked(Coffee.most_popular) == [drip, cortado, chai]
+        assert ranked(Coffee.top_revenue) == [chai, cortado, drip]
+        order.coffee = chai
+        assert ranked(Coffee.most_popular) == [drip, chai, cortado]  # Tie: older coffee first
+        order.cancel()
+        assert ranked(Coffee.top_revenue) == [chai, drip, cortado]
+        assert Coffee.most_popular(0) == []
+
+    def test_rankings_skip_collected_coffees(self):
+        """Test rankings never return coffees that have been garbage collected"""
+        Customer("Gone").create_order(Coffee("Ranked Gone"), 10.0)
+        gc.collect()
+        assert None not in Coffee.most_popular(10_000)
+        assert all(c.name != "Ranked Gone" for c in Coffee.top_revenue(10_000))
+
     # ----- Fixture Tests -----
     def test_sample_order_fixture(self, sample_order):
         """Test that the sample_order fixture creates a valid Order instance"""
@@ -0,0 +1,143 @@
+import random
+import sys
+import threading
+import pytest
+from lib import concurrency, instrumentation
+from lib.models.customer import Customer
+from lib.models.coffee import Coffee
+from lib.models.order import Order
+
+class TestConcurrency:
+    """Multi-threaded stress tests for the locking mode"""
+
+    @pytest.fixture(autouse=True)
+    def locking(self):
+        concurrency.enable()
+        yield
+        concurrency.disable()
+
+    def run_workers(self, worker, num_threads: int = 8):
+        errors = []
+
+        def guarded(index):
+            try:
+                worker(index)
+            except Exception as error:  # Surface worker failures in the test thread
+                errors.append(error)
+
+        threads = [threading.Thread(target=guarded, args=(i,)) for i in range(num_threads)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert errors == []
+
+    def test_no_lost_or_duplicated_orders(self):
+        customers = [Customer(f"Stress{i}") for i in range(20)]
+        coffees = [Coffee(f"Stress Coffee {i}") for i in range(4)]
+        created = [[] for _ in range(8)]
+
+        def worker(index):
+            rng = random.Random(index)
+            for _ in range(500):
+                order = rng.choice(customers).create_order(rng.choice(coffees), rng.randint(1, 10))
+                created[index].append(order)
+                if rng.random() < 0.2:  # Reassign some orders mid-stream
+                    order.coffee = rng.choice(coffees)
+                    order.customer = rng.choice(customers)
+
+        self.run_workers(worker)
+
+        all_orders = [order for orders in created for order in orders]
+        assert len(all_orders) == len(set(map(id, all_orders))) == 8 * 500
+        assert sum(c.num_orders() for c in coffees) == len(all_orders)
+        assert sum(len(c.orders()) for c in customers) == len(all_orders)
+        for coffee in coffees:
+            orders = list(coffee.orders())
+            assert len(orders) == coffee.num_orders()
+            assert all(order.coffee is coffee for order in orders)
+            assert coffee.average_price() == round(sum(o.price for o in orders) / len(orders), 2)
+            spend = {}
+            for order in orders:
+                spend[order.customer] = spend.get(order.customer, 0) + order.cents
+            best = max(spend.values())
+            assert Customer.most_aficionado(coffee) == min(
+                (c for c, total in spend.items() if total == best), key=lambda c: c._id)
+        for customer in customers:
+            assert all(order.customer is customer for order in customer.orders())
+
+    def test_bulk_and_single_orders_share_customers(self):
+        customers = [Customer(f"Bulk{i}") for i in range(10)]
+        coffees = [Coffee(f"Bulk Coffee {i}") for i in range(3)]
+
+        def worker(index):
+            rng = random.Random(index)
+            for _ in range(50):
+                if index % 2:
+                    Order.bulk_create([(rng.choice(customers), rng.choice(coffees), 2.0) for _ in range(10)])
+                else:
+                    order = rng.choice(customers).create_order(rng.choice(coffees), 2.0)
+                    order.customer = rng.choice(customers)
+
+        instrumentation.reset()
+        instrumentation.enable()
+        try:
+            self.run_workers(worker)
+        finally:
+            instrumentation.disable()
+
+        total = 4 * 50 * 10 + 4 * 50
+        assert sum(len(c.orders()) for c in customers) == sum(c.num_orders() for c in coffees) == total
+        assert instrumentation.snapshot()["counters"]["orders_created"] == total
+        for customer in customers:
+            counts = {}
+            for order in customer.orders():
+                counts[order.coffee] = counts.get(order.coffee, 0) + 1
+            assert customer._coffee_counts == counts
+
+    def test_orders_do_not_wait_for_rankings(self):
+        customer, latte, mocha = Customer("Ranker"), Coffee("Rank Latte"), Coffee("Rank Mocha")
+        with concurrency.ranking_lock():  # A slow ranking reader
+            worker = threading.Thread(target=lambda: [customer.create_order(mocha, 3.0) for _ in range(3)])
+            worker.start()
+            worker.join(timeout=5)
+            assert not worker.is_alive()
+        customer.create_order(latte, 9.0)
+        ours = {latte, mocha}
+        assert [c for c in Coffee.most_popular(10_000) if c in ours] == [mocha, latte]
+        assert [c for c in Coffee.top_revenue(10_000) if c in ours] == [latte, mocha]
+
+    def test_favorite_coffee_during_writes(self):
+        customer = Customer("Regular")
+        coffees = [Coffee(f"Fav Coffee {i}") for i in range(2000)]
+        scan = Customer.favorite_coffee.__wrapped__  # Unmemoized, so every call scans the counts
+
+        def worker(index):  # Writers add new coffees to the counts the readers scan
+            for i in range(500):
+                if index % 2:
+                    customer.create_order(coffees[(index // 2) * 500 + i], 3.0)
+                else:
+                    scan(customer)
+
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)  # Switch threads often enough to land inside a scan
+        try:
+            self.run_workers(worker)
+        finally:
+            sys.setswitchinterval(interval)
+        assert customer.favorite_coffee() is coffees[0]  # All tied at one order: the oldest coffee
+
+    def test_concurrent_customer_registration(self):
+        before = Customer.customer_count
+        made = []
+
+        def worker(index):
+            made.extend(Customer(f"Reg{index}") for _ in range(200))
+
+        self.run_workers(worker)
+        assert Customer.customer_count - before == 8 * 200
+        assert len({c._id for c in made}) == len(made)
+
+    def test_locked_skips_invalid_objects(self):
+        with pytest.raises(TypeError):
+            Order(Customer("Lock"), "Not a coffee", 3.0)
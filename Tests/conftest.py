@@ -0,0 +1,10 @@
+import pytest
+from lib import storage
+
+@pytest.fixture(autouse=True, params=["memory", "sqlite"])
+def backend(request):
+    """Run every test against the in-memory models and again with the SQLite backend"""
+    if request.param == "sqlite":
+        storage.use_sqlite(":memory:", batch_size=64)
+    yield request.param
+    storage.use_memory()
@@ -3,6 +3,9 @@ from decimal import Decimal
 from lib.models.customer import Customer
 from lib.models.coffee import Coffee
 from lib.models.order import Order
+from lib.models.order_store import OrderStore
+from lib.models.idempotency import IdempotencyIndex
+from lib.models import store
 
 @pytest.fixture
 def sample_customer():
@@ -109,6 +112,14 @@ class TestCustomer:
             assert order.coffee == sample_coffee
             assert order.customer == sample_customer
 
+        def test_create_orders(self, sample_customer, sample_coffee):
+            """Test bulk order creation through customer"""
+            orders, errors = sample_customer.create_orders([(sample_coffee, 2.0), (sample_coffee, 0.5)])
+
+            assert len(orders) == 1 and orders[0].customer == sample_customer
+            assert [index for index, _ in errors] == [1]
+            assert sample_customer.orders() == orders
+
         def test_coffees_unique(self, sample_customer):
             """Test customer's coffee list contains unique items"""
             coffee1 = Coffee("Latte")
@@ -151,9 +162,118 @@ class TestCustomer:
             initial_count = len(sample_customer.orders())
             sample_customer.create_order(sample_coffee, 4.50)
             
-            orders = sample_customer.orders()  # Get a copy
-            orders.append("invalid")  # Try to modify the copy
+            orders = sample_customer.orders()  # Get a read-only view
+            with pytest.raises(AttributeError):
+                orders.append("invalid")  # Try to modify the view
+            with pytest.raises(TypeError):
+                orders[0] = "invalid"
             
             # Original should remain unchanged
             assert len(sample_customer.orders()) == initial_count + 1
-            assert all(isinstance(o, Order) for o in sample_customer.orders())
\ No newline at end of file
+            assert all(isinstance(o, Order) for o in sample_customer.orders())
+
+        def test_orders_view_is_live(self, sample_customer, sample_coffee):
+            """Test the orders view reflects later orders without copying"""
+            orders = sample_customer.orders()
+            first = sample_customer.create_order(sample_coffee, 2.0)
+            second = sample_customer.create_order(sample_coffee, 3.0)
+
+            assert len(orders) == 2
+            assert orders[0] is first and orders[-1] is second
+            assert orders[:1] == [first]
+            assert second in orders
+            with pytest.raises(IndexError):
+                orders[2]
+
+        def test_mutating_orders_while_iterating(self, sample_customer, sample_coffee):
+            """Test a loop over the view may move or cancel the orders it visits"""
+            other = Coffee("Cold Brew")
+            rows = OrderStore()
+            rows.add(sample_customer, sample_coffee, 5.0)
+            for price in (2.0, 3.0, 4.0):
+                sample_customer.create_order(sample_coffee, price)
+            for order in sample_coffee.orders():
+                order.coffee = other
+            assert sample_coffee.num_orders() == 0 and other.num_orders() == 4
+            for order in sample_customer.orders():
+                order.cancel()
+            assert len(sample_customer.orders()) == 0 and other.num_orders() == 0
+
+        def test_orders_view_walks_from_either_end(self, sample_customer, sample_coffee):
+            """Test reversed() and negative indexes walk the orders without copying them"""
+            orders = [sample_customer.create_order(sample_coffee, price) for price in (2.0, 3.0, 4.0)]
+            view = sample_customer.orders()
+            assert list(reversed(view)) == orders[::-1]
+            assert view[-1] is orders[2] and view[-3] is orders[0]
+            with pytest.raises(IndexError):
+                view[-4]
+            walk = iter(view)
+            assert next(walk) is orders[0]
+            later = sample_customer.create_order(sample_coffee, 5.0)  # Copies the orders once
+            assert list(walk) == orders[1:]
+            assert list(view) == orders + [later]
+
+        def test_reassignment_updates_aficionado(self):
+            """Test moving an order to another customer or coffee updates the leader"""
+            coffee = Coffee("Flat White")
+            other = Coffee("Ristretto")
+            alice = Customer("Alice")
+            bob = Customer("Bob")
+            alice.create_order(coffee, 4.00)
+            big_order = bob.create_order(coffee, 6.00)
+            assert Customer.most_aficionado(coffee) == bob
+
+            big_order.customer = alice
+            assert Customer.most_aficionado(coffee) == alice
+
+            big_order.coffee = other
+            assert Customer.most_aficionado(coffee) == alice
+            assert Customer.most_aficionado(other) == alice
+
+            big_order.customer = bob
+            assert Customer.most_aficionado(other) == bob
+
+        def test_favorite_coffee(self, sample_customer, sample_coffee):
+            """Test the most ordered coffee follows new, moved and cancelled orders"""
+            mocha = Coffee("Mocha")
+            assert sample_customer.favorite_coffee() is None
+
+            sample_customer.create_order(mocha, 2.0)
+            sample_customer.create_order(sample_coffee, 9.0)
+            assert sample_customer.favorite_coffee() is sample_coffee  # Tie: older coffee
+
+            order = sample_customer.create_order(mocha, 2.0)
+            assert sample_customer.favorite_coffee() is mocha
+
+            other = Customer("Zed")
+            order.customer = other
+            assert sample_customer.favorite_coffee() is sample_coffee
+            assert other.favorite_coffee() is mocha
+            order.cancel()
+            assert other.favorite_coffee() is None
+
+        def test_idempotent_create_order(self, sample_customer, sample_coffee, monkeypatch):
+            """Test a retried request returns the original order instead of a duplicate"""
+            monkeypatch.setattr(store.current(), "idempotency_keys", IdempotencyIndex())
+            first = sample_customer.create_order(sample_coffee, 4.5, idempotency_key="pos-1-0001")
+            retry = sample_customer.create_order(sample_coffee, 4.5, idempotency_key="pos-1-0001")
+            other = sample_customer.create_order(sample_coffee, 4.5, idempotency_key="pos-1-0002")
+
+            assert retry is first and other is not first
+            assert len(sample_customer.orders()) == 2
+            assert sample_coffee.num_orders() == 2
+
+            first.customer = Customer("Moved")  # Later changes don't break the replay
+            assert sample_customer.create_order(sample_coffee, 4.5, idempotency_key="pos-1-0001") is first
+            with pytest.raises(ValueError):
+                sample_customer.create_order(sample_coffee, 5.0, idempotency_key="pos-1-0001")
+            with pytest.raises(ValueError):
+                Customer("Other").create_order(sample_coffee, 4.5, idempotency_key="pos-1-0001")
+
+        def test_rejected_order_does_not_use_the_key(self, sample_customer, sample_coffee, monkeypatch):
+            """Test a failed create can be retried with the same key"""
+            monkeypatch.setattr(store.current(), "idempotency_keys", IdempotencyIndex())
+            with pytest.raises(ValueError):
+                sample_customer.create_order(sample_coffee, 50.0, idempotency_key="pos-2-0001")
+            order = sample_customer.create_order(sample_coffee, 5.0, idempotency_key="pos-2-0001")
+            assert sample_customer.orders() == [order]
@@ -0,0 +1,43 @@
+import pytest
+from lib.models import idempotency
+from lib.models.idempotency import IdempotencyIndex
+
+class TestIdempotencyIndex:
+    """Test suite for the bounded idempotency key index"""
+
+    @pytest.fixture
+    def clock(self, monkeypatch):
+        """Fixture providing a settable monotonic clock"""
+        now = [1000.0]
+        monkeypatch.setattr(idempotency.time, "monotonic", lambda: now[0])
+        return now
+
+    def test_get_and_put(self):
+        index = IdempotencyIndex()
+        assert index.get("a") is None
+        index.put("a", 1)
+        assert index.get("a") == 1
+        assert len(index) == 1
+
+    def test_keys_expire_after_ttl(self, clock):
+        index = IdempotencyIndex(ttl=60)
+        index.put("a", 1)
+        clock[0] += 30
+        index.put("b", 2)
+        clock[0] += 31
+        assert index.get("a") is None
+        assert index.get("b") == 2
+        assert len(index) == 1
+
+    def test_retention_is_bounded(self):
+        index = IdempotencyIndex(max_keys=3)
+        for i in range(10):
+            index.put(i, i)
+        assert len(index) == 3
+        assert [index.get(i) for i in (6, 7, 8, 9)] == [None, 7, 8, 9]
+
+    def test_invalid_configuration(self):
+        with pytest.raises(ValueError):
+            IdempotencyIndex(ttl=0)
+        with pytest.raises(ValueError):
+            IdempotencyIndex(max_keys=0)
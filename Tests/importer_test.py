@@ -0,0 +1,112 @@
+import csv
+import pytest
+from lib.importer import UnreadableRow, import_file, import_orders, read_rows
+from lib.models.customer import Customer
+from lib.models.coffee import Coffee
+
+class TestImporter:
+    """Test suite for the streaming CSV/JSONL order importer"""
+
+    def test_csv_import(self, tmp_path):
+        path = tmp_path / "orders.csv"
+        path.write_text(
+            "customer,coffee,price\n"
+            "Imp Ann,Import Latte,4.50\n"
+            "Imp Ben,Import Latte,5.50\n"
+            "Imp Ann,Import Mocha,3\n"
+        )
+        progress = import_file(str(path))
+
+        assert (progress.rows_read, progress.orders_created, progress.rows_quarantined) == (3, 3, 0)
+        ann = Customer.find("Imp Ann")
+        assert len(ann) == 1 and len(ann[0].orders()) == 2
+        assert Coffee.intern("Import Latte").average_price() == 5.0
+
+    def test_resolves_existing_instances(self, tmp_path):
+        customer = Customer("Imp Cara")
+        coffee = Coffee.intern("Import Flat")
+        path = tmp_path / "orders.jsonl"
+        path.write_text('{"customer": "Imp Cara", "coffee": "Import Flat", "price": 4}\n' * 3)
+        import_file(str(path))
+
+        assert Customer.find("Imp Cara") == [customer]
+        assert len(customer.orders()) == 3
+        assert coffee.num_orders() == 3
+
+    def test_quarantines_bad_rows(self, tmp_path):
+        path = tmp_path / "orders.jsonl"
+        path.write_text(
+            '{"customer": "Imp Dan", "coffee": "Import Cortado", "price": 4}\n'
+            'this is not json\n'
+            '{"customer": "Imp Dan", "coffee": "Import Cortado", "price": "four"}\n'
+            '\n'
+            '{"customer": "", "coffee": "Import Cortado", "price": 4}\n'
+            '{"customer": "Imp Dan", "coffee": "Import Cortado", "price": 40}\n'
+            '{"customer": "Imp Dan", "coffee": "Import Cortado"}\n'
+            '{"customer": "Imp Dan", "coffee": "Import Cortado", "price": 1' + '0' * 400 + '}\n'
+            '{"customer": "Imp Dan", "coffee": "Import Cortado", "price": 5}\n'
+        )
+        bad = []
+        progress = import_file(str(path), quarantine=lambda line, raw, error: bad.append((line, type(error))))
+
+        assert progress.orders_created == 2
+        assert bad == [(2, ValueError), (3, ValueError), (5, ValueError), (6, ValueError), (7, KeyError),
+                       (8, ValueError)]
+
+    def test_quarantines_unreadable_csv_records(self, tmp_path):
+        path = tmp_path / "orders.csv"
+        path.write_bytes(
+            b"customer,coffee,price\n"
+            b"Imp Gus,Import Doppio,4\n"
+            b"Imp Gus," + b"x" * 200_000 + b",4\n"
+            b"Imp Gus,Import Doppio,5\n"
+            b"Imp G\xffs,Import Doppio,6\n"
+            b"Imp Gus,Import Doppio,7\n"
+        )
+        bad = []
+        progress = import_file(str(path), chunk_size=2,
+                               quarantine=lambda line, raw, error: bad.append((line, type(error))))
+
+        assert (progress.rows_read, progress.orders_created, progress.rows_quarantined) == (5, 3, 2)
+        assert bad == [(3, csv.Error), (5, UnicodeDecodeError)]
+        assert [o.price for o in Customer.find("Imp Gus")[0].orders()] == [4.0, 5.0, 7.0]
+
+    def test_quarantines_undecodable_jsonl_lines(self, tmp_path):
+        path = tmp_path / "orders.jsonl"
+        path.write_bytes(
+            b'{"customer": "Imp H\xe9l", "coffee": "Import Macchiato", "price": 4}\n'
+            b'{"customer": "Imp Hal", "coffee": "Import Macchiato", "price": 4}\n'
+        )
+        rows = list(read_rows(str(path)))
+        assert rows[0][0] == 1 and isinstance(rows[0][1], UnreadableRow)
+        assert isinstance(rows[0][1].error, UnicodeDecodeError)
+        assert import_file(str(path)).orders_created == 1
+
+    def test_timestamps(self):
+        lines = [
+            "customer,coffee,price,timestamp\n",
+            "Imp Fay,Import Ristretto,3,1700000000\n",
+            "Imp Fay,Import Ristretto,3,2023-11-14T22:13:20+00:00\n",
+            "Imp Fay,Import Ristretto,3,\n",
+            "Imp Fay,Import Ristretto,3,teatime\n",
+        ]
+        bad = []
+        progress = list(import_orders(lines, format="csv", quarantine=lambda *args: bad.append(args[0])))[-1]
+
+        assert (progress.orders_created, bad) == (3, [5])
+        stamps = [o.timestamp for o in Customer.find("Imp Fay")[0].orders()]
+        assert stamps[:2] == [1_700_000_000.0, 1_700_000_000.0]
+        assert stamps[2] > stamps[0]  # Stamped at import time
+
+    def test_chunked_progress(self):
+        lines = ['{"customer": "Imp Eve", "coffee": "Import Lungo", "price": 2}'] * 5
+        reports = list(import_orders(lines, format="jsonl", chunk_size=2))
+
+        assert [r.orders_created for r in reports] == [2, 4, 5]
+        assert reports[-1].rows_per_second > 0
+
+    def test_read_rows_csv_line_numbers(self):
+        rows = list(read_rows(["customer,coffee,price\n", "A,Abc,1\n", "B,Bcd,2\n"], format="csv"))
+        assert [line for line, _ in rows] == [2, 3]
+        with pytest.raises(ValueError):
+            list(read_rows([], format="xml"))
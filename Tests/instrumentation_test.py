@@ -0,0 +1,107 @@
+import pytest
+from lib import instrumentation
+from lib.models.customer import Customer
+from lib.models.coffee import Coffee
+from lib.models.order import Order
+
+class TestInstrumentation:
+    """Test suite for metrics and event hooks"""
+
+    @pytest.fixture(autouse=True)
+    def metrics(self):
+        """Enable fresh metrics for each test and switch them off afterwards"""
+        instrumentation.reset()
+        instrumentation.enable()
+        yield
+        instrumentation.disable()
+        instrumentation.reset()
+
+    @pytest.fixture
+    def sample_customer(self):
+        return Customer("Alice")
+
+    @pytest.fixture
+    def sample_coffee(self):
+        return Coffee("Espresso")
+
+    def test_counters(self, sample_customer, sample_coffee):
+        sample_customer.create_order(sample_coffee, 4.0)
+        Order.bulk_create([(sample_customer, sample_coffee, 3.0), (sample_customer, sample_coffee, 0)])
+        with pytest.raises(ValueError):
+            sample_customer.create_order(sample_coffee, 11.0)
+
+        counters = instrumentation.snapshot()["counters"]
+        assert counters == {"orders_created": 2, "orders_rejected": 2}
+
+    def test_rejected_order_is_not_left_on_customer(self, sample_customer):
+        with pytest.raises(TypeError):
+            Order(sample_customer, "Not a coffee", 4.0)
+        assert len(sample_customer.orders()) == 0
+
+    def test_timings(self, sample_customer, sample_coffee):
+        sample_customer.create_order(sample_coffee, 4.0)
+        sample_coffee.average_price()
+        Customer.most_aficionado(sample_coffee)
+
+        histograms = instrumentation.snapshot()["histograms"]
+        assert set(histograms) == {"create_order", "average_price", "most_aficionado"}
+        assert histograms["create_order"]["count"] == 1
+        assert sum(histograms["create_order"]["buckets"].values()) == 1
+
+    def test_disabled_collects_nothing(self, sample_customer, sample_coffee):
+        instrumentation.disable()
+        sample_customer.create_order(sample_coffee, 4.0)
+        assert instrumentation.snapshot() == {"enabled": False, "counters": {}, "histograms": {}}
+
+    def test_order_created_events(self, sample_customer, sample_coffee):
+        seen = []
+        instrumentation.subscribe("order_created", seen.append)
+        try:
+            order = sample_customer.create_order(sample_coffee, 4.0)
+            bulk, _ = sample_customer.create_orders([(sample_coffee, 5.0)])
+        finally:
+            instrumentation.unsubscribe("order_created", seen.append)
+        sample_customer.create_order(sample_coffee, 6.0)
+
+        assert seen == [order] + bulk
+        assert not instrumentation.subscribed("order_created")
+
+    def test_failing_subscriber_does_not_fail_the_order(self, sample_customer, sample_coffee, caplog):
+        seen = []
+
+        def broken(order):
+            raise RuntimeError("journal disk full")
+
+        instrumentation.subscribe("order_created", broken)
+        instrumentation.subscribe("order_created", seen.append)
+        try:
+            order = sample_customer.create_order(sample_coffee, 4.0)
+        finally:
+            instrumentation.unsubscribe("order_created", broken)
+            instrumentation.unsubscribe("order_created", seen.append)
+
+        assert seen == [order] and sample_coffee.num_orders() == 1
+        assert instrumentation.snapshot()["counters"]["subscriber_errors"] == 1
+        assert "journal disk full" in caplog.text
+
+    def test_mutation_events(self, sample_customer, sample_coffee):
+        seen = []
+        callbacks = {event: (lambda obj, event=event: seen.append((event, obj)))
+                     for event in ("order_reassigned", "order_cancelled", "customer_renamed")}
+        for event, callback in callbacks.items():
+            instrumentation.subscribe(event, callback)
+        try:
+            with pytest.raises(TypeError):
+                Order(sample_customer, "not a coffee", 4.0)  # Never created, so never cancelled
+            order = sample_customer.create_order(sample_coffee, 4.0)
+            order.customer = Customer("Bob")
+            order.coffee = Coffee("Mocha")
+            order.cancel()
+            order.cancel()  # Already cancelled: no event
+            sample_customer.name = "Alicia"
+        finally:
+            for event, callback in callbacks.items():
+                instrumentation.unsubscribe(event, callback)
+
+        assert seen == [("order_reassigned", order), ("order_reassigned", order),
+                        ("order_cancelled", order), ("customer_renamed", sample_customer)]
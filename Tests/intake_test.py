@@ -0,0 +1,105 @@
+import asyncio
+import json
+from lib.intake import OrderIntakeServer
+from lib.models.order import Order
+from lib.models.customer import Customer
+from lib.models.coffee import Coffee
+
+async def send(port: int, messages: list) -> list:
+    """Send messages on one connection and return the decoded acks"""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    for message in messages:
+        line = message if isinstance(message, str) else json.dumps(message)
+        writer.write(line.encode() + b"\n")
+    await writer.drain()
+    acks = [json.loads(await reader.readline()) for _ in messages]
+    writer.close()
+    await writer.wait_closed()
+    return acks
+
+class TestOrderIntakeServer:
+    """Test suite for the asyncio order intake service"""
+
+    def test_batches_and_acks(self):
+        async def scenario():
+            server = OrderIntakeServer(batch_size=3, queue_size=2)
+            _, port = await server.start_tcp()
+            messages = [{"id": i, "customer": "Intake Amy", "coffee": "Intake Latte", "price": 2 + i}
+                        for i in range(7)]
+            messages[2]["price"] = 99
+            messages[4] = "not json"
+            acks = await send(port, messages)
+            await server.close()
+            return server, acks
+
+        server, acks = asyncio.run(scenario())
+
+        assert [ack["ok"] for ack in acks] == [True, True, False, True, False, True, True]
+        assert acks[2] == {"id": 2, "ok": False, "error": "Price must not exceed 10.0."}
+        assert acks[4]["id"] is None
+        assert server.stats["accepted"] == 5 and server.stats["rejected"] == 2
+        assert server.stats["batches"] >= 3  # batch_size caps each batch
+        amy = Customer.find("Intake Amy")
+        assert len(amy) == 1 and len(amy[0].orders()) == 5
+        assert Coffee.intern("Intake Latte").num_orders() == 5
+
+    def test_concurrent_connections(self):
+        async def scenario():
+            server = OrderIntakeServer(batch_size=50)
+            _, port = await server.start_tcp()
+            batches = [[{"id": f"{t}-{i}", "customer": f"Term{t}", "coffee": "Intake Mocha", "price": 3}
+                        for i in range(40)] for t in range(5)]
+            results = await asyncio.gather(*(send(port, batch) for batch in batches))
+            await server.close()
+            return results
+
+        results = asyncio.run(scenario())
+
+        assert all(ack["ok"] for acks in results for ack in acks)
+        assert [ack["id"] for ack in results[3]] == [f"3-{i}" for i in range(40)]
+        assert Coffee.intern("Intake Mocha").num_orders() == 200
+
+    def test_failed_batch_is_rejected_and_server_keeps_running(self, monkeypatch):
+        bulk_create = Order.bulk_create
+
+        def poisoned(rows):
+            rows = list(rows)
+            if any(coffee.name == "Intake Poison" for _, coffee, _, _ in rows):
+                raise RuntimeError("disk on fire")
+            return bulk_create(rows)
+
+        monkeypatch.setattr(Order, "bulk_create", poisoned)
+
+        async def scenario():
+            server = OrderIntakeServer(batch_size=1)
+            _, port = await server.start_tcp()
+            poison = {"id": "p", "customer": "Intake Pat", "coffee": "Intake Poison", "price": 3}
+            first = await asyncio.wait_for(send(port, [poison]), 1)
+            second = await asyncio.wait_for(
+                send(port, [{"id": "ok", "customer": "Intake Pat", "coffee": "Intake Flat", "price": 3}]), 1)
+            await asyncio.wait_for(server.close(), 1)
+            return server, first + second
+
+        server, acks = asyncio.run(scenario())
+
+        assert acks == [{"id": "p", "ok": False, "error": "Batch failed: disk on fire"}, {"id": "ok", "ok": True}]
+        assert server.stats["failed_batches"] == 1
+
+    def test_oversized_line_closes_the_connection(self):
+        async def scenario():
+            server = OrderIntakeServer()
+            _, port = await server.start_tcp()
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            order = {"id": 1, "customer": "Intake Lou", "coffee": "Intake Latte", "price": 3}
+            writer.write(json.dumps(order).encode() + b"\n" + b"x" * 100_000 + b"\n")
+            await writer.drain()
+            lines = [await asyncio.wait_for(reader.readline(), 1) for _ in range(3)]
+            writer.close()
+            await asyncio.wait_for(server.close(), 1)
+            return lines
+
+        ok, too_long, end = asyncio.run(scenario())
+
+        assert json.loads(ok) == {"id": 1, "ok": True}
+        assert json.loads(too_long) == {"id": None, "ok": False, "error": "Message exceeds the line length limit."}
+        assert end == b""  # Closed by the server
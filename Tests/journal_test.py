@@ -0,0 +1,174 @@
+import gc
+import os
+import time
+import pytest
+from lib import journal, snapshot
+from lib.models.customer import Customer
+from lib.models.coffee import Coffee
+from lib.models.order import Order
+from lib.models.order_store import OrderStore
+
+class TestJournal:
+    """Test suite for the append-only order journal"""
+
+    @pytest.fixture
+    def path(self, tmp_path):
+        yield str(tmp_path / "shop.journal")
+        journal.stop()
+
+    def restart(self, path, **options):
+        journal.stop()
+        return journal.start(path, **options)
+
+    def summary(self, orders):
+        return sorted((o.customer.name, o.coffee.name, o.price, o.timestamp) for o in orders)
+
+    def test_replay_rebuilds_the_graph(self, path):
+        assert journal.start(path) == ([], [], [])
+        alice, bob = Customer("Alice"), Customer("Bob")
+        latte, mocha = Coffee("Latte"), Coffee("Mocha")
+        alice.create_order(latte, 4.5, timestamp=1000)
+        moved = bob.create_order(latte, 6.0, timestamp=2000)
+        moved.customer = alice
+        moved.coffee = mocha
+        bob.create_order(mocha, 2.0, timestamp=3000).cancel()
+        Order.bulk_create([(bob, latte, 3.0, 4000)])
+        alice.name = "Alicia"
+
+        customers, coffees, orders = self.restart(path)
+        assert [c.name for c in customers] == ["Alicia", "Bob"]
+        assert [c.name for c in coffees] == ["Latte", "Mocha"]
+        assert self.summary(orders) == [("Alicia", "Latte", 4.5, 1000.0), ("Alicia", "Mocha", 6.0, 2000.0),
+                                         ("Bob", "Latte", 3.0, 4000.0)]
+        assert Customer.most_aficionado(coffees[0]) is customers[0]
+
+        # Restored orders keep journaling under their old ids
+        orders[0].cancel()
+        customers[1].create_order(coffees[1], 9.0, timestamp=5000)
+        _, _, orders = self.restart(path)
+        assert self.summary(orders) == [("Alicia", "Mocha", 6.0, 2000.0), ("Bob", "Latte", 3.0, 4000.0),
+                                        ("Bob", "Mocha", 9.0, 5000.0)]
+
+    def test_group_commit(self, path):
+        journal.start(path, group_size=3, commit_interval=None)
+        running = journal.active()
+        customer, coffee = Customer("Alice"), Coffee("Latte")
+        customer.create_order(coffee, 4.0)  # Customer, coffee and order records: one group
+        assert running.commits == 1
+        customer.create_order(coffee, 4.0)
+        assert running.commits == 1
+        running.commit()
+        running.commit()  # Nothing buffered
+        assert running.commits == 2
+
+    def test_background_commits(self, path):
+        journal.start(path, commit_interval=0.001)
+        running = journal.active()
+        Customer("Alice").create_order(Coffee("Latte"), 4.0)
+        deadline = time.time() + 5
+        while running.commits == 0 and time.time() < deadline:
+            time.sleep(0.001)
+        assert running.commits == 1
+
+    def test_torn_tail_is_ignored(self, path):
+        journal.start(path)
+        customer, coffee = Customer("Alice"), Coffee("Latte")
+        customer.create_order(coffee, 4.0, timestamp=1000)
+        customer.create_order(coffee, 5.0, timestamp=2000)
+        journal.stop()
+        segment = os.path.join(path, sorted(os.listdir(path))[-1])
+        with open(segment, "r+b") as f:
+            f.truncate(os.path.getsize(segment) - 3)  # Crash in the middle of the last record
+
+        _, _, orders = journal.start(path)
+        assert [o.price for o in orders] == [4.0]
+
+    def test_compaction(self, path):
+        journal.start(path, commit_interval=None)
+        customer, coffee = Customer("Alice"), Coffee("Latte")
+        orders = [customer.create_order(coffee, 4.0, timestamp=i) for i in range(50)]
+        for order in orders[:40]:
+            order.cancel()
+        journal.active().compact(wait=True)
+        assert sorted(os.listdir(path)) == ["0000000002.log", "checkpoint"]
+        customer.create_order(coffee, 7.0, timestamp=100)
+
+        _, _, restored = self.restart(path)
+        assert sorted(o.timestamp for o in restored) == list(range(40, 50)) + [100]
+        assert len(restored) == 11
+
+    def test_automatic_compaction(self, path):
+        journal.start(path, group_size=1, commit_interval=None, compact_bytes=500)
+        customer, coffee = Customer("Alice"), Coffee("Latte")
+        for i in range(40):
+            customer.create_order(coffee, 4.0, timestamp=i).cancel()
+        journal.stop()
+        assert "checkpoint" in os.listdir(path)
+        assert len(os.listdir(path)) < 10
+        _, _, orders = journal.start(path)
+        assert orders == []
+
+    def test_orders_predating_the_journal(self, path):
+        alice, bob, latte = Customer("Alice"), Customer("Bob"), Coffee("Latte")
+        early = alice.create_order(latte, 4.0, timestamp=1000)
+        journal.start(path)
+        early.customer = bob  # Recorded with its state after the move
+        _, _, orders = self.restart(path)
+        assert self.summary(orders) == [("Bob", "Latte", 4.0, 1000.0)]
+
+    def test_restored_orders_are_journaled(self, path, tmp_path):
+        saved = str(tmp_path / "shop.snapshot")
+        alice, latte = Customer("Alice"), Coffee("Latte")
+        alice.create_order(latte, 4.0, timestamp=1000)
+        snapshot.save(saved, [alice], [latte])
+        journal.start(path)
+        snapshot.load(saved)
+        _, _, orders = self.restart(path)
+        assert self.summary(orders) == [("Alice", "Latte", 4.0, 1000.0)]
+
+    def test_collected_orders_do_not_shadow_new_ones(self, path, tmp_path):
+        saved = str(tmp_path / "shop.snapshot")
+        journal.start(path)
+
+        def churn():
+            customer, coffee = Customer("Gone"), Coffee("Espresso")
+            for i in range(50):
+                customer.create_order(coffee, 2.0, timestamp=i)
+        churn()
+        gc.collect()  # Their ids are free for the restored orders below
+        alice, bob, latte = Customer("Alice"), Customer("Bob"), Coffee("Latte")
+        for i in range(50):
+            alice.create_order(latte, 4.0, timestamp=1000 + i)
+        snapshot.save(saved, [alice], [latte])
+        _, _, restored = snapshot.load(saved)
+        for order in restored:
+            order.customer = bob
+
+        running = journal.active()
+        running.compact(wait=True)
+        assert len(running._orders) == 100  # The churned orders' keys are forgotten
+        _, _, orders = self.restart(path)
+        summary = self.summary(orders)
+        assert summary.count(("Gone", "Espresso", 2.0, 0.0)) == 1
+        assert sum(o[0] == "Bob" for o in summary) == 50
+        assert sum(o[0] == "Alice" for o in summary) == 50
+
+    def test_order_store_mutations(self, path):
+        journal.start(path)
+        alice, bob = Customer("Alice"), Customer("Bob")
+        latte, mocha = Coffee("Latte"), Coffee("Mocha")
+        store = OrderStore()
+        row = store.add(alice, latte, 4.0, timestamp=1000)
+        store.add(alice, latte, 5.0, timestamp=2000)
+        store.order(row).customer = bob
+        store.order(row).coffee = mocha
+        store.order(row + 1).cancel()
+        _, _, orders = self.restart(path)
+        assert self.summary(orders) == [("Bob", "Mocha", 4.0, 1000.0)]
+
+    def test_rejected_orders_are_not_journaled(self, path):
+        journal.start(path)
+        customer = Customer("Alice")
+        with pytest.raises(TypeError):
+            Order(customer, "not a coffee", 4.0)
+        assert self.restart(path)[2] == []
@@ -0,0 +1,58 @@
+import pytest
+from lib.models.leaderboard import Leaderboard
+
+class TestLeaderboard:
+    """Test suite for the Leaderboard ranking structure"""
+
+    @pytest.fixture
+    def board(self):
+        """Fixture providing a leaderboard ranked by string length on ties"""
+        return Leaderboard(len)
+
+    def test_empty(self, board):
+        assert board.leader() is None
+        assert board.top(3) == []
+        assert len(board) == 0
+
+    def test_ranking_and_ties(self, board):
+        board.add("bb", 5)
+        board.add("a", 5)
+        board.add("ccc", 7)
+
+        assert board.leader() == "ccc"
+        assert board.top(3) == ["ccc", "a", "bb"]  # "a" wins the tie on rank key
+        assert board.score("a") == 5
+
+    def test_decrease_and_removal(self, board):
+        board.add("a", 5)
+        board.add("bb", 3)
+        board.add("a", -4)
+
+        assert board.leader() == "bb"
+        board.add("a", -1)
+        assert "a" not in board
+        assert board.score("a") == 0
+        assert board.top(5) == ["bb"]
+
+    def test_discard(self, board):
+        board.add("a", 5)
+        board.add("bb", 3)
+        board.discard("a")
+        board.discard("missing")
+
+        assert board.top(5) == ["bb"]
+        assert board.score("a") == 0
+
+    def test_update_small_and_large_batches(self):
+        """Test both update paths (per-item for small batches, rebuild for large ones) agree with add"""
+        for batch in (3, 500):
+            incremental, batched = Leaderboard(int), Leaderboard(int)
+            for i in range(100):
+                incremental.add(i, i % 7 + 1)
+            batched.update({i: i % 7 + 1 for i in range(100)})
+            deltas = {i * 3 % 700: (-1) ** i * (i % 5 + 1) for i in range(batch)}
+            for item, delta in deltas.items():
+                incremental.add(item, delta)
+            batched.update(deltas)
+            assert batched.top(1000) == incremental.top(1000)
+            assert [batched.score(i) for i in range(700)] == [incremental.score(i) for i in range(700)]
@@ -0,0 +1,111 @@
+import gc
+import weakref
+import pytest
+from lib.models import memo
+from lib.models.customer import Customer
+from lib.models.coffee import Coffee
+from lib.models.order import Order
+from lib.models.order_store import OrderStore
+from lib.models.memo import MemoCache
+
+class TestMemo:
+    """Test suite for version-stamped memoization of derived results"""
+
+    @pytest.fixture(autouse=True)
+    def cache(self, monkeypatch):
+        """Fixture giving each test its own small cache"""
+        cache = MemoCache(max_size=100)
+        monkeypatch.setattr(memo, "cache", cache)
+        return cache
+
+    def test_repeated_calls_hit(self, cache):
+        alice, latte = Customer("Alice"), Coffee("Latte")
+        Order(alice, latte, 4.0)
+        assert alice.coffees() == [latte]
+        assert alice.coffees() == [latte]
+        assert latte.customers() == [alice]
+        stats = cache.stats()
+        assert (stats["hits"], stats["misses"], stats["size"]) == (1, 2, 2)
+
+    def test_results_are_copies(self):
+        alice, latte = Customer("Alice"), Coffee("Latte")
+        Order(alice, latte, 4.0)
+        alice.coffees().append("junk")
+        assert alice.coffees() == [latte]
+
+    def test_setters_invalidate_affected_instances(self, cache):
+        alice, bob = Customer("Alice"), Customer("Bob")
+        latte, mocha = Coffee("Latte"), Coffee("Mocha")
+        order = Order(alice, latte, 4.0)
+        Order(bob, mocha, 2.0)
+        assert (alice.coffees(), bob.coffees(), mocha.customers()) == ([latte], [mocha], [bob])
+
+        order.coffee = mocha
+        assert alice.coffees() == [mocha]
+        assert latte.customers() == []
+        order.customer = bob
+        assert mocha.customers() == [bob]
+        assert bob.coffees() == [mocha]
+        assert alice.coffees() == []
+        assert alice.favorite_coffee() is None
+        order.cancel()
+        assert bob.favorite_coffee() is mocha
+
+    def test_unrelated_writes_keep_results(self, cache):
+        alice, bob = Customer("Alice"), Customer("Bob")
+        latte, mocha = Coffee("Latte"), Coffee("Mocha")
+        Order(alice, latte, 4.0)
+        alice.coffees()
+        Order(bob, mocha, 2.0)
+        hits = cache.hits
+        assert alice.coffees() == [latte]
+        assert cache.hits == hits + 1
+
+    def test_bulk_and_store_writes_invalidate(self):
+        alice, latte = Customer("Alice"), Coffee("Latte")
+        assert latte.customers() == []
+        Order.bulk_create([(alice, latte, 4.0)])
+        assert latte.customers() == [alice]
+        bob = Customer("Bob")
+        store = OrderStore()
+        row = store.add(bob, latte, 5.0)
+        assert latte.top_customers(1) == [bob]
+        store.order(row).customer = alice
+        assert latte.top_customers(1) == [alice]
+        assert bob.coffees() == []
+
+    def test_arguments_are_part_of_the_key(self):
+        alice, bob, latte = Customer("Alice"), Customer("Bob"), Coffee("Latte")
+        Order(alice, latte, 4.0)
+        Order(bob, latte, 2.0)
+        assert latte.top_customers(1) == [alice]
+        assert latte.top_customers(2) == [alice, bob]
+
+    def test_lru_eviction(self, cache):
+        cache.resize(2)
+        coffees = [Coffee(f"Evict {i}") for i in range(3)]
+        for coffee in coffees:
+            coffee.customers()
+        coffees[1].customers()  # Hit: now most recently used
+        coffees[0].customers()  # Evicted first, so this misses
+        stats = cache.stats()
+        assert (stats["size"], stats["evictions"], stats["hits"], stats["misses"]) == (2, 2, 1, 4)
+        assert coffees[2]._memo == {}  # Evicted results are dropped from their instance
+
+    def test_results_do_not_keep_objects_alive(self, cache):
+        coffee = Coffee("Short Lived")
+        Customer("Gone").create_order(coffee, 4.0)
+        coffee.customers()
+        ref = weakref.ref(coffee)
+        del coffee
+        gc.collect()
+        assert ref() is None
+        cache.clear()
+        assert cache.stats() == {"hits": 0, "misses": 0, "evictions": 0, "hit_rate": 0.0,
+                                 "size": 0, "max_size": 100}
+
+    def test_rejects_bad_size(self, cache):
+        with pytest.raises(ValueError):
+            MemoCache(max_size=0)
+        with pytest.raises(ValueError):
+            cache.resize(0)
@@ -0,0 +1,35 @@
+import pytest
+from lib.models.money import average, to_cents, to_price
+
+class TestMoney:
+    """Test suite for the integer-cents money helpers"""
+
+    @pytest.mark.parametrize("price,cents", [
+        (1, 100), (4.35, 435), (1.1, 110), (9.999, 1000), (3.333333, 333), (10.0, 1000),
+    ])
+    def test_to_cents(self, price, cents):
+        assert to_cents(price) == cents
+        assert to_cents(price) is to_cents(float(price))  # Shared int objects
+
+    @pytest.mark.parametrize("price,expected_error", [
+        ("5", TypeError),
+        (None, TypeError),
+        (0.99, ValueError),
+        (10.01, ValueError),
+        (float("nan"), ValueError),
+        (float("inf"), ValueError),
+        (float("-inf"), ValueError),
+        (10 ** 400, ValueError),  # Too big for a float, but still a ValueError
+        (-10 ** 400, ValueError),
+    ])
+    def test_to_cents_validation(self, price, expected_error):
+        with pytest.raises(expected_error):
+            to_cents(price)
+
+    def test_average_rounds_half_to_even(self):
+        assert average(0, 0) == 0.0
+        assert average(1000, 2) == 5.0
+        assert average(1001, 2) == 5.0  # 500.5 cents -> 500
+        assert average(1003, 2) == 5.02  # 501.5 cents -> 502
+        assert average(1000, 3) == 3.33
+        assert to_price(435) == 4.35
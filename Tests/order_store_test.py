@@ -0,0 +1,86 @@
+import pytest
+from lib.models.customer import Customer
+from lib.models.coffee import Coffee
+from lib.models.order import Order
+from lib.models.order_store import OrderStore
+
+class TestOrderStore:
+    """Test suite for the columnar OrderStore"""
+
+    @pytest.fixture
+    def store(self):
+        return OrderStore()
+
+    @pytest.fixture
+    def sample_customer(self):
+        return Customer("Alice")
+
+    @pytest.fixture
+    def sample_coffee(self):
+        return Coffee("Espresso")
+
+    def test_add_and_view(self, store, sample_customer, sample_coffee):
+        row = store.add(sample_customer, sample_coffee, 4)
+        order = store.order(row)
+
+        assert isinstance(order, Order)
+        assert order.price == 4.0
+        assert order.customer == sample_customer
+        assert order.coffee == sample_coffee
+        assert order == store.order(row)  # Views of the same row compare equal
+        assert len(store) == 1
+
+    def test_validation(self, store, sample_customer, sample_coffee):
+        with pytest.raises(TypeError):
+            store.add(sample_customer, sample_coffee, "5")
+        with pytest.raises(ValueError):
+            store.add(sample_customer, sample_coffee, 10.01)
+        with pytest.raises(TypeError):
+            store.add("Not a customer", sample_coffee, 5.0)
+        assert len(store) == 0
+
+    def test_model_queries_include_stored_orders(self, store, sample_customer, sample_coffee):
+        bob = Customer("Bob")
+        regular = Order(sample_customer, sample_coffee, 3.0)
+        store.add(sample_customer, sample_coffee, 5.0)
+        store.add(bob, sample_coffee, 7.0)
+        store.add(bob, Coffee("Latte"), 2.0)
+
+        assert sample_customer.orders() == [regular, store.order(0)]
+        assert sample_coffee.orders() == [regular, store.order(0), store.order(1)]
+        assert sample_coffee.num_orders() == 3
+        assert sample_coffee.average_price() == 5.0
+        assert sample_coffee.customers() == [sample_customer, bob]
+        assert [c.name for c in bob.coffees()] == ["Espresso", "Latte"]
+        assert Customer.most_aficionado(sample_coffee) == sample_customer
+
+    def test_reassignment(self, store, sample_customer, sample_coffee):
+        bob = Customer("Bob")
+        latte = Coffee("Latte")
+        order = store.order(store.add(sample_customer, sample_coffee, 6.0))
+        store.add(bob, sample_coffee, 5.0)
+
+        order.customer = bob
+        assert sample_customer.orders() == []
+        assert bob.orders() == [store.order(1), order]
+
+        order.coffee = latte
+        assert sample_coffee.num_orders() == 1
+        assert latte.orders() == [order]
+        assert Customer.most_aficionado(latte) == bob
+
+        with pytest.raises(TypeError):
+            order.coffee = "Not a coffee"
+
+    def test_cancel(self, store, sample_customer, sample_coffee):
+        order = store.order(store.add(sample_customer, sample_coffee, 6.0))
+        kept = store.order(store.add(sample_customer, sample_coffee, 2.0))
+        order.cancel()
+
+        assert order.customer is None and order.coffee is None
+        assert sample_customer.orders() == [kept]
+        assert sample_coffee.average_price() == 2.0
+        assert list(store) == [kept]
+        assert len(store) == 1
+        with pytest.raises(ValueError):
+            order.coffee = sample_coffee
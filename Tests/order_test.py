@@ -1,3 +1,4 @@
+import time
 import pytest
 from lib.models.customer import Customer
 from lib.models.coffee import Coffee
@@ -35,6 +36,12 @@ class TestOrder:
         with pytest.raises(ValueError):
             Order(sample_customer, sample_coffee, 10.01)  # Too high
 
+        with pytest.raises(ValueError):
+            Order(sample_customer, sample_coffee, float("nan"))  # Not a real price
+
+        with pytest.raises(ValueError):
+            Order(sample_customer, sample_coffee, 10 ** 400)  # Too big for a float
+
     # ----- Property Tests -----
     def test_price_immutability(self, sample_order):
         """Test price cannot be modified after initialization"""
@@ -92,4 +99,84 @@ class TestOrder:
     def test_price_precision(self, sample_customer, sample_coffee):
         """Test floating point price handling"""
         order = Order(sample_customer, sample_coffee, 3.333333)
-        assert order.price == pytest.approx(3.333, 0.001)
\ No newline at end of file
+        assert order.price == pytest.approx(3.333, 0.001)
+        assert (order.cents, order.price) == (333, 3.33)  # Held as integer cents
+
+    def test_cancel(self, sample_order, sample_customer, sample_coffee):
+        """Test cancelling detaches the order from both sides"""
+        kept = Order(sample_customer, sample_coffee, 3.0)
+        sample_order.cancel()
+
+        assert sample_order.customer is None and sample_order.coffee is None
+        assert sample_customer.orders() == [kept]
+        assert sample_coffee.orders() == [kept]
+        assert sample_coffee.average_price() == 3.0
+        assert Customer.most_aficionado(sample_coffee) == sample_customer
+        assert "cancelled" in repr(sample_order)
+
+        sample_order.cancel()  # Cancelling twice is a no-op
+        assert sample_coffee.num_orders() == 1
+
+    def test_reassignment_keeps_insertion_order(self, sample_customer, sample_coffee):
+        """Test orders() stays in insertion order after removals"""
+        orders = [Order(sample_customer, sample_coffee, float(i)) for i in range(1, 6)]
+        orders[1].coffee = Coffee("Latte")
+        orders[3].customer = Customer("Bob")
+
+        assert sample_coffee.orders() == [orders[0], orders[2], orders[3], orders[4]]
+        assert sample_customer.orders() == [orders[0], orders[1], orders[2], orders[4]]
+
+    def test_models_are_slotted(self, sample_order):
+        """Test model instances carry no per-instance __dict__"""
+        for obj in (sample_order, sample_order.customer, sample_order.coffee):
+            assert not hasattr(obj, "__dict__")
+        with pytest.raises(AttributeError):
+            sample_order.discount = 1.0
+
+    def test_timestamp(self, sample_customer, sample_coffee):
+        """Test orders are stamped with the creation time unless one is given"""
+        before = time.time()
+        order = Order(sample_customer, sample_coffee, 4.0)
+        assert before <= order.timestamp <= time.time()
+        assert Order(sample_customer, sample_coffee, 4.0, 1_700_000_000).timestamp == 1_700_000_000.0
+        with pytest.raises(AttributeError):
+            order.timestamp = 0
+        with pytest.raises(TypeError):
+            Order(sample_customer, sample_coffee, 4.0, "yesterday")
+        with pytest.raises(ValueError):
+            Order(sample_customer, sample_coffee, 4.0, float("nan"))
+        assert len(sample_customer.orders()) == 2
+
+    # ----- Bulk Creation Tests -----
+    def test_bulk_create(self, sample_customer, sample_coffee):
+        """Test bulk creation wires relationships like the constructor"""
+        other = Customer("Bob")
+        orders, errors = Order.bulk_create([
+            (sample_customer, sample_coffee, 4.0),
+            (other, sample_coffee, 6),
+        ])
+
+        assert errors == []
+        assert [o.price for o in orders] == [4.0, 6.0]
+        assert orders[0].timestamp == orders[1].timestamp  # One stamp per batch
+        assert sample_customer.orders() == [orders[0]]
+        assert sample_coffee.orders() == orders
+        assert sample_coffee.average_price() == 5.0
+        assert Customer.most_aficionado(sample_coffee) == other
+
+    def test_bulk_create_reports_bad_rows(self, sample_customer, sample_coffee):
+        """Test invalid rows are reported without aborting the batch"""
+        orders, errors = Order.bulk_create([
+            (sample_customer, sample_coffee, "5"),
+            (sample_customer, sample_coffee, 3.0),
+            (sample_customer, sample_coffee, 10.01),
+            ("Not a customer", sample_coffee, 3.0),
+            (sample_customer, sample_coffee),
+            (sample_customer, sample_coffee, 3.0, "noon"),
+        ])
+
+        assert len(orders) == 1
+        assert [index for index, _ in errors] == [0, 2, 3, 4, 5]
+        assert [type(error) for _, error in errors] == [TypeError, ValueError, TypeError, ValueError,
+                                                        TypeError]
+        assert sample_coffee.num_orders() == 1
@@ -0,0 +1,56 @@
+import gc
+import pytest
+from lib.models.customer import Customer
+from lib.models.coffee import Coffee
+from lib.models.order import Order
+from lib.models.registry import Registry
+
+class TestRegistry:
+    """Test suite for the weak customer/coffee registries"""
+
+    def test_customer_lookup(self):
+        dana = Customer("Dana")
+        assert Customer.get(dana._id) is dana
+        assert dana in Customer.find("Dana")
+        assert dana in Customer.all()
+        assert Customer.get(-1) is None
+
+    def test_find_follows_renames(self):
+        customer = Customer("Eve")
+        customer.name = "Evelyn"
+        assert customer not in Customer.find("Eve")
+        assert customer in Customer.find("Evelyn")
+
+    def test_unused_customers_are_collected(self):
+        registry = Registry()
+
+        class Thing:
+            pass
+
+        kept = Thing()
+        registry.register(kept, "kept")
+        for i in range(1000):
+            registry.register(Thing(), f"temp{i}")
+        gc.collect()
+
+        assert len(registry) == 1
+        assert registry.find("temp0") == []
+        assert list(registry) == [kept]
+
+    def test_customers_with_orders_stay_registered(self):
+        coffee = Coffee("Cortado")
+        customer = Customer("Frank")
+        Order(customer, coffee, 3.0)
+        customer_id = customer._id
+        del customer
+        gc.collect()
+
+        assert Customer.get(customer_id) is coffee.customers()[0]
+
+    def test_coffee_intern(self):
+        first = Coffee.intern("Affogato")
+        assert Coffee.intern(" Affogato ") is first
+        assert Coffee.get(first._id) is first
+        assert Coffee.intern("Lungo") is not first
+        with pytest.raises(ValueError):
+            Coffee.intern("A")
@@ -0,0 +1,66 @@
+import pytest
+from lib.models.rolling import RollingWindow
+
+class TestRollingWindow:
+    """Test suite for the bucketed rolling window"""
+
+    @pytest.fixture
+    def window(self):
+        """Fixture providing a 60 second window in 10 second buckets"""
+        return RollingWindow(60, buckets=6)
+
+    def test_counts_and_expiry(self, window):
+        for second in (0, 5, 25, 59):
+            window.add(second, 250)
+        assert (window.count(59), window.revenue(59)) == (4, 1000)
+        assert window.count(65) == 2  # Bucket [0, 10) has expired
+        assert window.count(1000) == 0
+        assert len(window._buckets) == 0
+
+    def test_memory_is_bounded(self, window):
+        for second in range(10_000):
+            window.add(second, 100)
+        assert len(window._buckets) <= window.buckets
+        assert window.count(9_999) == 60
+
+    def test_late_orders_and_removal(self, window):
+        window.add(50, 300)
+        window.add(15, 400)  # Late, but still inside the window
+        window.add(-20, 500)  # Too old: ignored
+        assert window.count(50) == 2
+        window.remove(15, 400)
+        window.remove(-20, 500)
+        assert (window.count(50), window.revenue(50)) == (1, 300)
+        assert [bucket[0] for bucket in window._buckets] == [5]
+
+    def test_time_does_not_rewind(self, window):
+        window.add(100, 100)
+        assert window.count(100) == 1
+        assert window.count(0) == 1
+
+    def test_future_orders_do_not_move_the_window(self):
+        window = RollingWindow(60, buckets=6, clock=lambda: 4)
+        window.add(86_400, 900)  # A terminal clock a day ahead
+        for second in range(5):
+            window.add(second, 100)
+        assert (window.count(4), window.revenue(4)) == (5, 500)
+        window.remove(86_400, 900)
+        window.add(86_450, 200)
+        assert (window.count(86_459), window.revenue(86_459)) == (1, 200)
+        assert len(window._pending) == 0
+
+    def test_pending_stays_bounded_between_queries(self):
+        now = [0.0]
+        window = RollingWindow(3600, clock=lambda: now[0])
+        window.count(0)
+        for minute in range(30 * 24 * 60):  # A month of orders without another query
+            now[0] = minute * 60.0
+            window.add(now[0], 100)
+        assert len(window._pending) == 0 and len(window._buckets) <= window.buckets
+        assert window.count(now[0]) == 60
+
+    def test_invalid_configuration(self):
+        with pytest.raises(ValueError):
+            RollingWindow(0)
+        with pytest.raises(ValueError):
+            RollingWindow(60, buckets=0)
@@ -0,0 +1,172 @@
+import math
+import pickle
+import random
+import sys
+import threading
+from operator import attrgetter
+import pytest
+from lib import concurrency
+from lib.models.customer import Customer
+from lib.models.coffee import Coffee
+from lib.models.order import Order
+from lib.sketches import CountMinSketch, HeavyHitters, HyperLogLog, PriceQuantiles, ShopSketch, hash64
+
+class TestSketches:
+    """Test suite for the approximate analytics sketches, checked against the exact methods"""
+
+    @pytest.fixture
+    def shop(self):
+        """Fixture providing a Zipf-shaped shop fed into an attached sketch: (sketch, customers, coffees)"""
+        rng = random.Random(7)
+        customers = [Customer(f"Sketch{i}") for i in range(2000)]
+        coffees = [Coffee(f"Sketch Coffee {i}") for i in range(8)]
+        weights = [1 / (rank + 1) ** 1.1 for rank in range(len(customers))]
+        sketch = ShopSketch()
+        sketch.attach()
+        try:
+            for customer, coffee in zip(rng.choices(customers, weights, k=10_000),
+                                        rng.choices(coffees, [8, 7, 6, 5, 4, 3, 2, 1], k=10_000)):
+                customer.create_order(coffee, rng.randrange(100, 1001) / 100)
+        finally:
+            sketch.detach()
+        return sketch, customers, coffees
+
+    def exact_spend(self, customers):
+        return {customer: sum(order.cents for order in customer.orders()) for customer in customers}
+
+    def test_hash_is_stable(self):
+        assert hash64(1) == hash64(1) != hash64(2)
+        assert hash64("Latte") == hash64("Latte") != hash64("Mocha")
+        assert 0 <= hash64(10 ** 30) < 2 ** 64 and 0 <= hash64("x") < 2 ** 64
+
+    def test_distinct_customers_within_error_bound(self, shop):
+        sketch, _, coffees = shop
+        bound = 3 * 1.04 / math.sqrt(2 ** sketch.precision)  # Three standard errors
+        for coffee in coffees:
+            exact = len(coffee.customers())
+            assert abs(sketch.distinct_customers(coffee) - exact) <= bound * exact
+        assert sketch.distinct_customers(Coffee("Never Sketched")) == 0
+
+    def test_large_cardinality(self):
+        hll = HyperLogLog(12)
+        for key in range(200_000):
+            hll.add(key)
+            hll.add(key)  # Repeats are free
+        assert abs(hll.count() - 200_000) <= 3 * 1.04 / 64 * 200_000
+
+    def test_spend_never_underestimates_and_respects_bound(self, shop):
+        sketch, customers, _ = shop
+        counts = sketch.spend.counts
+        spend = self.exact_spend(customers)
+        errors = [counts.estimate(customer._id) - cents for customer, cents in spend.items()]
+        assert min(errors) >= 0
+        within = sum(error <= counts.error_bound() for error in errors)
+        assert within >= (1 - math.exp(-counts.depth)) * len(errors)
+
+    def test_top_spenders_match_exact(self, shop):
+        sketch, customers, _ = shop
+        spend = self.exact_spend(customers)
+        bound = sketch.spend.counts.error_bound()
+        top = sketch.top_spenders(5)
+        estimates = [round(estimate * 100) for _, estimate in top]
+        assert estimates == sorted(estimates, reverse=True)
+        for (customer, _), estimate in zip(top, estimates):
+            assert 0 <= estimate - spend[customer] <= bound
+        # Close spenders may swap (collisions depend on the ids), but anyone
+        # clearly above the fifth estimate is listed
+        listed = {customer for customer, _ in top}
+        assert all(customer in listed for customer, cents in spend.items() if cents > estimates[-1] + bound)
+        assert top[0][0] is max(spend, key=spend.get)
+
+    def test_top_coffees_match_exact(self, shop):
+        sketch, _, coffees = shop
+        exact = sorted(coffees, key=lambda c: -c.num_orders())
+        assert [coffee for coffee, _ in sketch.top_coffees(8)] == exact
+        assert all(count == coffee.num_orders() for coffee, count in sketch.top_coffees(8))
+
+    def test_price_quantiles_are_exact(self, shop):
+        sketch, _, coffees = shop
+        prices = sorted(order.price for coffee in coffees for order in coffee.orders())
+        for q in (0, 0.01, 0.25, 0.5, 0.9, 0.99, 1):
+            assert sketch.price_quantile(q) == prices[max(1, math.ceil(q * len(prices))) - 1]
+        assert PriceQuantiles().quantile(0.5) == 0.0
+        with pytest.raises(ValueError):
+            sketch.price_quantile(1.5)
+
+    def test_merged_shards_equal_one_sketch(self):
+        rng = random.Random(3)
+        customers = [Customer(f"Shard{i}") for i in range(200)]
+        coffees = [Coffee(f"Shard Coffee {i}") for i in range(4)]
+        whole, shards = ShopSketch(k=5), [ShopSketch(k=5), ShopSketch(k=5)]
+        for i in range(2000):
+            order = Order(rng.choice(customers), rng.choice(coffees), rng.randrange(100, 1001) / 100)
+            whole.add(order)
+            shards[i % 2].add(order)
+        merged = pickle.loads(pickle.dumps(shards[0]))  # Shards can come from worker processes
+        merged.merge(pickle.loads(pickle.dumps(shards[1])))
+
+        for coffee in coffees:
+            assert merged.distinct_customers(coffee) == whole.distinct_customers(coffee)
+        assert merged.spend.counts.rows == whole.spend.counts.rows
+        assert merged.top_coffees() == whole.top_coffees()
+        assert merged.price_quantile(0.5) == whole.price_quantile(0.5)
+
+    def test_attached_to_register_threads(self):
+        customers = [Customer(f"Thread{i}") for i in range(100)]
+        coffees = [Coffee(f"Thread Coffee {i}") for i in range(4)]
+        sketch = ShopSketch(k=5)  # Fewer slots than customers, so spenders keep being evicted
+        errors = []
+
+        def register(index):
+            try:
+                for i in range(500):
+                    customers[(index * 31 + i) % 100].create_order(coffees[i % 4], 1 + i % 9)
+            except Exception as error:
+                errors.append(error)
+
+        threads = [threading.Thread(target=register, args=(i,)) for i in range(4)]
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        concurrency.enable()
+        sketch.attach()
+        try:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            sketch.detach()
+            concurrency.disable()
+            sys.setswitchinterval(interval)
+        assert errors == []
+        exact = self.exact_spend(customers)
+        assert sketch.prices.total == sketch.popularity.counts.total == 2000
+        assert sketch.spend.counts.total == sum(exact.values())
+        for customer, spend in sketch.top_spenders(5):
+            assert round(spend * 100) >= exact[customer]
+
+    def test_keyed_by_name(self):
+        sketch = ShopSketch(customer_key=attrgetter("name"), coffee_key=attrgetter("name"))
+        alice, latte = Customer("Alice"), Coffee("Latte")
+        sketch.add(Order(alice, latte, 4.0))
+        sketch.add(Order(Customer("Alice"), latte, 2.0))  # Another Alice counts as the same key
+        assert sketch.top_spenders() == [("Alice", 6.0)]
+        assert sketch.top_coffees() == [("Latte", 2)]
+        assert sketch.distinct_customers(latte) == 1
+
+    def test_memory_is_fixed(self):
+        hitters = HeavyHitters(k=3, width=64, depth=2)
+        for key in range(10_000):
+            hitters.add(key, key % 7)
+        assert len(hitters.top) == 3
+        assert [len(row) for row in hitters.counts.rows] == [64, 64]
+
+    def test_mismatched_merges_are_rejected(self):
+        with pytest.raises(ValueError):
+            HyperLogLog(10).merge(HyperLogLog(12))
+        with pytest.raises(ValueError):
+            CountMinSketch(64).merge(CountMinSketch(128))
+        with pytest.raises(ValueError):
+            ShopSketch(precision=10).merge(ShopSketch())
+        with pytest.raises(ValueError):
+            HyperLogLog(3)
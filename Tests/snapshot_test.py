@@ -0,0 +1,78 @@
+import pytest
+from array import array
+from lib import snapshot
+from lib.models.customer import Customer
+from lib.models.coffee import Coffee
+from lib.models.order import Order
+from lib.models.order_store import OrderStore
+
+class TestSnapshot:
+    """Test suite for binary snapshot save/load"""
+
+    @pytest.fixture
+    def shop(self):
+        """Fixture providing a small object graph: (customers, coffees)"""
+        alice, bob = Customer("Alice"), Customer("Bøb")
+        latte, mocha, unused = Coffee("Latte"), Coffee("Mocha"), Coffee("Cold Brew")
+        Order(alice, latte, 4.5)
+        Order(bob, latte, 6.0)
+        Order(alice, mocha, 3.25)
+        store = OrderStore()
+        store.add(bob, mocha, 9.0)
+        return [alice, bob], [latte, mocha, unused]
+
+    def test_round_trip(self, shop, tmp_path):
+        customers, coffees = shop
+        path = tmp_path / "shop.snap"
+        assert snapshot.save(str(path), customers, coffees) == 4
+
+        restored_customers, restored_coffees, orders = snapshot.load(str(path))
+        alice, bob = restored_customers
+        latte, mocha, unused = restored_coffees
+
+        assert [c.name for c in restored_customers] == ["Alice", "Bøb"]
+        assert [c.name for c in restored_coffees] == ["Latte", "Mocha", "Cold Brew"]
+        assert len(orders) == 4
+        assert [(o.coffee.name, o.price) for o in alice.orders()] == [("Latte", 4.5), ("Mocha", 3.25)]
+        assert [o.timestamp for o in orders] == [o.timestamp for c in customers for o in c.orders()]
+        assert latte.average_price() == 5.25
+        assert mocha.num_orders() == 2
+        assert Customer.most_aficionado(latte) is bob
+        assert Customer.most_aficionado(mocha) is bob
+        assert unused.num_orders() == 0
+
+    def test_restored_objects_are_registered(self, shop, tmp_path):
+        customers, coffees = shop
+        path = tmp_path / "shop.snap"
+        snapshot.save(str(path), customers, coffees)
+        (alice, _), (latte, _, _), _ = snapshot.load(str(path))
+
+        assert Customer.get(alice._id) is alice
+        assert alice in Customer.find("Alice")
+        alice.name = "Alicia"  # Restored customers still validate on update
+        with pytest.raises(ValueError):
+            alice.name = ""
+        order = alice.create_order(latte, 2.0)
+        assert order in latte.orders()
+
+    def test_rejects_other_files(self, tmp_path):
+        path = tmp_path / "junk.snap"
+        path.write_bytes(b"not a snapshot at all")
+        with pytest.raises(ValueError):
+            snapshot.load(str(path))
+
+    def test_loads_version_2_float_prices(self, tmp_path):
+        path = tmp_path / "old.snap"
+        blob = b"OlgaOld Roast"
+        header = snapshot._HEADER.pack(snapshot.MAGIC, 2, snapshot._NATIVE, 1, 1, 2)
+        parts = [
+            array("I", [0, 4]).tobytes(), array("I", [0, 9]).tobytes(), blob,
+            array("I", [0, 0]).tobytes(), array("I", [0, 0]).tobytes(),
+            array("d", [4.35, 2.1]).tobytes(), array("d", [1.0, 2.0]).tobytes(),
+        ]
+        path.write_bytes(header + b"".join(part + snapshot._padding(len(part)) for part in parts))
+
+        (olga,), (roast,), orders = snapshot.load(str(path))
+        assert [(o.cents, o.timestamp) for o in orders] == [(435, 1.0), (210, 2.0)]
+        assert roast.total_revenue() == 6.45
+        assert olga.favorite_coffee() is roast
@@ -0,0 +1,155 @@
+import sqlite3
+import pytest
+from lib import storage
+from lib.models.customer import Customer
+from lib.models.coffee import Coffee
+from lib.models.order import Order
+from lib.models.order_store import OrderStore
+
+class TestSqliteStorage:
+    """Test suite for the SQLite storage backend"""
+
+    @pytest.fixture
+    def path(self, tmp_path):
+        return str(tmp_path / "shop.db")
+
+    def rows(self, path, sql):
+        storage.flush()
+        with sqlite3.connect(path) as conn:
+            return conn.execute(sql).fetchall()
+
+    def test_writes_are_mirrored(self, path):
+        storage.use_sqlite(path)
+        alice, bob = Customer("Alice"), Customer("Bob")
+        latte = Coffee("Latte")
+        order = alice.create_order(latte, 4.5, timestamp=1000)
+        bob.create_order(latte, 6.0)
+        assert self.rows(path, "SELECT name FROM customers WHERE name IN ('Alice', 'Bob') ORDER BY id") == [
+            ("Alice",), ("Bob",)]
+        assert self.rows(path, "SELECT COUNT(*), SUM(cents) FROM orders") == [(2, 1050)]
+
+        order.customer = bob
+        alice.name = "Alicia"
+        assert self.rows(path, "SELECT COUNT(DISTINCT customer_id) FROM orders") == [(1,)]
+        assert self.rows(path, "SELECT COUNT(*) FROM customers WHERE name = 'Alicia'") == [(1,)]
+        order.cancel()
+        assert self.rows(path, "SELECT COUNT(*), SUM(cents) FROM orders") == [(1, 600)]
+
+    def test_queries_match_memory(self):
+        alice, bob, carol = Customer("Alice"), Customer("Bob"), Customer("Carol")
+        latte, mocha = Coffee("Latte"), Coffee("Mocha")
+        Order(carol, latte, 5.0)
+        Order(bob, latte, 5.0)
+        Order(alice, latte, 2.0)
+        Order(alice, latte, 3.0)  # Alice ties Bob and Carol at 5.0
+        Order(alice, mocha, 3.25)
+        Order(bob, mocha, 1.0)
+        Order(alice, latte, 1.0)  # Alice now leads
+        expected = (latte.num_orders(), latte.average_price(), list(latte.customers()),
+                    [c.name for c in alice.coffees()], Customer.most_aficionado(latte),
+                    Customer.most_aficionado(mocha))
+        storage.use_sqlite()
+        assert (latte.num_orders(), latte.average_price(), list(latte.customers()),
+                [c.name for c in alice.coffees()], Customer.most_aficionado(latte),
+                Customer.most_aficionado(mocha)) == expected
+        assert Customer.most_aficionado(latte) is alice
+
+    def test_list_orders_match_memory(self):
+        xxx, yyy, zzz = Customer("Xxx"), Customer("Yyy"), Customer("Zzz")
+        alice = Customer("Alice")
+        first, second, third = Coffee("Aaa"), Coffee("Ccc"), Coffee("Ccc")
+        orders = [Order(zzz, first, 2.0), Order(xxx, first, 3.0), Order(alice, third, 1.0)]
+        orders[0].customer = yyy  # Reassignments used to reorder the two backends differently
+        Order(zzz, first, 1.0)
+        Order(alice, first, 4.0)
+        orders[2].coffee = second
+        Order(alice, third, 2.0)
+        expected = ([c.name for c in first.customers()], alice.coffees())
+        assert expected == (["Xxx", "Yyy", "Zzz", "Alice"], [first, third])
+        storage.use_sqlite()
+        assert ([c.name for c in first.customers()], alice.coffees()) == expected
+
+    def test_ties_go_to_the_earliest_customer(self):
+        storage.use_sqlite()
+        first, second = Customer("First"), Customer("Second")
+        coffee = Coffee("Tied")
+        Order(second, coffee, 5.0)
+        Order(first, coffee, 5.0)
+        assert Customer.most_aficionado(coffee) is first
+        assert Customer.most_aficionado(Coffee("Unordered")) is None
+
+    def test_reopen_restores_the_graph(self, path):
+        storage.use_sqlite(path)
+        alice, bob = Customer("Alice"), Customer("Bob")
+        latte, mocha = Coffee("Latte"), Coffee("Mocha")
+        Order(alice, latte, 4.5, timestamp=1000)
+        Order(bob, latte, 6.0, timestamp=2000)
+        moved = Order(alice, mocha, 3.25)
+        moved.coffee = latte
+        Order(bob, mocha, 2.0).cancel()
+        storage.use_memory()
+
+        customers, coffees, orders = storage.use_sqlite(path)
+        assert [c.name for c in customers] == ["Alice", "Bob"]
+        assert [c.name for c in coffees] == ["Latte", "Mocha"]
+        assert sorted(o.price for o in orders) == [3.25, 4.5, 6.0]
+        restored_latte = coffees[0]
+        assert restored_latte is not latte
+        assert restored_latte.num_orders() == 3
+        assert restored_latte.price_stats()["count"] == 3  # In-memory aggregates are rebuilt too
+        assert Customer.most_aficionado(restored_latte) is customers[0]  # 4.5 + 3.25 > 6.0
+        assert coffees[1].customers() == []
+
+        Order(customers[1], coffees[1], 9.0)  # New rows continue after the restored ones
+        assert Customer.most_aficionado(coffees[1]) is customers[1]
+
+    def test_live_objects_are_written_when_switched_on(self, path):
+        alice, latte = Customer("Alice"), Coffee("Latte")
+        Order(alice, latte, 4.0)
+        storage.use_sqlite(path)
+        assert latte.customers() == [alice]
+        assert latte.num_orders() == 1
+        assert alice.coffees() == [latte]
+
+    def test_writes_are_batched(self, path):
+        storage.use_sqlite(path, batch_size=3)
+        backend = storage.active()
+        customer, coffee = Customer("Batch"), Coffee("Batched")  # Two queued rows
+        assert len(backend._pending) == 2
+        Order(customer, coffee, 4.0)  # Third statement commits the batch
+        assert backend._pending == []
+        Order(customer, coffee, 4.0)
+        assert len(backend._pending) == 1
+        assert coffee.num_orders() == 2  # Queries commit first
+        assert backend._pending == []
+
+    def test_order_store_rows_are_mirrored(self, path):
+        storage.use_sqlite(path)
+        alice, bob = Customer("Alice"), Customer("Bob")
+        latte, mocha = Coffee("Latte"), Coffee("Mocha")
+        store = OrderStore()
+        row = store.add(alice, latte, 4.0)
+        store.add(bob, latte, 2.0)
+        assert latte.num_orders() == 2
+        store.order(row).coffee = mocha
+        store.order(row).customer = bob
+        assert mocha.customers() == [bob]
+        assert {c.name for c in bob.coffees()} == {"Latte", "Mocha"}
+        store.order(row).cancel()
+        assert mocha.num_orders() == 0
+        assert self.rows(path, "SELECT COUNT(*) FROM orders") == [(1,)]
+
+    def test_backend_does_not_keep_objects_alive(self):
+        import gc
+        import weakref
+        storage.use_sqlite()
+        coffee = Coffee("Short Lived")
+        Customer("Gone").create_order(coffee, 4.0)
+        ref = weakref.ref(coffee)
+        del coffee
+        gc.collect()
+        assert ref() is None
+
+    def test_rejects_bad_batch_size(self):
+        with pytest.raises(ValueError):
+            storage.use_sqlite(batch_size=0)
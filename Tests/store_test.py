@@ -0,0 +1,196 @@
+import asyncio
+import functools
+import threading
+from concurrent.futures import ProcessPoolExecutor
+import pytest
+from lib.analytics import ChainCustomer, chain_report, store_partial, store_partials
+from lib.models import store
+from lib.models.customer import Customer
+from lib.models.coffee import Coffee
+from lib.models.order import Order
+from lib.models.order_store import OrderStore
+from lib.models.store import DEFAULT_STORE, Store
+from lib.sketches import ShopSketch
+
+
+def build_downtown():
+    """Store builder for the worker-process tests (module level so it pickles)"""
+    alice, bob = Customer("Alice"), Customer("Bob")
+    latte = Coffee("Latte")
+    alice.create_order(latte, 4.0)
+    bob.create_order(latte, 6.0)
+    bob.create_order(Coffee("Mocha"), 3.0)
+    return [alice, bob]
+
+
+def build_airport():
+    alice = Customer("Alice")
+    alice.create_order(Coffee("Latte"), 5.0)
+    alice.create_order(Coffee.intern("Latte"), 5.0)
+    return [alice]
+
+
+class TestStore:
+    """Test suite for per-store model state and chain-wide reports"""
+
+    def test_stores_have_separate_registries(self):
+        downtown, airport = Store("Downtown"), Store("Airport")
+        with downtown:
+            latte = Coffee("Latte")
+            alice = Customer("Alice")
+            assert Coffee.intern("Latte") is latte
+            assert Customer.find("Alice") == [alice]
+        with airport:
+            assert Coffee.get(latte._id) is None
+            assert Customer.find("Alice") == []
+            other = Coffee.intern("Latte")
+            assert other is not latte and other._id != latte._id
+        assert latte._store is downtown and other._store is airport
+        assert Coffee.get(latte._id) is None  # Not in the default store either
+        assert (downtown.customer_count, airport.customer_count) == (1, 0)
+
+    def test_stores_nest(self):
+        outer, inner = Store("Outer"), Store("Inner")
+        assert store.current() is DEFAULT_STORE
+        with outer:
+            with inner:
+                assert store.current() is inner
+            assert store.current() is outer
+        assert store.current() is DEFAULT_STORE
+
+    def test_overlapping_asyncio_tasks(self):
+        downtown = Store("Downtown")
+        seen = []
+
+        async def serve():
+            with downtown:  # Both tasks are inside the same store before either leaves
+                await asyncio.sleep(0)
+                seen.append(store.current())
+            seen.append(store.current())
+
+        async def main():
+            await asyncio.gather(serve(), serve())
+
+        asyncio.run(main())
+        assert seen == [downtown, DEFAULT_STORE] * 2
+
+    def test_rankings_are_per_store(self):
+        downtown, airport = Store("Downtown"), Store("Airport")
+        with downtown:
+            customer, latte, mocha = Customer("Alice"), Coffee("Latte"), Coffee("Mocha")
+            customer.create_order(latte, 4.0)
+            customer.create_order(mocha, 2.0)
+            customer.create_order(mocha, 2.0)
+        with airport:
+            assert Coffee.most_popular(10) == []
+            cortado = Coffee("Cortado")
+            Customer("Bob").create_order(cortado, 9.0)
+            assert Coffee.top_revenue(10) == [cortado]
+        with downtown:
+            assert Coffee.most_popular(10) == [mocha, latte]
+            assert Coffee.top_revenue(10) == [latte, mocha]
+
+    def test_cross_store_orders_are_rejected(self):
+        with Store("Downtown"):
+            alice, latte = Customer("Alice"), Coffee("Latte")
+        with Store("Airport"):
+            bob, mocha = Customer("Bob"), Coffee("Mocha")
+        with pytest.raises(ValueError):
+            Order(alice, mocha, 4.0)
+        assert alice.orders() == [] and mocha.orders() == []
+
+        order = alice.create_order(latte, 4.0)
+        with pytest.raises(ValueError):
+            order.customer = bob
+        with pytest.raises(ValueError):
+            order.coffee = mocha
+        assert (order.customer, order.coffee) == (alice, latte)
+
+        orders, errors = Order.bulk_create([(alice, latte, 4.0), (bob, latte, 4.0)])
+        assert len(orders) == 1 and [index for index, _ in errors] == [1]
+
+        rows = OrderStore()
+        with pytest.raises(ValueError):
+            rows.add(bob, latte, 4.0)
+        row = rows.add(alice, latte, 4.0)
+        with pytest.raises(ValueError):
+            rows.order(row).customer = bob
+        with pytest.raises(ValueError):
+            rows.order(row).coffee = mocha
+
+    def test_queries_outside_the_current_store(self):
+        with Store("Downtown") as downtown:
+            alice, latte = Customer("Alice"), Coffee("Latte")
+            sketch = ShopSketch()
+            sketch.add(alice.create_order(latte, 4.0))
+        # The SQLite backend and the sketch resolve ids through the objects' own store
+        assert latte.customers() == [alice]
+        assert alice.coffees() == [latte]
+        assert Customer.most_aficionado(latte) is alice
+        assert sketch.location is downtown
+        assert sketch.top_spenders() == [(alice, 4.0)] and sketch.top_coffees() == [(latte, 1)]
+
+    def test_idempotency_keys_are_per_store(self):
+        orders = []
+        for name in ("Downtown", "Airport"):
+            with Store(name):
+                customer, latte = Customer("Alice"), Coffee("Latte")
+                orders.append(customer.create_order(latte, 4.0, idempotency_key="pos-1"))
+                assert customer.create_order(latte, 4.0, idempotency_key="pos-1") is orders[-1]
+        assert orders[0] is not orders[1]
+
+    def test_new_threads_start_in_the_default_store(self):
+        seen = []
+        with Store("Downtown"):
+            thread = threading.Thread(target=lambda: seen.append(store.current()))
+            thread.start()
+            thread.join()
+        assert seen == [DEFAULT_STORE]
+
+    def test_chain_report_merges_stores(self):
+        downtown, airport = Store("Downtown"), Store("Airport")
+        with downtown:
+            created = build_downtown()
+        with airport:
+            created += build_airport()
+        report = chain_report([store_partial(downtown), store_partial(airport)])
+
+        assert list(report) == ["Latte", "Mocha"]
+        latte = report["Latte"]
+        assert (latte.num_orders, latte.total_revenue, latte.average_price) == (4, 20.0, 5.0)
+        alice, bob, airport_alice = (ChainCustomer(c._id, c._store.name, c.name) for c in created)
+        assert latte.most_aficionado == airport_alice  # 10.0; the two Alices are not merged
+        assert latte.customers == [alice, bob, airport_alice]
+        assert report["Mocha"] == (1, 3.0, 3.0, bob, [bob])
+        assert store_partial(Store("Empty")) == {}
+
+    def test_ties_go_to_the_earliest_customer(self):
+        first, second = Store(), Store()
+        with first:
+            kept = [Customer("Zoe"), Coffee("Latte")]
+            kept[0].create_order(kept[1], 5.0)
+        with second:
+            kept += [Customer("Adam"), Coffee("Latte")]
+            kept[2].create_order(kept[3], 5.0)
+        leader = chain_report([store_partial(first), store_partial(second)])["Latte"].most_aficionado
+        assert leader.name == "Zoe"  # Like Leaderboard: the smaller id, not the first name
+
+    def test_worker_processes(self):
+        builders = [("Downtown", build_downtown), ("Airport", build_airport)]
+        in_process = chain_report(store_partials(builders, workers=1))
+        with ProcessPoolExecutor(2) as pool:
+            pooled = chain_report(store_partials(builders, executor=pool))
+        def without_ids(report):  # Ids come from each process's own counters
+            return {coffee: row._replace(most_aficionado=row.most_aficionado[1:],
+                                         customers=sorted(customer[1:] for customer in row.customers))
+                    for coffee, row in report.items()}
+        assert without_ids(pooled) == without_ids(in_process)
+        assert pooled["Latte"].most_aficionado[1:] == ("Airport", "Alice")
+
+    def test_worker_stores_need_distinct_names(self):
+        # Same-named stores from different workers could hold customers with the same id
+        same = functools.partial(build_downtown)
+        with pytest.raises(ValueError):
+            store_partials([("Downtown", build_downtown), ("Downtown", same)], workers=1)
+        report = chain_report(store_partials([("North", same), ("South", same)], workers=1))
+        assert [customer.store for customer in report["Latte"].customers] == ["North"] * 2 + ["South"] * 2
@@ -0,0 +1,77 @@
+import statistics
+import pytest
+from lib.models.customer import Customer
+from lib.models.coffee import Coffee
+from lib.models.store import Store
+
+np = pytest.importorskip("numpy")
+from lib import vectorized  # noqa: E402
+
+class TestVectorized:
+    """Test suite for the optional NumPy analytics"""
+
+    @pytest.fixture
+    def shop(self):
+        coffees = [Coffee(f"Vector Coffee {i}") for i in range(3)]
+        customers = [Customer(f"Vec{i}") for i in range(4)]
+        for i in range(50):
+            customers[i % 4].create_order(coffees[i % 3], 1 + (i * 5) % 9 + 0.25)
+        customers[3].create_order(coffees[0], 2.0)  # Uneven order counts per coffee
+        return coffees, customers, vectorized.export_arrays(coffees)
+
+    def prices(self, coffee):
+        return [order.price for order in coffee.orders()]
+
+    def test_coffee_stats_match_models(self, shop):
+        coffees, _, arrays = shop
+        stats = vectorized.coffee_stats(arrays)
+        for coffee in coffees:
+            prices = self.prices(coffee)
+            row = stats[coffee]
+            assert row["count"] == coffee.num_orders()
+            assert row["revenue"] == coffee.total_revenue()
+            assert row["mean"] == coffee.average_price()
+            assert row["median"] == statistics.median(prices)
+            assert (row["min"], row["max"]) == (min(prices), max(prices))
+
+    def test_percentiles_and_histograms(self, shop):
+        coffees, _, arrays = shop
+        percentiles = vectorized.price_percentiles(arrays, (0, 50, 100))
+        edges, histograms = vectorized.price_histograms(arrays, bins=9)
+        assert len(edges) == 10
+        for coffee in coffees:
+            prices = self.prices(coffee)
+            assert percentiles[coffee] == {0: min(prices), 50: statistics.median(prices), 100: max(prices)}
+            assert histograms[coffee].sum() == len(prices)
+            assert histograms[coffee].tolist() == np.histogram(prices, bins=edges)[0].tolist()
+
+    def test_lifetime_spend(self, shop):
+        _, customers, arrays = shop
+        spend = vectorized.lifetime_spend(arrays)
+        for customer in customers:
+            assert spend[customer] == pytest.approx(sum(order.price for order in customer.orders()))
+
+    def test_top_spenders_match_most_aficionado(self, shop):
+        coffees, _, arrays = shop
+        top = vectorized.top_spenders(arrays)
+        for coffee in coffees:
+            assert top[coffee] is Customer.most_aficionado(coffee)
+
+    def test_top_spender_tie_goes_to_oldest_customer(self):
+        coffee = Coffee("Vector Tie")
+        first, second = Customer("VecA"), Customer("VecB")
+        second.create_order(coffee, 3.0)
+        first.create_order(coffee, 3.0)
+        arrays = vectorized.export_arrays([coffee])
+        assert vectorized.top_spenders(arrays)[coffee] is first is Customer.most_aficionado(coffee)
+
+    def test_results_resolve_through_the_coffees_store(self):
+        with Store("Vector Downtown"):
+            latte, alice = Coffee("Vector Latte"), Customer("VecAlice")
+            alice.create_order(latte, 4.0)
+        arrays = vectorized.export_arrays([latte])  # Read outside the coffee's store
+        assert list(vectorized.coffee_stats(arrays)) == [latte]
+        assert list(vectorized.price_percentiles(arrays)) == [latte]
+        assert list(vectorized.price_histograms(arrays)[1]) == [latte]
+        assert vectorized.lifetime_spend(arrays) == {alice: 4.0}
+        assert vectorized.top_spenders(arrays) == {latte: alice}
@@ -0,0 +1,41 @@
+"""Throughput of Customer.create_order vs the bulk ingestion path.
+
+Run from the repository root:
+
+    python -m benchmarks.bulk_create [num_orders]
+"""
+import random
+import sys
+import time
+
+from lib.models.customer import Customer
+from lib.models.coffee import Coffee
+from lib.models.order import Order
+
+def build_rows(num_orders: int, seed: int = 42):
+    """Return (customer, coffee, price) rows spread over a small menu and customer base"""
+    rng = random.Random(seed)
+    customers = [Customer(f"Cust{i}") for i in range(1000)]
+    coffees = [Coffee(f"Coffee {i}") for i in range(50)]
+    return [
+        (rng.choice(customers), rng.choice(coffees), round(rng.uniform(1.0, 10.0), 2))
+        for _ in range(num_orders)
+    ]
+
+def per_order(rows):
+    for customer, coffee, price in rows:
+        customer.create_order(coffee, price)
+
+def bulk(rows):
+    Order.bulk_create(rows)
+
+def main(num_orders: int = 50_000):
+    for label, run in (("create_order", per_order), ("bulk_create", bulk)):
+        rows = build_rows(num_orders)
+        start = time.perf_counter()
+        run(rows)
+        elapsed = time.perf_counter() - start
+        print(f"{label:<14} {num_orders / elapsed:>12,.0f} orders/s  ({elapsed:.3f}s)")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50_000)
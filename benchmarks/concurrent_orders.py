@@ -0,0 +1,51 @@
+"""Order throughput with locking enabled across register threads.
+
+Each thread takes orders for its own coffee (no lock contention) and, in a
+second pass, all threads share one coffee. Note that on a GIL build of
+CPython the Python-level work is serialized, so expect flat throughput;
+the locks are what keep the totals correct.
+
+Run from the repository root:
+
+    python -m benchmarks.concurrent_orders [orders_per_thread]
+"""
+import sys
+import threading
+import time
+
+from lib import concurrency
+from lib.models.customer import Customer
+from lib.models.coffee import Coffee
+
+def run(num_threads: int, orders_per_thread: int, shared: bool) -> float:
+    """Return orders/s for num_threads threads each creating orders_per_thread orders"""
+    shared_coffee = Coffee("Shared Coffee")
+    customers = [Customer(f"Reg{i}") for i in range(num_threads)]
+    coffees = [shared_coffee if shared else Coffee(f"Coffee {i}") for i in range(num_threads)]
+
+    def worker(index):
+        customer, coffee = customers[index], coffees[index]
+        for i in range(orders_per_thread):
+            customer.create_order(coffee, 1 + i % 9)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(num_threads)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    total = sum(c.num_orders() for c in set(coffees))
+    assert total == num_threads * orders_per_thread, "lost or duplicated orders"
+    return total / elapsed
+
+def main(orders_per_thread: int = 20_000):
+    concurrency.enable()
+    for shared in (False, True):
+        label = "shared coffee" if shared else "coffee per thread"
+        for num_threads in (1, 2, 4, 8):
+            rate = run(num_threads, orders_per_thread, shared)
+            print(f"{label:<18} {num_threads} threads {rate:>12,.0f} orders/s")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20_000)
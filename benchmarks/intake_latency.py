@@ -0,0 +1,56 @@
+"""Latency and throughput of the asyncio order intake against a local load generator.
+
+Run from the repository root:
+
+    python -m benchmarks.intake_latency [num_clients] [orders_per_client]
+"""
+import asyncio
+import json
+import statistics
+import sys
+import time
+
+from lib.intake import OrderIntakeServer
+
+async def client(port: int, client_id: int, num_orders: int, window: int, latencies: list) -> None:
+    """Send num_orders orders keeping at most window unacknowledged, recording ack latency"""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    sent_at = {}
+    in_flight = asyncio.Semaphore(window)
+
+    async def read_acks():
+        for _ in range(num_orders):
+            ack = json.loads(await reader.readline())
+            latencies.append(time.perf_counter() - sent_at.pop(ack["id"]))
+            in_flight.release()
+
+    acks = asyncio.ensure_future(read_acks())
+    for i in range(num_orders):
+        await in_flight.acquire()
+        message_id = f"{client_id}-{i}"
+        sent_at[message_id] = time.perf_counter()
+        writer.write(json.dumps({"id": message_id, "customer": f"Term{client_id}",
+                                 "coffee": f"Coffee {i % 20}", "price": 1 + i % 9}).encode() + b"\n")
+        await writer.drain()
+    await acks
+    writer.close()
+
+async def run(num_clients: int, orders_per_client: int, window: int = 32) -> None:
+    server = OrderIntakeServer(batch_size=256)
+    _, port = await server.start_tcp()
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(*(client(port, c, orders_per_client, window, latencies)
+                           for c in range(num_clients)))
+    elapsed = time.perf_counter() - start
+    await server.close()
+
+    quantiles = statistics.quantiles(latencies, n=100)
+    print(f"{len(latencies):,} orders from {num_clients} clients in {elapsed:.2f}s "
+          f"({len(latencies) / elapsed:,.0f} orders/s, {server.stats['batches']} batches)")
+    print(f"latency p50 {quantiles[49] * 1e3:.2f} ms, p99 {quantiles[98] * 1e3:.2f} ms")
+
+if __name__ == "__main__":
+    clients = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    per_client = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+    asyncio.run(run(clients, per_client))
@@ -0,0 +1,69 @@
+"""Journal write overhead, replay time and replay after compaction.
+
+Run from the repository root:
+
+    python -m benchmarks.journal_replay [num_orders]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+from lib import journal
+from lib.models.customer import Customer
+from lib.models.coffee import Coffee
+
+def size_of(path: str) -> float:
+    """Return the size of every file in path, in MiB"""
+    return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path)) / 2**20
+
+def main(num_orders: int = 200_000):
+    rng = random.Random(42)
+    customers = [Customer(f"Cust{i}") for i in range(10_000)]
+    coffees = [Coffee(f"Coffee {i}") for i in range(50)]
+    rows = [(rng.choice(customers), rng.choice(coffees), rng.randrange(100, 1001) / 100)
+            for _ in range(num_orders)]
+
+    start = time.perf_counter()
+    orders = [customer.create_order(coffee, price) for customer, coffee, price in rows]
+    plain = time.perf_counter() - start
+    for order in orders:
+        order.cancel()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "shop.journal")
+        journal.start(path)
+        start = time.perf_counter()
+        orders = [customer.create_order(coffee, price) for customer, coffee, price in rows]
+        for order in orders[::2]:  # Half the history is churn
+            order.customer = rng.choice(customers)
+        for order in orders[1::4]:
+            order.cancel()
+        journal.active().commit()
+        journaled = time.perf_counter() - start
+        commits = journal.active().commits
+        journal.stop()
+        log_size = size_of(path)
+
+        start = time.perf_counter()
+        _, _, restored = journal.start(path, commit_interval=None)
+        replay = time.perf_counter() - start
+        journal.active().compact(wait=True)
+        journal.stop()
+        del restored
+
+        start = time.perf_counter()
+        _, _, restored = journal.start(path, commit_interval=None)
+        compacted = time.perf_counter() - start
+        checkpoint_size = size_of(path)
+        journal.stop()
+
+    print(f"create_order           {plain / num_orders * 1e6:>8.2f} us/order")
+    print(f"journaled writes       {journaled / (num_orders * 1.75) * 1e6:>8.2f} us/event  "
+          f"({commits} fsyncs, {log_size:.1f} MiB)")
+    print(f"replay full log        {replay:>8.3f}s")
+    print(f"replay checkpoint      {compacted:>8.3f}s  ({len(restored)} orders, {checkpoint_size:.1f} MiB)")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
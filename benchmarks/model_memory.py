@@ -0,0 +1,48 @@
+"""Per-instance size of the model classes and peak memory for 1M orders.
+
+Run from the repository root:
+
+    python -m benchmarks.model_memory [num_orders]
+"""
+import random
+import sys
+import tracemalloc
+
+from lib.models.customer import Customer
+from lib.models.coffee import Coffee
+from lib.models.order import Order
+
+def bytes_per_instance(factory, count: int = 10_000) -> float:
+    """Return traced bytes retained per object built by factory(i)"""
+    tracemalloc.start()
+    objects = [factory(i) for i in range(count)]
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # Don't charge the holding list to the objects
+    return (current - sys.getsizeof(objects)) / count
+
+def build_orders(num_orders: int):
+    """Return (bytes per order, peak bytes) while creating num_orders orders"""
+    rng = random.Random(42)
+    customers = [Customer(f"Cust{i}") for i in range(100)]
+    coffees = [Coffee(f"Coffee {i}") for i in range(10)]
+    prices = [rng.randrange(100, 1001) / 100 for _ in range(1000)]
+
+    tracemalloc.start()
+    orders = [Order(rng.choice(customers), rng.choice(coffees), prices[i % 1000])
+              for i in range(num_orders)]
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return (current - sys.getsizeof(orders)) / num_orders, peak
+
+def main(num_orders: int = 1_000_000):
+    coffee = Coffee("Espresso")
+    customer = Customer("Alice")
+    print(f"Customer {bytes_per_instance(lambda i: Customer('Cust')):>7.1f} bytes/instance")
+    print(f"Coffee   {bytes_per_instance(lambda i: Coffee('Latte')):>7.1f} bytes/instance")
+    print(f"Order    {bytes_per_instance(lambda i: Order(customer, coffee, 5.0)):>7.1f} bytes/instance")
+    per_order, peak = build_orders(num_orders)
+    print(f"{num_orders:,} orders: {per_order:.1f} bytes/order, peak {peak / 2**20:.1f} MiB")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
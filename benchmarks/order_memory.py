@@ -0,0 +1,48 @@
+"""Memory per order for regular Order objects vs the columnar OrderStore.
+
+Run from the repository root:
+
+    python -m benchmarks.order_memory [num_orders]
+"""
+import random
+import sys
+import tracemalloc
+
+from lib.models.customer import Customer
+from lib.models.coffee import Coffee
+from lib.models.order import Order
+from lib.models.order_store import OrderStore
+
+def measure(label: str, num_orders: int, build) -> None:
+    """Print bytes per order retained (and peak) while build() adds num_orders orders"""
+    rng = random.Random(42)
+    # A small population keeps the shared spend index out of the per-order figure
+    customers = [Customer(f"Cust{i}") for i in range(100)]
+    coffees = [Coffee(f"Coffee {i}") for i in range(10)]
+    # Pre-build the inputs so only the order storage itself is measured
+    rows = [(rng.choice(customers), rng.choice(coffees), rng.randrange(100, 1001) / 100)
+            for _ in range(num_orders)]
+
+    tracemalloc.start()
+    kept = build(rows)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<8} {current / num_orders:>7.1f} bytes/order  "
+          f"(retained {current / 2**20:.1f} MiB, peak {peak / 2**20:.1f} MiB)")
+    del kept
+
+def build_objects(rows):
+    return Order.bulk_create(rows)
+
+def build_store(rows):
+    store = OrderStore()
+    for customer, coffee, price in rows:
+        store.add(customer, coffee, price)
+    return store
+
+def main(num_orders: int = 200_000):
+    measure("objects", num_orders, build_objects)
+    measure("columnar", num_orders, build_store)
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
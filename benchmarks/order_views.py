@@ -0,0 +1,52 @@
+"""Allocation of read paths with zero-copy order views vs copying the orders.
+
+Run from the repository root:
+
+    python -m benchmarks.order_views [num_orders]
+"""
+import random
+import sys
+import time
+import tracemalloc
+
+from lib.models.customer import Customer
+from lib.models.coffee import Coffee
+from lib.models.order import Order
+
+def measure(label: str, call, repeat: int = 20) -> None:
+    """Print peak traced allocation and time per call"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        call()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<38} peak {peak / 1024:>10.1f} KiB  {elapsed / repeat * 1e3:>8.3f} ms/call")
+
+def main(num_orders: int = 200_000):
+    rng = random.Random(42)
+    customers = [Customer(f"Cust{i}") for i in range(5000)]
+    coffee = Coffee("Espresso")
+    regular = Customer("Regular")
+    Order.bulk_create([(regular, coffee, 5.0) for _ in range(num_orders // 10)])
+    Order.bulk_create([(rng.choice(customers), coffee, rng.randrange(100, 1001) / 100)
+                       for _ in range(num_orders)])
+
+    def copy_customers():
+        # What Coffee.customers() did before: copy the orders, then scan them
+        return list({order.customer for order in list(coffee._iter_orders())})
+
+    def copy_aficionado():
+        # What most_aficionado did before: copy every customer's orders
+        return [[o for o in list(c._iter_orders()) if o.coffee is coffee] for c in customers]
+
+    measure("Customer.orders() copy (before)", lambda: list(regular._iter_orders()))
+    measure("Customer.orders() view", lambda: len(regular.orders()))
+    measure("Coffee.customers() copy+scan (before)", copy_customers)
+    measure("Coffee.customers() index", coffee.customers)
+    measure("most_aficionado copy+scan (before)", copy_aficionado, repeat=3)
+    measure("most_aficionado index", lambda: Customer.most_aficionado(coffee))
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
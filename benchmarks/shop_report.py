@@ -0,0 +1,50 @@
+"""End-of-day shop report: running aggregates vs re-walking every order.
+
+The loop side recomputes each coffee's order count, revenue and spend per
+customer from its order history; shop_report() reads the aggregates the
+coffees already keep, so its time does not grow with the history.
+
+Run from the repository root:
+
+    python -m benchmarks.shop_report [num_orders]
+"""
+import random
+import sys
+import time
+
+from lib.analytics import shop_report
+from lib.models.customer import Customer
+from lib.models.coffee import Coffee
+from lib.models.order import Order
+
+def loop_report(coffees):
+    report = {}
+    for coffee in coffees:
+        count, total, spend = 0, 0, {}
+        for order in coffee.orders():
+            count += 1
+            total += order.cents
+            spend[order.customer] = spend.get(order.customer, 0) + order.cents
+        report[coffee] = (count, total, spend)
+    return report
+
+def main(num_orders: int = 1_000_000):
+    rng = random.Random(42)
+    customers = [Customer(f"Cust{i}") for i in range(10_000)]
+    coffees = [Coffee(f"Coffee {i}") for i in range(50)]
+    Order.bulk_create((rng.choice(customers), rng.choice(coffees), rng.randrange(100, 1001) / 100)
+                      for _ in range(num_orders))
+
+    start = time.perf_counter()
+    baseline = loop_report(coffees)
+    print(f"order loop    {time.perf_counter() - start:8.3f} s")
+    start = time.perf_counter()
+    report = shop_report()
+    print(f"shop_report   {time.perf_counter() - start:8.3f} s")
+    for coffee, (count, total, spend) in baseline.items():
+        row = report[coffee]
+        assert (row.num_orders, row.total_revenue) == (count, total / 100), "report differs"
+        assert set(row.customers) == set(spend), "report differs"
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -0,0 +1,47 @@
+"""Cold start: replaying constructors vs restoring a binary snapshot.
+
+Run from the repository root:
+
+    python -m benchmarks.snapshot_restore [num_orders]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+from lib import snapshot
+from lib.models.customer import Customer
+from lib.models.coffee import Coffee
+
+def main(num_orders: int = 200_000):
+    rng = random.Random(42)
+    customer_names = [f"Cust{i}" for i in range(10_000)]
+    coffee_names = [f"Coffee {i}" for i in range(50)]
+    rows = [(rng.randrange(len(customer_names)), rng.randrange(len(coffee_names)),
+             rng.randrange(100, 1001) / 100) for _ in range(num_orders)]
+
+    start = time.perf_counter()
+    customers = [Customer(name) for name in customer_names]
+    coffees = [Coffee(name) for name in coffee_names]
+    for c, k, price in rows:
+        customers[c].create_order(coffees[k], price)
+    replay = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "shop.snap")
+        start = time.perf_counter()
+        snapshot.save(path, customers, coffees)
+        saved = time.perf_counter() - start
+        size = os.path.getsize(path)
+
+        start = time.perf_counter()
+        snapshot.load(path)
+        restored = time.perf_counter() - start
+
+    print(f"replay constructors {replay:>8.3f}s")
+    print(f"snapshot save       {saved:>8.3f}s  ({size / 2**20:.1f} MiB)")
+    print(f"snapshot load       {restored:>8.3f}s")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
@@ -0,0 +1,168 @@
+"""Scaling benchmark for the model-layer hot paths, with JSON output and regression checks.
+
+Each size builds a fresh shop whose customers and coffees are drawn from
+Zipf distributions (a few regulars and house favourites get most orders)
+with a fixed seed, then times:
+
+    create_order, reassign (customer and coffee), Customer.orders(),
+    Customer.coffees(), Coffee.customers(), Coffee.average_price(),
+    Customer.most_aficionado()
+
+and reports microseconds per call. The memoized reads (coffees() and
+customers()) are timed cold, with the memo cache cleared before every call,
+and warm, as customer_coffees_warm / coffee_customers_warm. Run from the
+repository root:
+
+    python -m benchmarks.suite run --sizes 1000 10000 100000 1000000 --out after.json
+    python -m benchmarks.suite compare before.json after.json --threshold 0.15
+
+compare exits with status 1 when any timing got slower by more than the
+threshold, so it can gate a CI job.
+"""
+import argparse
+import gc
+import json
+import platform
+import random
+import sys
+import time
+from itertools import accumulate
+from typing import Callable, Dict, List, Sequence
+
+from lib.models import memo
+from lib.models.customer import Customer
+from lib.models.coffee import Coffee
+
+SEED = 42
+ZIPF_EXPONENT = 1.1
+NUM_COFFEES = 50
+SAMPLE = 1000  # Calls per read benchmark
+
+def zipf_sampler(population: Sequence, exponent: float, rng: random.Random) -> Callable[[int], List]:
+    """Return draw(k) picking k items, item i with weight 1 / (i + 1) ** exponent"""
+    cum_weights = list(accumulate(1 / (rank ** exponent) for rank in range(1, len(population) + 1)))
+    return lambda k: rng.choices(population, cum_weights=cum_weights, k=k)
+
+def per_call(call: Callable, args: Sequence) -> float:
+    """Return microseconds per call of call(arg) over args"""
+    start = time.perf_counter()
+    for arg in args:
+        call(arg)
+    return (time.perf_counter() - start) / max(len(args), 1) * 1e6
+
+def per_cold_call(call: Callable, args: Sequence) -> float:
+    """Like per_call, but clear the memo cache (untimed) before every call"""
+    clock = time.perf_counter
+    elapsed = 0.0
+    for arg in args:
+        memo.cache.clear()
+        start = clock()
+        call(arg)
+        elapsed += clock() - start
+    return elapsed / max(len(args), 1) * 1e6
+
+def run_size(num_orders: int) -> Dict[str, float]:
+    """Build a Zipf-shaped shop with num_orders orders and time every hot path"""
+    rng = random.Random(SEED)
+    customers = [Customer(f"Cust{i}") for i in range(max(num_orders // 20, 10))]
+    coffees = [Coffee(f"Coffee {i}") for i in range(NUM_COFFEES)]
+    pick_customers = zipf_sampler(customers, ZIPF_EXPONENT, rng)
+    pick_coffees = zipf_sampler(coffees, ZIPF_EXPONENT, rng)
+    rows = list(zip(pick_customers(num_orders), pick_coffees(num_orders),
+                    (rng.randrange(100, 1001) / 100 for _ in range(num_orders))))
+
+    results = {}
+    orders = []
+    start = time.perf_counter()
+    for customer, coffee, price in rows:
+        orders.append(customer.create_order(coffee, price))
+    results["create_order"] = (time.perf_counter() - start) / num_orders * 1e6
+
+    moved = rng.sample(orders, min(SAMPLE, num_orders))
+    targets = list(zip(moved, pick_customers(len(moved)), pick_coffees(len(moved))))
+
+    def reassign(target):
+        order, customer, coffee = target
+        order.customer = customer
+        order.coffee = coffee
+    results["reassign"] = per_call(reassign, targets)
+
+    sampled_customers = pick_customers(SAMPLE)
+    sampled_coffees = pick_coffees(SAMPLE)
+    results["customer_orders"] = per_call(lambda c: list(c.orders()), sampled_customers)
+    results["customer_coffees"] = per_cold_call(Customer.coffees, sampled_customers)
+    results["coffee_customers"] = per_cold_call(Coffee.customers, sampled_coffees)
+    results["customer_coffees_warm"] = per_call(Customer.coffees, sampled_customers)
+    results["coffee_customers_warm"] = per_call(Coffee.customers, sampled_coffees)
+    results["average_price"] = per_call(Coffee.average_price, sampled_coffees)
+    results["most_aficionado"] = per_call(Customer.most_aficionado, sampled_coffees)
+    return results
+
+def run(sizes: Sequence[int]) -> dict:
+    """Run every size and return the JSON-ready report"""
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": SEED,
+            "zipf_exponent": ZIPF_EXPONENT,
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "unit": "us/call",
+        "results": {},
+    }
+    for size in sizes:
+        timings = run_size(size)
+        gc.collect()  # Drop this size's shop before building the next one
+        for name, value in timings.items():
+            report["results"].setdefault(name, {})[str(size)] = round(value, 3)
+        print(f"{size:>9,} orders  " + "  ".join(f"{k} {v:.2f}" for k, v in timings.items()))
+    return report
+
+def compare(before: dict, after: dict, threshold: float) -> List[str]:
+    """Print before/after timings and return the regressions (slower by more than threshold)"""
+    regressions = []
+    for name, sizes in after["results"].items():
+        for size, new in sizes.items():
+            old = before["results"].get(name, {}).get(size)
+            if old is None:
+                continue
+            change = new / old - 1 if old else 0.0
+            flag = ""
+            if change > threshold:
+                flag = "  REGRESSION"
+                regressions.append(f"{name} @ {size}")
+            print(f"{name:<18} {size:>9}  {old:>10.2f} -> {new:>10.2f} us  {change:>+7.1%}{flag}")
+    return regressions
+
+def main(argv: Sequence[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    run_parser = commands.add_parser("run", help="run the benchmarks")
+    run_parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000, 1_000_000])
+    run_parser.add_argument("--out", help="write results to this JSON file")
+    compare_parser = commands.add_parser("compare", help="compare two result files")
+    compare_parser.add_argument("before")
+    compare_parser.add_argument("after")
+    compare_parser.add_argument("--threshold", type=float, default=0.10,
+                                help="relative slowdown that counts as a regression (default 0.10)")
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        report = run(args.sizes)
+        if args.out:
+            with open(args.out, "w") as f:
+                json.dump(report, f, indent=2)
+        return 0
+    with open(args.before) as f:
+        before = json.load(f)
+    with open(args.after) as f:
+        after = json.load(f)
+    regressions = compare(before, after, args.threshold)
+    if regressions:
+        print(f"{len(regressions)} regression(s): " + ", ".join(regressions))
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
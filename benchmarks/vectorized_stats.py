@@ -0,0 +1,62 @@
+"""Shop-wide statistics: pure-Python loops vs the NumPy analytics layer.
+
+The pure-Python side computes the same figures from the model objects
+(prices sorted per coffee for the median/percentiles, spend summed per
+customer, Customer.most_aficionado per coffee). Requires numpy.
+
+Run from the repository root:
+
+    python -m benchmarks.vectorized_stats [num_orders]
+"""
+import random
+import statistics
+import sys
+import time
+
+from lib import vectorized
+from lib.models.customer import Customer
+from lib.models.coffee import Coffee
+from lib.models.order import Order
+
+def timed(label: str, call):
+    start = time.perf_counter()
+    result = call()
+    print(f"{label:<34} {time.perf_counter() - start:8.3f} s")
+    return result
+
+def python_stats(coffees, customers):
+    stats = {}
+    for coffee in coffees:
+        prices = sorted(order.price for order in coffee.orders())
+        quantiles = statistics.quantiles(prices, n=100, method="inclusive")
+        stats[coffee] = (coffee.average_price(), statistics.median(prices), quantiles[89], quantiles[98])
+    spend = {customer: sum(order.cents for order in customer.orders())
+             for customer in customers}
+    top = {coffee: Customer.most_aficionado(coffee) for coffee in coffees}
+    return stats, spend, top
+
+def numpy_stats():
+    arrays = vectorized.export_arrays()
+    return (vectorized.coffee_stats(arrays), vectorized.price_percentiles(arrays, (90, 99)),
+            vectorized.price_histograms(arrays), vectorized.lifetime_spend(arrays),
+            vectorized.top_spenders(arrays))
+
+def main(num_orders: int = 1_000_000):
+    rng = random.Random(42)
+    customers = [Customer(f"Cust{i}") for i in range(10_000)]
+    coffees = [Coffee(f"Coffee {i}") for i in range(50)]
+    Order.bulk_create((rng.choice(customers), rng.choice(coffees), rng.randrange(100, 1001) / 100)
+                      for _ in range(num_orders))
+
+    _, _, python_top = timed("pure Python (models)", lambda: python_stats(coffees, customers))
+    arrays = timed("export_arrays", vectorized.export_arrays)
+    timed("coffee_stats", lambda: vectorized.coffee_stats(arrays))
+    timed("price_percentiles", lambda: vectorized.price_percentiles(arrays, (90, 99)))
+    timed("price_histograms", lambda: vectorized.price_histograms(arrays))
+    timed("lifetime_spend", lambda: vectorized.lifetime_spend(arrays))
+    top = timed("top_spenders", lambda: vectorized.top_spenders(arrays))
+    timed("NumPy total (incl. export)", numpy_stats)
+    assert top == python_top, "top spenders differ"
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
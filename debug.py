@@ -1,3 +1,6 @@
+import json
+
+from lib import instrumentation
 from lib.models.customer import Customer
 from lib.models.coffee import Coffee
 from lib.models.order import Order
@@ -160,9 +163,12 @@ def test_relationships():
         
         # Test order immutability
         orders = customer.orders()
-        orders.append("invalid")
-        print_test_result("Customer.orders() returns a proper copy", 
-                        len(customer.orders()) == 3)
+        try:
+            orders.append("invalid")
+            print_test_result("Customer.orders() should be read-only", False)
+        except AttributeError:
+            print_test_result("Customer.orders() returns a read-only view", 
+                            len(customer.orders()) == 3)
         
         return True
     except Exception as e:
@@ -172,6 +178,7 @@ def test_relationships():
 def main():
     print("=== Coffee Shop Debug Console ===")
     print("Running comprehensive tests...\n")
+    instrumentation.enable()
     
     results = [
         ("Customer Validation", test_customer_validation()),
@@ -185,6 +192,9 @@ def main():
         status = "PASSED" if success else "FAILED"
         print(f"{name.ljust(20)}: {status}")
     
+    print("\n=== Metrics ===")
+    print(json.dumps(instrumentation.snapshot(), indent=2))
+
     print("\nDebugging complete. All tests passed!" if all(r[1] for r in results) 
           else "\nDebugging complete. Some tests failed.")
 
@@ -2,11 +2,13 @@ from __future__ import annotations
 from typing import TYPE_CHECKING
 
 # Main package exports
-from .models import Customer, Coffee, Order
+from .models import Customer, Coffee, Order, OrderStore, Store
 
 __all__ = [
     'Customer',
     'Coffee',
-    'Order'
+    'Order',
+    'OrderStore',
+    'Store'
 ]
 
@@ -0,0 +1,188 @@
+"""
+Shop reports over the coffees' running aggregates.
+
+Every coffee already keeps its exact order count, revenue and spend per
+customer, so a report reads those instead of re-reading every order, and
+its numbers match Coffee.num_orders(), total_revenue(), average_price(),
+customers() (including its order) and Customer.most_aficionado():
+
+    report = shop_report()
+    report[latte].most_aficionado
+
+Several stores (see lib.models.store) are combined with a map-reduce: each
+store is reduced to a partial keyed by coffee name and ChainCustomer, and
+the partials are merged into one chain-wide report. Stores can be built and
+reduced in worker processes, so only their partials cross process boundaries:
+
+    report = chain_report(store_partials([("Downtown", load_downtown), ("Airport", load_airport)]))
+    report["Latte"].most_aficionado   # ChainCustomer(id, store, name)
+"""
+from __future__ import annotations
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Iterable, List, NamedTuple, Optional, Tuple
+
+from lib import concurrency
+from lib.models import store
+from lib.models.customer import Customer
+from lib.models.coffee import Coffee
+from lib.models.money import average
+
+# coffee key -> (order count, total cents, {customer key: cents spent})
+Partial = Dict[Hashable, Tuple[int, int, Dict[Hashable, int]]]
+
+
+class ChainCustomer(NamedTuple):
+    """A customer identified across stores and processes (ordered like Leaderboard ties: by id first)"""
+    id: int
+    store: str
+    name: str
+
+
+class CoffeeReport(NamedTuple):
+    """Shop-wide figures for one coffee (chain-wide reports hold ChainCustomers instead of customers)"""
+    num_orders: int
+    total_revenue: float
+    average_price: float
+    most_aficionado: Optional[Customer]
+    customers: List[Customer]
+
+
+def merge_partials(partials: Iterable[Partial]) -> Partial:
+    """Combine partial aggregates from several stores"""
+    merged: Dict[Hashable, list] = {}
+    for partial in partials:
+        for key, (count, total, spend) in partial.items():
+            entry = merged.get(key)
+            if entry is None:
+                merged[key] = [count, total, dict(spend)]
+                continue
+            entry[0] += count
+            entry[1] += total
+            merged_spend = entry[2]
+            for customer_key, amount in spend.items():
+                merged_spend[customer_key] = merged_spend.get(customer_key, 0) + amount
+    return {key: (count, total, spend) for key, (count, total, spend) in merged.items()}
+
+
+def top_spender(spend: Dict[Hashable, int]) -> Optional[Hashable]:
+    """Return the key with the highest spend, ties going to the smallest key"""
+    best_key, best_amount = None, None
+    for key, amount in spend.items():
+        if best_amount is None or amount > best_amount or (amount == best_amount and key < best_key):
+            best_key, best_amount = key, amount
+    return best_key
+
+
+def _coffee_partial(coffee: Coffee, customer_key: Callable[[Customer], Hashable]
+                    ) -> Tuple[int, int, Dict[Hashable, int]]:
+    """Return one coffee's count, total and spend per customer key, in Coffee.customers() order"""
+    score = coffee._spend.score
+    return coffee._count, coffee._price_total, {customer_key(c): score(c) for c in coffee.customers()}
+
+
+def shop_report(coffees: Optional[Iterable[Coffee]] = None) -> Dict[Coffee, CoffeeReport]:
+    """
+    Compute a CoffeeReport for every live coffee (default: the current store's).
+
+    Reads each coffee's running aggregates, so the cost grows with the
+    number of coffees and customers, not with the order history.
+    """
+    report = {}
+    for coffee in (store.current().coffees if coffees is None else coffees):
+        if concurrency.is_enabled():
+            with concurrency.locked(coffee):
+                report[coffee] = _coffee_report(coffee)
+        else:
+            report[coffee] = _coffee_report(coffee)
+    return report
+
+
+def _coffee_report(coffee: Coffee) -> CoffeeReport:
+    count, total = coffee._count, coffee._price_total
+    return CoffeeReport(
+        num_orders=count,
+        total_revenue=total / 100,
+        average_price=average(total, count),
+        most_aficionado=Customer.most_aficionado(coffee),
+        customers=list(coffee.customers()),
+    )
+
+
+def store_partial(location: Optional[store.Store] = None) -> Partial:
+    """Reduce a store's orders (default: the current store's) to a partial keyed by coffee name and ChainCustomer"""
+    location = location or store.current()
+
+    def chain_customer(customer: Customer) -> ChainCustomer:
+        return ChainCustomer(customer._id, location.name, customer.name)
+
+    partials = []
+    for coffee in location.coffees:
+        if concurrency.is_enabled():
+            with concurrency.locked(coffee):
+                entry = _coffee_partial(coffee, chain_customer)
+        else:
+            entry = _coffee_partial(coffee, chain_customer)
+        if entry[0]:
+            partials.append({coffee.name: entry})
+    return merge_partials(partials)  # Coffees sharing a name within the store are merged too
+
+
+def chain_report(partials: Iterable[Partial]) -> Dict[str, CoffeeReport]:
+    """
+    Merge store_partial() results into a CoffeeReport per coffee name.
+
+    Coffees of the same name in different stores are merged into one
+    entry. Customers are never merged: each is a ChainCustomer of its own
+    store, so store names must be distinct (store_partials checks this). most_aficionado is the
+    customer with the highest spend, ties going to the smallest id (the
+    earliest created customer, as within a store; ids of stores built in
+    different processes come from different counters), and customers is
+    sorted the same way.
+    """
+    report = {}
+    for coffee_name, (count, total, spend) in sorted(merge_partials(partials).items()):
+        report[coffee_name] = CoffeeReport(
+            num_orders=count,
+            total_revenue=total / 100,
+            average_price=average(total, count),
+            most_aficionado=top_spender(spend),
+            customers=sorted(spend),
+        )
+    return report
+
+
+def store_partials(builders: Iterable[Tuple[str, Callable[[], Any]]], workers: Optional[int] = None,
+                   executor: Optional[Executor] = None) -> List[Partial]:
+    """
+    Build one store per (store name, builder) pair, each in a worker process, and return their partials.
+
+    A builder is a picklable callable (such as a module-level function)
+    that is called with no arguments inside a new Store of that name and
+    populates it, returning the customers it created: registries are weak,
+    so anything not returned may be collected before the store is reduced.
+    Names must be distinct, since workers hand out the same ids and
+    customers are told apart by (id, store). workers=1 builds every store
+    in-process, one after another.
+    """
+    builders = list(builders)
+    names = [name for name, _ in builders]
+    if len(set(names)) != len(names):
+        raise ValueError("Store names must be distinct.")
+    if executor is None and workers == 1:
+        return [_build_and_reduce(builder) for builder in builders]
+    own_pool = executor is None
+    pool = executor or ProcessPoolExecutor(workers)
+    try:
+        return list(pool.map(_build_and_reduce, builders))
+    finally:
+        if own_pool:
+            pool.shutdown()
+
+
+def _build_and_reduce(named_builder: Tuple[str, Callable[[], Any]]) -> Partial:
+    """Process-pool entry point for store_partials"""
+    name, builder = named_builder
+    location = store.Store(name)
+    with location:
+        created = builder()  # Holds the store's objects until it is reduced
+        return store_partial(location)
@@ -0,0 +1,93 @@
+"""
+Opt-in thread safety for the model layer.
+
+Off by default. When enabled, order creation, reassignment and cancellation
+lock the customers and coffees they touch, and aggregate reads lock their
+coffee, so several register threads can take orders at once:
+
+    from lib import concurrency
+    concurrency.enable()
+
+Every coffee gets its own lock, so orders for different coffees never
+contend: even the coffee rankings are buffered per coffee and only applied,
+under the ranking lock, when they are read. Customers are far more numerous, so they share a fixed pool of
+lock stripes chosen by customer id. Locks are always acquired in one global
+order, which rules out deadlocks between threads touching the same objects.
+OrderStore is not covered and must be fed from a single thread.
+"""
+from __future__ import annotations
+import threading
+from contextlib import contextmanager
+from functools import wraps
+from typing import Any, Callable, Iterator
+
+CUSTOMER_STRIPES = 64
+
+_enabled = False
+_registry_lock = threading.RLock()  # Class-level registries, counters and lazy lock creation
+_ranking_lock = threading.Lock()  # Coffee leaderboards, taken by ranking reads
+_customer_stripes = [threading.RLock() for _ in range(CUSTOMER_STRIPES)]
+
+
+def enable() -> None:
+    """Turn on locking for order writes and aggregate reads"""
+    global _enabled
+    _enabled = True
+
+
+def disable() -> None:
+    """Turn locking off again (only do this once no other thread uses the models)"""
+    global _enabled
+    _enabled = False
+
+
+def is_enabled() -> bool:
+    """Return whether locking is on"""
+    return _enabled
+
+
+def registry_lock() -> threading.RLock:
+    """Return the lock guarding class-level registries and counters"""
+    return _registry_lock
+
+
+def ranking_lock() -> threading.Lock:
+    """Return the lock guarding the coffee leaderboards (held while reading and flushing them)"""
+    return _ranking_lock
+
+
+def customer_stripe(customer_id: int) -> threading.RLock:
+    """Return the lock stripe shared by customers with this id modulo the stripe count"""
+    return _customer_stripes[customer_id % CUSTOMER_STRIPES]
+
+
+@contextmanager
+def locked(*objects: Any) -> Iterator[None]:
+    """
+    Hold the locks of all given customers/coffees (None entries are skipped).
+
+    Objects without a lock (e.g. a wrong type about to fail validation) are
+    ignored. Locks are deduplicated and taken in a fixed global order; they
+    are reentrant, so nested calls on the same objects are fine.
+    """
+    getters = (getattr(obj, "_get_lock", None) for obj in objects)
+    locks = {id(lock): lock for lock in (get() for get in getters if get is not None)}
+    ordered = [locks[key] for key in sorted(locks)]
+    for lock in ordered:
+        lock.acquire()
+    try:
+        yield
+    finally:
+        for lock in reversed(ordered):
+            lock.release()
+
+
+def synchronized(method: Callable) -> Callable:
+    """Decorator holding the instance's own lock around a method while locking is on"""
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if not _enabled:
+            return method(self, *args, **kwargs)
+        with self._get_lock():
+            return method(self, *args, **kwargs)
+    return wrapper
@@ -0,0 +1,239 @@
+"""
+Streaming importer for POS order logs (CSV or JSONL).
+
+Each row needs ``customer``, ``coffee`` and ``price`` fields and may carry a
+``timestamp`` (seconds since the epoch or an ISO 8601 string; rows without
+one are stamped at import time). Rows are read
+lazily, validated with the same rules as Customer.name, Coffee(...) and
+Order(...), resolved to existing customers/coffees by name, and committed
+through Order.bulk_create in chunks. Malformed rows, including CSV records
+the csv module rejects and lines that are not valid UTF-8, are handed to a
+quarantine callback instead of aborting the file.
+
+    for progress in import_orders("orders.csv", chunk_size=5000, quarantine=bad.append):
+        print(progress.rows_read, progress.rows_per_second)
+"""
+from __future__ import annotations
+import csv
+import json
+from datetime import datetime
+from time import perf_counter
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+from lib.models import store
+from lib.models.customer import Customer, _validate_name as _validate_customer_name
+from lib.models.coffee import Coffee, _validate_name as _validate_coffee_name
+from lib.models.order import Order, _validate_price, _validate_timestamp
+
+Quarantine = Callable[[int, object, Exception], None]
+
+
+class ImportProgress(NamedTuple):
+    """Running totals reported after each committed chunk"""
+    rows_read: int
+    orders_created: int
+    rows_quarantined: int
+    elapsed: float
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows_read / self.elapsed if self.elapsed else 0.0
+
+
+class UnreadableRow(NamedTuple):
+    """Text that read_rows could not decode or split into a row, with the error, for the caller to quarantine"""
+    text: str
+    error: Exception
+
+
+class _CountedLines:
+    """Line iterator for csv that counts the lines read and keeps the text of the current record"""
+
+    def __init__(self, lines: Iterable[str]):
+        self._lines = iter(lines)
+        self._record: List[str] = []
+        self.count = 0
+
+    def __iter__(self) -> _CountedLines:
+        return self
+
+    def __next__(self) -> str:
+        line = next(self._lines)
+        self.count += 1
+        self._record.append(line)
+        return line
+
+    def take(self) -> str:
+        """Return the text read since the last call"""
+        text = "".join(self._record)
+        self._record.clear()
+        return text
+
+
+def _decode_error(text: str) -> Optional[UnicodeError]:
+    """Return the error for text holding bytes that were not valid UTF-8 (kept by surrogateescape), else None"""
+    if text.isascii():
+        return None
+    try:
+        text.encode("utf-8", "surrogateescape").decode("utf-8")
+    except UnicodeError as error:
+        return error
+    return None
+
+
+def read_rows(source: Union[str, Iterable[str]], format: Optional[str] = None
+              ) -> Iterator[Tuple[int, object]]:
+    """
+    Yield (line number, raw row) pairs from a CSV or JSONL file or iterable of lines.
+
+    format is "csv" or "jsonl"; for paths it defaults from the extension.
+    Blank lines are skipped. JSONL lines that fail to parse are yielded as
+    the raw string, and records that are not valid UTF-8 or that the csv
+    module rejects (such as an oversized field) as an UnreadableRow, so the
+    caller can quarantine them and read on. For CSV, the line number is the
+    record's last line.
+    """
+    if isinstance(source, str):
+        if format is None:
+            format = "csv" if source.lower().endswith(".csv") else "jsonl"
+        # Undecodable bytes are kept as surrogates and reported per row below
+        with open(source, newline="", encoding="utf-8", errors="surrogateescape") as f:
+            yield from read_rows(f, format)
+        return
+    if format == "csv":
+        lines = _CountedLines(source)
+        reader = csv.DictReader(lines)
+        reader.fieldnames  # Read the header now so it isn't taken as part of the first record
+        lines.take()
+        while True:
+            try:
+                row = next(reader)
+            except StopIteration:
+                return
+            except csv.Error as error:
+                yield lines.count, UnreadableRow(lines.take(), error)
+                continue
+            text = lines.take()
+            error = _decode_error(text)
+            yield lines.count, row if error is None else UnreadableRow(text, error)
+    elif format in ("jsonl", "ndjson", None):
+        for line_no, line in enumerate(source, 1):
+            if not line.strip():
+                continue
+            error = _decode_error(line)
+            if error is not None:
+                yield line_no, UnreadableRow(line, error)
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                row = line
+            yield line_no, row
+    else:
+        raise ValueError(f"Unsupported format: {format!r}")
+
+
+def import_orders(source: Union[str, Iterable[str]], format: Optional[str] = None,
+                  chunk_size: int = 1000, quarantine: Optional[Quarantine] = None
+                  ) -> Iterator[ImportProgress]:
+    """
+    Import orders from source, yielding an ImportProgress after each chunk commit.
+
+    Memory stays constant in the number of rows: only the current chunk is
+    held. quarantine(line number, raw row, error) is called for every row
+    that fails validation.
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1.")
+    customers: Dict[str, Customer] = {}
+    coffees: Dict[str, Coffee] = {}
+    chunk: List[Tuple[Customer, Coffee, float, Optional[float]]] = []
+    chunk_lines: List[Tuple[int, object]] = []
+    rows_read = created = quarantined = 0
+    start = perf_counter()
+
+    def reject(line_no: int, raw: object, error: Exception) -> None:
+        nonlocal quarantined
+        quarantined += 1
+        if quarantine is not None:
+            quarantine(line_no, raw, error)
+
+    def commit() -> ImportProgress:
+        nonlocal created
+        orders, errors = Order.bulk_create(chunk)
+        created += len(orders)
+        for index, error in errors:
+            reject(*chunk_lines[index], error)
+        chunk.clear()
+        chunk_lines.clear()
+        return ImportProgress(rows_read, created, quarantined, perf_counter() - start)
+
+    for line_no, raw in read_rows(source, format):
+        rows_read += 1
+        if isinstance(raw, UnreadableRow):
+            reject(line_no, raw.text, raw.error)
+            continue
+        try:
+            chunk.append(parse_row(raw, customers, coffees))
+        except (TypeError, ValueError, KeyError) as error:
+            reject(line_no, raw, error)
+            continue
+        chunk_lines.append((line_no, raw))
+        if len(chunk) >= chunk_size:
+            yield commit()
+    yield commit()
+
+
+def parse_row(raw: object, customers: Optional[Dict[str, Customer]] = None,
+              coffees: Optional[Dict[str, Coffee]] = None
+              ) -> Tuple[Customer, Coffee, float, Optional[float]]:
+    """
+    Validate one raw {"customer", "coffee", "price"[, "timestamp"]} row and
+    resolve its customer and coffee, creating them if no instance has that
+    name yet. The timestamp is None when the row has none.
+
+    customers/coffees are optional name caches shared across calls.
+    Raises TypeError, ValueError or KeyError for invalid rows.
+    """
+    if customers is None:
+        customers = {}
+    if coffees is None:
+        coffees = {}
+    if not isinstance(raw, dict):
+        raise ValueError("Row is not an object.")
+    price = raw["price"]
+    if isinstance(price, str):  # CSV fields (and some JSON exports) are strings
+        price = float(price)
+    price = _validate_price(price)
+    timestamp = _parse_timestamp(raw.get("timestamp"))
+    customer_name = _validate_customer_name(raw["customer"])
+    coffee_name = _validate_coffee_name(raw["coffee"])
+
+    customer = customers.get(customer_name)
+    if customer is None:
+        customer = store.current().customers.first(customer_name) or Customer._restore(customer_name)
+        customers[customer_name] = customer
+    coffee = coffees.get(coffee_name)
+    if coffee is None:
+        coffee = coffees[coffee_name] = Coffee.intern(coffee_name)
+    return customer, coffee, price, timestamp
+
+
+def _parse_timestamp(value: object) -> Optional[float]:
+    """Return epoch seconds for a numeric or ISO 8601 timestamp field, or None if it is empty"""
+    if value is None or value == "":
+        return None
+    if isinstance(value, str):
+        try:
+            value = float(value)
+        except ValueError:
+            value = datetime.fromisoformat(value).timestamp()  # Naive times are local
+    return _validate_timestamp(value)
+
+
+def import_file(path: str, **options) -> ImportProgress:
+    """Run import_orders to completion and return the final progress"""
+    progress = None
+    for progress in import_orders(path, **options):
+        pass
+    return progress
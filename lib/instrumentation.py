@@ -0,0 +1,156 @@
+"""
+Lightweight metrics and event hooks for the model layer.
+
+Metrics (counters and timing histograms) are off by default; while
+disabled, instrumented calls only pay for a global flag check. Event
+subscriptions work independently of the metrics switch. Events are emitted
+after the change they describe is made, so a failing subscriber is logged
+(and counted as subscriber_errors) instead of failing the model call.
+
+    from lib import instrumentation
+    instrumentation.enable()
+    instrumentation.subscribe("order_created", lambda order: ...)
+    instrumentation.snapshot()  # {"enabled": True, "counters": {...}, "histograms": {...}}
+"""
+from __future__ import annotations
+import logging
+import threading
+from bisect import bisect_left
+from functools import wraps
+from time import perf_counter
+from typing import Any, Callable, Dict, List
+
+# Upper bounds (seconds) of the timing histogram buckets; the last bucket is open-ended
+BUCKETS = (1e-6, 5e-6, 1e-5, 5e-5, 1e-4, 5e-4, 1e-3, 5e-3, 1e-2, 5e-2, 0.1, 0.5, 1.0)
+
+_enabled = False
+_lock = threading.Lock()  # Counters and histograms are updated from every register thread
+_counters: Dict[str, int] = {}
+_histograms: Dict[str, Histogram] = {}
+_subscribers: Dict[str, List[Callable[..., Any]]] = {}
+
+_log = logging.getLogger(__name__)
+
+
+class Histogram:
+    """Fixed-bucket histogram of durations in seconds"""
+
+    __slots__ = ('count', 'total', 'buckets')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.buckets = [0] * (len(BUCKETS) + 1)
+
+    def observe(self, seconds: float) -> None:
+        """Record one duration"""
+        self.count += 1
+        self.total += seconds
+        self.buckets[bisect_left(BUCKETS, seconds)] += 1
+
+    def as_dict(self) -> dict:
+        """Return count, sum and per-bucket counts keyed by upper bound"""
+        labels = [f"{bound:g}" for bound in BUCKETS] + ["+Inf"]
+        return {
+            "count": self.count,
+            "sum": self.total,
+            "buckets": dict(zip(labels, self.buckets)),
+        }
+
+
+def enable() -> None:
+    """Start collecting counters and timings"""
+    global _enabled
+    _enabled = True
+
+
+def disable() -> None:
+    """Stop collecting counters and timings (collected values are kept)"""
+    global _enabled
+    _enabled = False
+
+
+def is_enabled() -> bool:
+    """Return whether metrics are being collected"""
+    return _enabled
+
+
+def reset() -> None:
+    """Clear all counters and histograms"""
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+
+
+def increment(name: str, amount: int = 1) -> None:
+    """Add amount to a counter if metrics are enabled"""
+    if _enabled:
+        with _lock:
+            _counters[name] = _counters.get(name, 0) + amount
+
+
+def observe(name: str, seconds: float) -> None:
+    """Record a duration in a timing histogram if metrics are enabled"""
+    if _enabled:
+        with _lock:
+            histogram = _histograms.get(name)
+            if histogram is None:
+                histogram = _histograms[name] = Histogram()
+            histogram.observe(seconds)
+
+
+def timed(name: str) -> Callable:
+    """Decorator recording each call's duration in the name histogram while enabled"""
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            start = perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                observe(name, perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+def subscribe(event: str, callback: Callable[..., Any]) -> None:
+    """Call callback(*payload) whenever event is emitted"""
+    _subscribers.setdefault(event, []).append(callback)
+
+
+def unsubscribe(event: str, callback: Callable[..., Any]) -> None:
+    """Remove a callback added with subscribe"""
+    callbacks = _subscribers.get(event, [])
+    if callback in callbacks:
+        callbacks.remove(callback)
+    if not callbacks:
+        _subscribers.pop(event, None)
+
+
+def subscribed(event: str) -> bool:
+    """Return whether anything listens for event (to skip building payloads)"""
+    return event in _subscribers
+
+
+def emit(event: str, *payload: Any) -> None:
+    """Deliver an event to its subscribers, logging any callback that raises"""
+    callbacks = _subscribers.get(event)
+    if callbacks:
+        for callback in list(callbacks):
+            try:
+                callback(*payload)
+            except Exception:
+                _log.exception("%s subscriber %r failed", event, callback)
+                increment("subscriber_errors")
+
+
+def snapshot() -> dict:
+    """Export all metrics as a plain dict"""
+    with _lock:
+        return {
+            "enabled": _enabled,
+            "counters": dict(_counters),
+            "histograms": {name: hist.as_dict() for name, hist in _histograms.items()},
+        }
@@ -0,0 +1,181 @@
+"""
+asyncio order intake for POS terminals.
+
+Terminals send newline-delimited JSON messages over a local TCP or Unix
+socket:
+
+    {"id": "t1-0042", "customer": "Sam", "coffee": "Latte", "price": 4.5}
+
+Messages are queued and committed to the model layer in micro-batches
+through Order.bulk_create. Once a batch is committed, every message in it
+is acknowledged on its own connection with one JSON line:
+
+    {"id": "t1-0042", "ok": true}
+    {"id": "t1-0043", "ok": false, "error": "Price must not exceed 10.0."}
+
+The queue is bounded: when it is full, connections stop being read until
+the batcher catches up, which pushes back on the terminals through TCP flow
+control. Validation and name resolution follow lib.importer.parse_row.
+A line longer than the stream limit is rejected and its connection closed
+once everything sent before it is acknowledged. If committing a batch fails
+unexpectedly, every message in it is rejected and the error is logged; the
+server keeps running.
+
+    server = OrderIntakeServer(batch_size=200)
+    await server.start_tcp("127.0.0.1", 9000)
+    ...
+    await server.close()
+"""
+from __future__ import annotations
+import asyncio
+import json
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from lib.importer import parse_row
+from lib.models.order import Order
+
+_Pending = Tuple[object, object, asyncio.StreamWriter]  # (message id, raw message, connection)
+_OVERSIZED = object()  # Queued in place of a line longer than the stream limit
+
+_log = logging.getLogger(__name__)
+
+
+class OrderIntakeServer:
+    """Accepts order messages on a socket and commits them in micro-batches"""
+
+    def __init__(self, batch_size: int = 100, max_delay: float = 0.002, queue_size: int = 10_000):
+        if batch_size < 1 or queue_size < 1:
+            raise ValueError("batch_size and queue_size must be at least 1.")
+        self.batch_size = batch_size
+        self.max_delay = max_delay  # How long a partial batch waits for company
+        self._queue: asyncio.Queue = asyncio.Queue(queue_size)
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._batcher: Optional[asyncio.Task] = None
+        self._connections: set = set()
+        self.stats = {"batches": 0, "accepted": 0, "rejected": 0, "failed_batches": 0}
+
+    async def start_tcp(self, host: str = "127.0.0.1", port: int = 0) -> Tuple[str, int]:
+        """Listen on a TCP socket and return the bound (host, port)"""
+        self._server = await asyncio.start_server(self._handle, host, port)
+        self._start_batcher()
+        return self._server.sockets[0].getsockname()[:2]
+
+    async def start_unix(self, path: str) -> None:
+        """Listen on a Unix domain socket"""
+        self._server = await asyncio.start_unix_server(self._handle, path)
+        self._start_batcher()
+
+    async def close(self) -> None:
+        """Stop accepting connections, commit what is queued and shut down"""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        for writer in list(self._connections):
+            writer.close()
+        await self._queue.join()
+        if self._batcher is not None:
+            self._batcher.cancel()
+            try:
+                await self._batcher
+            except asyncio.CancelledError:
+                pass
+
+    def _start_batcher(self) -> None:
+        self._batcher = asyncio.get_running_loop().create_task(self._run_batches())
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Read messages from one connection and queue them"""
+        self._connections.add(writer)
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:  # Longer than the stream limit; the rest of the stream can't be framed
+                    await self._queue.put((None, _OVERSIZED, writer))
+                    break
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                try:
+                    message = json.loads(line)
+                    message_id = message.get("id") if isinstance(message, dict) else None
+                except ValueError:
+                    message, message_id = None, None
+                await self._queue.put((message_id, message, writer))  # Blocks when full
+                await writer.drain()  # Also wait for a slow reader to take its acks
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._connections.discard(writer)
+
+    async def _run_batches(self) -> None:
+        """Collect queued messages into batches and commit them forever"""
+        queue = self._queue
+        while True:
+            batch = [await queue.get()]
+            self._drain_into(batch)
+            if len(batch) < self.batch_size and self.max_delay > 0:
+                await asyncio.sleep(self.max_delay)
+                self._drain_into(batch)
+            try:
+                self._commit(batch)
+            except Exception as error:  # Keep serving; the batch's messages are rejected instead
+                _log.exception("Committing an intake batch of %d messages failed", len(batch))
+                self.stats["failed_batches"] += 1
+                self._acknowledge(batch, {}, f"Batch failed: {_describe(error)}")
+            finally:
+                for _ in batch:
+                    queue.task_done()
+
+    def _drain_into(self, batch: List[_Pending]) -> None:
+        """Move already-queued messages into batch, up to batch_size"""
+        queue = self._queue
+        while len(batch) < self.batch_size and not queue.empty():
+            batch.append(queue.get_nowait())
+
+    def _commit(self, batch: List[_Pending]) -> None:
+        """Validate, commit and acknowledge one batch"""
+        rows = []
+        row_items: List[int] = []  # Batch index of each parsed row
+        acks: Dict[int, dict] = {}
+        customers, coffees = {}, {}
+        for index, (message_id, message, _) in enumerate(batch):
+            if message is _OVERSIZED:
+                acks[index] = {"id": None, "ok": False, "error": "Message exceeds the line length limit."}
+                continue
+            try:
+                rows.append(parse_row(message, customers, coffees))
+                row_items.append(index)
+            except (TypeError, ValueError, KeyError) as error:
+                acks[index] = {"id": message_id, "ok": False, "error": _describe(error)}
+        _, errors = Order.bulk_create(rows)
+        for row_index, error in errors:
+            acks[row_items[row_index]] = {"id": batch[row_items[row_index]][0], "ok": False,
+                                          "error": _describe(error)}
+        self.stats["batches"] += 1
+        self._acknowledge(batch, acks)
+
+    def _acknowledge(self, batch: List[_Pending], acks: Dict[int, dict], error: Optional[str] = None) -> None:
+        """Send each message its ack from acks (ok if absent, or error for all if given)"""
+        for index, (message_id, message, writer) in enumerate(batch):
+            ack = acks.get(index)
+            if ack is None and error is not None:
+                ack = {"id": message_id, "ok": False, "error": error}
+            if ack is None:
+                ack = {"id": message_id, "ok": True}
+                self.stats["accepted"] += 1
+            else:
+                self.stats["rejected"] += 1
+            if not writer.is_closing():
+                writer.write(json.dumps(ack).encode() + b"\n")
+                if message is _OVERSIZED:
+                    writer.close()
+
+
+def _describe(error: Exception) -> str:
+    """Human-readable error text for an acknowledgement"""
+    if isinstance(error, KeyError):
+        return f"Missing field {error.args[0]!r}."
+    return str(error)
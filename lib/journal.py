@@ -0,0 +1,404 @@
+"""
+Append-only journal of order mutations, for crash recovery.
+
+The journal is a directory of numbered log segments plus a checkpoint.
+Every record is length-prefixed and checksummed:
+
+    record   <II   payload length, CRC-32 of payload, then the payload
+    payload  <BI   + UTF-8 name            customer / coffee defined, customer renamed
+             <BQIIHd                       order created: order, customer, coffee, cents, timestamp
+             <BQII                         order reassigned: order, customer, coffee
+             <BQ                           order cancelled: order
+
+Ids are the journal's own. A customer or coffee is defined the first time
+an order references it. Records are buffered and written with a single
+fsync per group (group commit): when group_size records are waiting, every
+commit_interval seconds from a background thread, and on commit()/stop().
+
+    from lib import journal
+    customers, coffees, orders = journal.start("shop.journal")  # Replays what is there
+    ...
+    journal.active().compact()  # Fold the log into the checkpoint (also automatic)
+    journal.stop()
+
+Replay folds the checkpoint and the remaining segments into the final state
+first and only then builds the objects (in one Order._wire_many pass), so
+its cost is one dict update per record plus one object per surviving order.
+A torn record at the end of a segment (a crash mid-write) ends that
+segment's replay. Compaction seals the active segment and rewrites the
+checkpoint from it in a background thread, so replay time tracks the live
+state rather than the full history.
+"""
+from __future__ import annotations
+import os
+import struct
+import threading
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+from lib import instrumentation
+from lib.models import store
+from lib.models.customer import Customer
+from lib.models.coffee import Coffee
+from lib.models.order import Order
+from lib.models.order_store import order_key
+
+SEGMENT_MAGIC = b"CSJ1"
+CHECKPOINT_MAGIC = b"CSC1"
+_CHECKPOINT_HEADER = struct.Struct("<4sQ")  # magic, last segment folded in
+_RECORD = struct.Struct("<II")
+_NAMED = struct.Struct("<BI")
+_CREATED = struct.Struct("<BQIIHd")
+_REASSIGNED = struct.Struct("<BQII")
+_CANCELLED = struct.Struct("<BQ")
+CUSTOMER, COFFEE, RENAMED, CREATED, REASSIGNED, CANCELLED = range(1, 7)
+_EVENTS = ("order_created", "orders_restored", "order_reassigned", "order_cancelled", "customer_renamed")
+
+_journal: Optional[Journal] = None
+
+
+def active() -> Optional[Journal]:
+    """Return the running journal, or None"""
+    return _journal
+
+
+def start(path: str, group_size: int = 256, commit_interval: Optional[float] = 0.01,
+          compact_bytes: int = 64 << 20) -> Tuple[List[Customer], List[Coffee], List[Order]]:
+    """
+    Replay the journal at path and start journaling every order mutation
+    into it, returning the restored (customers, coffees, orders).
+    """
+    global _journal
+    stop()
+    journal = Journal(path, group_size, commit_interval, compact_bytes)
+    restored = journal.open()
+    _journal = journal
+    return restored
+
+
+def stop() -> None:
+    """Commit and close the running journal, if any"""
+    global _journal
+    journal, _journal = _journal, None
+    if journal is not None:
+        journal.close()
+
+
+class _State:
+    """Final state of a journal after folding records, in journal ids"""
+
+    __slots__ = ('customers', 'coffees', 'orders')
+
+    def __init__(self):
+        self.customers: Dict[int, str] = {}
+        self.coffees: Dict[int, str] = {}
+        self.orders: Dict[int, list] = {}  # Order id -> [customer id, coffee id, cents, timestamp]
+
+    def fold(self, data: bytes, position: int) -> int:
+        """Apply the records in data from position on; return where the last intact record ends"""
+        unpack_record = _RECORD.unpack_from
+        end = len(data)
+        orders = self.orders
+        while position + _RECORD.size <= end:
+            length, checksum = unpack_record(data, position)
+            start = position + _RECORD.size
+            payload = data[start:start + length]
+            if len(payload) < length or zlib.crc32(payload) != checksum or not length:
+                break  # Torn or corrupt tail
+            kind = payload[0]
+            if kind == CREATED:
+                _, order, customer, coffee, cents, timestamp = _CREATED.unpack(payload)
+                orders[order] = [customer, coffee, cents, timestamp]
+            elif kind == REASSIGNED:
+                _, order, customer, coffee = _REASSIGNED.unpack(payload)
+                row = orders.get(order)
+                if row is not None:
+                    row[0], row[1] = customer, coffee
+            elif kind == CANCELLED:
+                orders.pop(_CANCELLED.unpack(payload)[1], None)
+            else:
+                _, key = _NAMED.unpack_from(payload)
+                name = payload[_NAMED.size:].decode("utf-8")
+                (self.coffees if kind == COFFEE else self.customers)[key] = name
+            position = start + length
+        return position
+
+    def records(self) -> bytes:
+        """Encode the state as the shortest equivalent run of records"""
+        parts = []
+        for kind, names in ((CUSTOMER, self.customers), (COFFEE, self.coffees)):
+            for key, name in names.items():
+                parts.append(_NAMED.pack(kind, key) + name.encode("utf-8"))
+        pack = _CREATED.pack
+        parts.extend(pack(CREATED, order, *row) for order, row in self.orders.items())
+        return b"".join(_frame(part) for part in parts)
+
+
+def _frame(payload: bytes) -> bytes:
+    """Prefix a payload with its length and checksum"""
+    return _RECORD.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+class Journal:
+    """
+    One journal directory: replay, appending with group commit, compaction.
+
+    Appends are serialized by one lock and may come from any thread.
+    Orders are identified by order_key, so the journal never keeps them
+    alive; an order that is collected without being cancelled stays in
+    the journal. Every new order is announced (order_created or
+    orders_restored) before it can be reassigned, so a key reused after a
+    collection is remapped first; compaction drops the keys of orders
+    whose coffee has been collected.
+    """
+
+    def __init__(self, path: str, group_size: int = 256, commit_interval: Optional[float] = 0.01,
+                 compact_bytes: int = 64 << 20):
+        if group_size < 1 or compact_bytes < 1:
+            raise ValueError("group_size and compact_bytes must be at least 1.")
+        self.path = path
+        self.group_size = group_size
+        self.commit_interval = commit_interval
+        self.compact_bytes = compact_bytes
+        self._lock = threading.RLock()
+        self._buffer: List[bytes] = []
+        self._file = None
+        self._segment = 0  # Number of the active segment
+        self._segment_size = 0
+        self._folded = 0  # Last segment already in the checkpoint
+        self._customers: Dict[int, int] = {}  # Customer registry id -> journal id
+        self._coffees: Dict[int, int] = {}
+        self._orders: Dict[object, Tuple[int, int]] = {}  # order_key -> (journal id, coffee registry id)
+        self._next_customer = self._next_coffee = self._next_order = 1
+        self._stopping = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+        self._compactor: Optional[threading.Thread] = None
+        self.commits = 0  # fsyncs issued, for observing group commit
+
+    # Lifecycle
+
+    def open(self) -> Tuple[List[Customer], List[Coffee], List[Order]]:
+        """Replay the directory, open a fresh segment and subscribe to model events"""
+        os.makedirs(self.path, exist_ok=True)
+        state, segments = self._read()
+        restored = self._restore(state)
+        self._segment = max(segments, default=self._folded) + 1
+        self._open_segment()
+        for event, callback in zip(_EVENTS, self._callbacks()):
+            instrumentation.subscribe(event, callback)
+        if self.commit_interval is not None:
+            self._flusher = threading.Thread(target=self._flush_periodically, daemon=True)
+            self._flusher.start()
+        return restored
+
+    def close(self) -> None:
+        """Unsubscribe, commit everything and wait for a running compaction"""
+        for event, callback in zip(_EVENTS, self._callbacks()):
+            instrumentation.unsubscribe(event, callback)
+        self._stopping.set()
+        if self._flusher is not None:
+            self._flusher.join()
+        with self._lock:
+            self.commit()
+            self._file.close()
+        if self._compactor is not None:
+            self._compactor.join()
+
+    def commit(self) -> None:
+        """Write and fsync every buffered record (one fsync for the whole group)"""
+        with self._lock:
+            if not self._buffer:
+                return
+            data = b"".join(self._buffer)
+            self._buffer.clear()
+            self._file.write(data)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self.commits += 1
+            self._segment_size += len(data)
+            if self._segment_size >= self.compact_bytes and not self._compacting():
+                self.compact()
+
+    def compact(self, wait: bool = False) -> None:
+        """
+        Seal the active segment and fold every sealed segment into a new
+        checkpoint in a background thread (wait=True blocks until done).
+        """
+        with self._lock:
+            if self._compacting():
+                self._compactor.join()  # One compaction at a time
+            self.commit()
+            self._file.close()
+            sealed = self._segment
+            self._segment += 1
+            self._open_segment()
+            self._forget_collected()
+            self._compactor = threading.Thread(target=self._fold_into_checkpoint, args=(sealed,))
+            self._compactor.start()
+        if wait:
+            self._compactor.join()
+
+    # Event callbacks (called by the models)
+
+    def _callbacks(self):
+        return self._created, self._restored, self._reassigned, self._cancelled, self._renamed
+
+    def _created(self, order: Order) -> None:
+        with self._lock:
+            self._append_created(order)
+
+    def _restored(self, orders: List[Order]) -> None:
+        with self._lock:
+            for order in orders:
+                self._append_created(order)
+
+    def _reassigned(self, order: Order) -> None:
+        with self._lock:
+            key = order_key(order)
+            entry = self._orders.get(key)
+            if entry is None:  # Predates the journal: record its current state
+                self._append_created(order)
+                return
+            coffee = order.coffee
+            self._orders[key] = (entry[0], coffee._id)
+            self._append(_REASSIGNED.pack(REASSIGNED, entry[0], self._customer_id(order.customer),
+                                          self._coffee_id(coffee)))
+
+    def _cancelled(self, order: Order) -> None:
+        with self._lock:
+            entry = self._orders.pop(order_key(order), None)
+            if entry is not None:
+                self._append(_CANCELLED.pack(CANCELLED, entry[0]))
+
+    def _renamed(self, customer: Customer) -> None:
+        with self._lock:
+            journal_id = self._customers.get(customer._id)
+            if journal_id is not None:
+                self._append(_NAMED.pack(RENAMED, journal_id) + customer.name.encode("utf-8"))
+
+    # Internals
+
+    def _append(self, payload: bytes) -> None:
+        """Buffer a record, committing the group once it is full (lock held)"""
+        self._buffer.append(_frame(payload))
+        if len(self._buffer) >= self.group_size:
+            self.commit()
+
+    def _append_created(self, order: Order) -> None:
+        journal_id = self._next_order
+        self._next_order += 1
+        coffee = order.coffee
+        self._orders[order_key(order)] = (journal_id, coffee._id)
+        self._append(_CREATED.pack(CREATED, journal_id, self._customer_id(order.customer),
+                                   self._coffee_id(coffee), order.cents, order.timestamp))
+
+    def _forget_collected(self) -> None:
+        """
+        Drop the keys of orders whose coffee has been collected (lock held).
+        A live order keeps its coffee alive, so those orders are gone too.
+        """
+        live = {coffee._id for shop in store.all_stores() for coffee in shop.coffees}
+        self._orders = {key: entry for key, entry in self._orders.items() if entry[1] in live}
+
+    def _customer_id(self, customer: Customer) -> int:
+        """Return the customer's journal id, defining it on first use (lock held)"""
+        journal_id = self._customers.get(customer._id)
+        if journal_id is None:
+            journal_id = self._customers[customer._id] = self._next_customer
+            self._next_customer += 1
+            self._append(_NAMED.pack(CUSTOMER, journal_id) + customer.name.encode("utf-8"))
+        return journal_id
+
+    def _coffee_id(self, coffee: Coffee) -> int:
+        """Return the coffee's journal id, defining it on first use (lock held)"""
+        journal_id = self._coffees.get(coffee._id)
+        if journal_id is None:
+            journal_id = self._coffees[coffee._id] = self._next_coffee
+            self._next_coffee += 1
+            self._append(_NAMED.pack(COFFEE, journal_id) + coffee.name.encode("utf-8"))
+        return journal_id
+
+    def _compacting(self) -> bool:
+        return self._compactor is not None and self._compactor.is_alive()
+
+    def _flush_periodically(self) -> None:
+        while not self._stopping.wait(self.commit_interval):
+            self.commit()
+
+    def _segment_path(self, number: int) -> str:
+        return os.path.join(self.path, f"{number:010d}.log")
+
+    def _segments(self) -> List[int]:
+        """Return the numbers of the segment files, ascending"""
+        return sorted(int(name[:-4]) for name in os.listdir(self.path)
+                      if name.endswith(".log") and name[:-4].isdigit())
+
+    def _open_segment(self) -> None:
+        self._file = open(self._segment_path(self._segment), "ab")
+        self._file.write(SEGMENT_MAGIC)
+        self._segment_size = len(SEGMENT_MAGIC)
+
+    def _load_checkpoint(self) -> Tuple[_State, int]:
+        """Return the checkpointed state and the last segment it covers"""
+        state = _State()
+        try:
+            with open(os.path.join(self.path, "checkpoint"), "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return state, 0
+        magic, folded = _CHECKPOINT_HEADER.unpack_from(data)
+        if magic != CHECKPOINT_MAGIC:
+            raise ValueError("Not a journal checkpoint.")
+        state.fold(data, _CHECKPOINT_HEADER.size)
+        return state, folded
+
+    def _fold_segments(self, state: _State, numbers: List[int]) -> None:
+        for number in numbers:
+            with open(self._segment_path(number), "rb") as f:
+                data = f.read()
+            if data[:len(SEGMENT_MAGIC)] != SEGMENT_MAGIC:
+                raise ValueError(f"Not a journal segment: {self._segment_path(number)}")
+            state.fold(data, len(SEGMENT_MAGIC))
+
+    def _read(self) -> Tuple[_State, List[int]]:
+        """Fold the checkpoint and every newer segment; delete segments it already covers"""
+        state, self._folded = self._load_checkpoint()
+        segments = self._segments()
+        for number in segments:
+            if number <= self._folded:  # Left behind by an interrupted compaction
+                os.remove(self._segment_path(number))
+        segments = [number for number in segments if number > self._folded]
+        self._fold_segments(state, segments)
+        return state, segments
+
+    def _restore(self, state: _State) -> Tuple[List[Customer], List[Coffee], List[Order]]:
+        """Build the folded state as objects and map them to their journal ids"""
+        customers = {key: Customer._restore(name) for key, name in state.customers.items()}
+        coffees = {key: Coffee._restore(name) for key, name in state.coffees.items()}
+        rows = state.orders
+        orders = Order._wire_many((customers[customer], coffees[coffee], cents, timestamp)
+                                  for customer, coffee, cents, timestamp in rows.values())
+        self._customers = {customer._id: key for key, customer in customers.items()}
+        self._coffees = {coffee._id: key for key, coffee in coffees.items()}
+        self._orders = {order_key(order): (journal_id, order.coffee._id)
+                        for order, journal_id in zip(orders, rows)}
+        self._next_customer = max(customers, default=0) + 1
+        self._next_coffee = max(coffees, default=0) + 1
+        self._next_order = max(rows, default=0) + 1
+        return list(customers.values()), list(coffees.values()), orders
+
+    def _fold_into_checkpoint(self, sealed: int) -> None:
+        """Rewrite the checkpoint to cover every segment up to sealed, then delete them"""
+        state, folded = self._load_checkpoint()
+        numbers = [number for number in self._segments() if folded < number <= sealed]
+        self._fold_segments(state, numbers)
+        target = os.path.join(self.path, "checkpoint")
+        with open(target + ".tmp", "wb") as f:
+            f.write(_CHECKPOINT_HEADER.pack(CHECKPOINT_MAGIC, sealed))
+            f.write(state.records())
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(target + ".tmp", target)  # Atomic: a crash leaves the old or the new checkpoint
+        for number in numbers:
+            os.remove(self._segment_path(number))
+        self._folded = sealed
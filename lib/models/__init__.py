@@ -5,8 +5,10 @@ from typing import TYPE_CHECKING
 from .customer import Customer
 from .coffee import Coffee
 from .order import Order
+from .order_store import OrderStore, StoredOrder
+from .store import Store
 
-__all__ = ['Customer', 'Coffee', 'Order']
+__all__ = ['Customer', 'Coffee', 'Order', 'OrderStore', 'StoredOrder', 'Store']
 
 if TYPE_CHECKING:
     # For type checkers only - helps with circular imports during development
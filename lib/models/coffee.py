@@ -1,35 +1,353 @@
+from __future__ import annotations
+import math
+import threading
+import time
+from contextlib import nullcontext
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Tuple
+
+from lib import concurrency, instrumentation, storage
+from lib.models import memo, store
+from lib.models.leaderboard import Leaderboard
+from lib.models.money import average
+from lib.models.rolling import RollingWindow
+from lib.models.views import OrdersView, writable_orders
+
+if TYPE_CHECKING:
+    from lib.models.customer import Customer
+    from lib.models.order import Order
+
+def _validate_name(name) -> str:
+    """Return the stripped coffee name, raising if it is not a string of 3+ characters"""
+    if not isinstance(name, str) or len(name.strip()) < 3:
+        raise ValueError("Coffee name must be a string with at least 3 characters.")
+    return name.strip()
+
+def _ranking():
+    """Context guarding the shop-wide rankings (a no-op unless locking is on)"""
+    return concurrency.ranking_lock() if concurrency.is_enabled() else nullcontext()
+
 class Coffee:
+    __slots__ = ('_name', '_orders', '_orders_shared', '_stores', '_spend', '_count', '_price_total',
+                 '_price_squares', '_price_counts', '_min_price', '_max_price',
+                 '_windows', '_rank_delta', '_version', '_memo', '_store', '_id', '_lock',
+                 '__weakref__')
+
     def __init__(self, name: str):
         """Initialize a Coffee with name and empty orders list"""
-        if not isinstance(name, str) or len(name.strip()) < 3:
-            raise ValueError("Coffee name must be a string with at least 3 characters.")
-        self._name = name.strip()
-        self._orders = []
+        self._name = _validate_name(name)
+        self._setup()
+
+    @classmethod
+    def _restore(cls, name: str) -> Coffee:
+        """Build a coffee from trusted (already validated) data, skipping validation"""
+        coffee = cls.__new__(cls)
+        coffee._name = name
+        coffee._setup()
+        return coffee
+
+    def _setup(self) -> None:
+        """Initialize order state and aggregates and register the coffee (name already set)"""
+        self._orders: Dict[Order, None] = {}  # Insertion-ordered set for O(1) removal
+        self._orders_shared = False  # Set while an OrdersView iteration may walk _orders, see views
+        self._stores = ()  # OrderStores holding columnar orders for this coffee
+        # Total spent per customer on this coffee, ties go to the earliest customer
+        self._spend = Leaderboard(lambda customer: customer._id)
+        # Running price aggregates in integer cents, exact so detaching never drifts
+        self._count = 0
+        self._price_total = 0
+        self._price_squares = 0
+        self._price_counts: Dict[int, int] = {}  # Multiset of prices for min/max
+        self._min_price = None
+        self._max_price = None
+        self._windows: Dict[Tuple[float, int], RollingWindow] = {}  # (span, buckets) -> window
+        self._lock = None  # Created on first use when concurrency is enabled
+        self._rank_delta = None  # [orders, cents] not yet applied to the store's rankings, see _rank
+        self._version = 0  # Bumped whenever the coffee's orders change, see lib.models.memo
+        self._memo = None  # Memoized results, created on first use
+        self._store = store.current()
+        self._id = self._store.coffees.register(self, self._name)
+        backend = storage.active()
+        if backend is not None:
+            backend.coffee_added(self)
+
+    @classmethod
+    def get(cls, coffee_id: int) -> Optional[Coffee]:
+        """Return the current store's live coffee with this id, or None"""
+        return store.current().coffees.get(coffee_id)
+
+    @classmethod
+    def most_popular(cls, n: int) -> List[Coffee]:
+        """Return up to n of the current store's coffees with the most orders, highest first"""
+        current = store.current()
+        return cls._ranked(current, current.popularity, n)
+
+    @classmethod
+    def top_revenue(cls, n: int) -> List[Coffee]:
+        """Return up to n of the current store's coffees with the highest revenue, highest first"""
+        current = store.current()
+        return cls._ranked(current, current.revenue, n)
+
+    @staticmethod
+    def _ranked(current: store.Store, board: Leaderboard, n: int) -> List[Coffee]:
+        """Resolve the top n ids of a store's board, dropping collected coffees"""
+        with _ranking():
+            Coffee._flush_ranks(current)
+            while True:
+                ids = board.top(n)
+                coffees = [current.coffees.get(coffee_id) for coffee_id in ids]
+                if None not in coffees:
+                    return coffees
+                for coffee_id, coffee in zip(ids, coffees):
+                    if coffee is None:
+                        board.discard(coffee_id)
+
+    @classmethod
+    def intern(cls, name: str) -> Coffee:
+        """Return the current store's coffee with this name, creating it if there is none"""
+        if isinstance(name, str):
+            coffee = store.current().coffees.first(name.strip())
+            if coffee is not None:
+                return coffee
+        return cls(name)
 
     @property
     def name(self) -> str:
         """Get coffee name (read-only)"""
         return self._name
 
-    def orders(self) -> list:
-        """Return list of all orders for this coffee"""
-        return self._orders.copy()  # Return copy to prevent external modification
+    def orders(self) -> OrdersView:
+        """Return a read-only live view of all orders for this coffee"""
+        return OrdersView(self)
 
+    @memo.memoized
     def customers(self) -> list:
-        """Return unique list of customers who ordered this coffee"""
-        from lib.models.customer import Customer  # Prevent circular import
-        return list({order.customer for order in self._orders})
+        """Return unique list of customers who ordered this coffee, in creation order (by id) with either backend"""
+        backend = storage.active()
+        if backend is not None:
+            customers = backend.customers(self)
+        else:
+            customers = list(self._spend)  # Every customer with an order has a positive spend
+        return sorted(customers, key=lambda customer: customer._id)
 
     def num_orders(self) -> int:
         """Return total number of orders for this coffee"""
-        return len(self._orders)
+        backend = storage.active()
+        if backend is not None:
+            return backend.num_orders(self)
+        return self._count
 
+    @instrumentation.timed("average_price")
+    @concurrency.synchronized
     def average_price(self) -> float:
         """Calculate average price of orders for this coffee"""
-        if not self._orders:
-            return 0.0
-        total = sum(order.price for order in self._orders)
-        return round(total / len(self._orders), 2)
+        backend = storage.active()
+        if backend is not None:
+            return backend.average_price(self)
+        return average(self._price_total, self._count)
+
+    def total_revenue(self) -> float:
+        """Return the sum of all order prices for this coffee"""
+        return self._price_total / 100
+
+    @concurrency.synchronized
+    def price_stats(self) -> dict:
+        """Return count, min, max, mean and (population) stddev of order prices"""
+        if not self._count:
+            return {"count": 0, "min": 0.0, "max": 0.0, "mean": 0.0, "stddev": 0.0}
+        n = self._count
+        variance = (self._price_squares * n - self._price_total ** 2) / (n * n)  # In cents squared
+        return {
+            "count": n,
+            "min": self._min_price / 100,
+            "max": self._max_price / 100,
+            "mean": self._price_total / n / 100,
+            "stddev": math.sqrt(variance) / 100,
+        }
+
+    @concurrency.synchronized
+    def rolling_stats(self, span: float, now: Optional[float] = None, buckets: int = 60) -> dict:
+        """
+        Return count, revenue, average price and orders per minute over the
+        last span seconds (ending at now, default the current time).
+
+        The first call for a span builds its window from the order history;
+        after that it is updated with every order and each call is O(1)
+        amortized. See RollingWindow for the bucket granularity.
+        """
+        key = (float(span), buckets)
+        window = self._windows.get(key)
+        if window is None:
+            window = RollingWindow(span, buckets)
+            for order in self._iter_orders():
+                window.add(order.timestamp, order.cents)
+            self._windows[key] = window
+        now = time.time() if now is None else now
+        count = window.count(now)
+        revenue = window.revenue(now)
+        return {
+            "count": count,
+            "revenue": revenue / 100,
+            "average_price": average(revenue, count),
+            "per_minute": count * 60 / window.span,
+        }
+
+    @memo.memoized
+    def top_customers(self, n: int) -> List[Customer]:
+        """Return up to n customers who spent the most on this coffee, highest first"""
+        return self._spend.top(n)
+
+    def _order_count(self) -> int:
+        """Return the number of orders, for OrdersView"""
+        return self._count
+
+    def _get_lock(self) -> threading.RLock:
+        """Return this coffee's own lock, creating it on first use"""
+        if self._lock is None:
+            with concurrency.registry_lock():
+                if self._lock is None:
+                    self._lock = threading.RLock()
+        return self._lock
+
+    def _iter_orders(self) -> Iterator[Order]:
+        """Yield regular orders, then views of any columnar (OrderStore) orders"""
+        # list() copies the dict atomically, so other threads may keep writing
+        yield from list(self._orders) if concurrency.is_enabled() else self._orders
+        for store in self._stores:
+            yield from store._coffee_orders(self)
+
+    def _attach(self, order: Order) -> None:
+        """Track a new order for this coffee (called by the Order.coffee setter)"""
+        writable_orders(self)[order] = None
+        self._track(order.customer, order.cents, order.timestamp)
+        backend = storage.active()
+        if backend is not None:
+            backend.orders_added(self, (order,))
+
+    def _attach_many(self, orders: List[Order]) -> None:
+        """Track a batch of new orders at once (bulk and restore paths; the caller holds the coffee and customer locks)"""
+        price_counts = self._price_counts
+        new_counts: Dict[int, int] = {}
+        spend: Dict[Customer, int] = {}
+        windows = list(self._windows.values())
+        own_orders = writable_orders(self)
+        for order in orders:
+            own_orders[order] = None
+            cents = order._cents
+            new_counts[cents] = new_counts.get(cents, 0) + 1
+            spend[order._customer] = spend.get(order._customer, 0) + cents
+            for window in windows:
+                window.add(order._timestamp, cents)
+        for cents, n in new_counts.items():
+            price_counts[cents] = price_counts.get(cents, 0) + n
+            self._price_squares += cents * cents * n
+            if self._min_price is None or cents < self._min_price:
+                self._min_price = cents
+            if self._max_price is None or cents > self._max_price:
+                self._max_price = cents
+        self._spend.update(spend)
+        for order in orders:
+            counts = order._customer._coffee_counts
+            counts[self] = counts.get(self, 0) + 1
+        total = sum(spend.values())
+        self._count += len(orders)
+        self._price_total += total
+        self._rank(len(orders), total)
+        memo.bump(self, *spend)
+        backend = storage.active()
+        if backend is not None:
+            backend.orders_added(self, orders)
+
+    def _detach(self, order: Order) -> None:
+        """Stop tracking an order for this coffee (called by the Order.coffee setter)"""
+        del writable_orders(self)[order]
+        self._untrack(order.customer, order.cents, order.timestamp)
+        backend = storage.active()
+        if backend is not None:
+            backend.order_removed(order)
+
+    def _transfer(self, order: Order, new_customer: Customer) -> None:
+        """Move an order's spend to another customer (called by the Order.customer setter)"""
+        amount = order.cents
+        self._spend.add(order.customer, -amount)
+        self._spend.add(new_customer, amount)
+        self._uncount(order.customer)
+        new_customer._coffee_counts[self] = new_customer._coffee_counts.get(self, 0) + 1
+        memo.bump(self, order.customer, new_customer)
+        backend = storage.active()
+        if backend is not None:
+            backend.order_moved(order, new_customer)
+
+    def _track(self, customer: Customer, amount: int, timestamp: float) -> None:
+        """Add one order's amount (in cents) to the spend index, price aggregates, rankings and time windows"""
+        self._spend.add(customer, amount)
+        customer._coffee_counts[self] = customer._coffee_counts.get(self, 0) + 1
+        self._rank(1, amount)
+        self._count += 1
+        self._price_total += amount
+        self._price_squares += amount * amount
+        self._price_counts[amount] = self._price_counts.get(amount, 0) + 1
+        if self._min_price is None or amount < self._min_price:
+            self._min_price = amount
+        if self._max_price is None or amount > self._max_price:
+            self._max_price = amount
+        for window in self._windows.values():
+            window.add(timestamp, amount)
+        memo.bump(self, customer)
+
+    def _untrack(self, customer: Customer, amount: int, timestamp: float) -> None:
+        """Remove one order's amount (in cents) from the spend index, price aggregates, rankings and time windows"""
+        self._spend.add(customer, -amount)
+        self._uncount(customer)
+        self._rank(-1, -amount)
+        self._count -= 1
+        self._price_total -= amount
+        self._price_squares -= amount * amount
+        remaining = self._price_counts.pop(amount) - 1
+        if remaining:
+            self._price_counts[amount] = remaining
+        elif amount == self._min_price or amount == self._max_price:
+            # Only rescan distinct prices when the last min/max order leaves
+            self._min_price = min(self._price_counts, default=None)
+            self._max_price = max(self._price_counts, default=None)
+        for window in self._windows.values():
+            window.remove(timestamp, amount)
+        memo.bump(self, customer)
+
+    def _uncount(self, customer: Customer) -> None:
+        """Take one order off the customer's count for this coffee"""
+        remaining = customer._coffee_counts.pop(self) - 1
+        if remaining:
+            customer._coffee_counts[self] = remaining
+
+    def _rank(self, orders: int, amount: int) -> None:
+        """Apply order count and revenue changes to the store's rankings"""
+        if concurrency.is_enabled():
+            # Buffered under this coffee's lock (held by the caller) and applied
+            # by the next ranking read, so orders for different coffees never contend
+            delta = self._rank_delta
+            if delta is None:
+                self._rank_delta = [orders, amount]
+            else:
+                delta[0] += orders
+                delta[1] += amount
+            self._store.ranking_dirty = True
+        else:
+            self._store.popularity.add(self._id, orders)
+            self._store.revenue.add(self._id, amount)
+
+    @staticmethod
+    def _flush_ranks(current: store.Store) -> None:
+        """Apply the ranking deltas buffered by _rank to a store's boards (ranking lock held)"""
+        if not current.ranking_dirty:
+            return
+        current.ranking_dirty = False  # Cleared first: a delta buffered during the scan sets it again
+        for coffee in current.coffees:
+            if coffee._rank_delta is None:
+                continue
+            with concurrency.locked(coffee):
+                delta, coffee._rank_delta = coffee._rank_delta, None
+            current.popularity.add(coffee._id, delta[0])
+            current.revenue.add(coffee._id, delta[1])
 
     def __repr__(self):
         return f"<Coffee name='{self.name}'>"
\ No newline at end of file
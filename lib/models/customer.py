@@ -1,38 +1,90 @@
 from __future__ import annotations
-from typing import TYPE_CHECKING, List, ClassVar, Dict, Optional
-from decimal import Decimal
+from typing import TYPE_CHECKING, Hashable, Iterable, Iterator, List, ClassVar, Dict, Optional, Tuple
+
+from lib import concurrency, instrumentation, storage
+from lib.models import memo, store
+from lib.models.money import to_cents
+from lib.models.views import OrdersView
 
 if TYPE_CHECKING:
     from lib.models.coffee import Coffee
     from lib.models.order import Order
 
+def _validate_name(value) -> str:
+    """Return the stripped customer name, raising if it is not a 1-15 character string"""
+    if not isinstance(value, str):
+        raise TypeError("Name must be a string.")
+    if not 1 <= len(value.strip()) <= 15:
+        raise ValueError("Name must be a string between 1 and 15 characters.")
+    return value.strip()
+
 class Customer:
-     # Class variable to track all customer instances
-    _all_customers: ClassVar[List[Customer]] = []
-    customer_count: ClassVar[int] = 0  # Shared across all instances
+    __slots__ = ('_name', '_orders', '_orders_shared', '_stores', '_coffee_counts', '_version', '_memo', '_store', '_id',
+                 '__weakref__')
+
+    # Live customers are indexed weakly by their Store; this counts customers of every store
+    customer_count: ClassVar[int] = 0
 
     def __init__(self, name: str):
+        self._id = None
         self.name = name
-        self._orders: List[Order] = []  # Explicit type annotation
-        Customer._all_customers.append(self)
-        Customer.customer_count += 1
+        self._setup()
+
+    @classmethod
+    def _restore(cls, name: str) -> Customer:
+        """Build a customer from trusted (already validated) data, skipping validation"""
+        customer = cls.__new__(cls)
+        customer._name = name
+        customer._setup()
+        return customer
+
+    def _setup(self) -> None:
+        """Initialize order state and register the customer (name already set)"""
+        self._orders: Dict[Order, None] = {}  # Insertion-ordered set for O(1) removal
+        self._orders_shared = False  # Set while an OrdersView iteration may walk _orders, see views
+        self._stores = ()  # OrderStores holding columnar orders for this customer
+        self._coffee_counts: Dict[Coffee, int] = {}  # Orders per coffee, kept by Coffee
+        self._version = 0  # Bumped by Coffee whenever the customer's orders change, see lib.models.memo
+        self._memo = None  # Memoized results, created on first use
+        self._store = store.current()
+        with concurrency.registry_lock():
+            Customer.customer_count += 1
+            self._store.customer_count += 1
+        # Ids follow creation order and are used to break spend ties
+        self._id = self._store.customers.register(self, self._name)
+        backend = storage.active()
+        if backend is not None:
+            backend.customer_added(self)
+
+    @classmethod
+    def get(cls, customer_id: int) -> Optional[Customer]:
+        """Return the current store's live customer with this id, or None"""
+        return store.current().customers.get(customer_id)
 
     @classmethod
+    def find(cls, name: str) -> List[Customer]:
+        """Return the current store's live customers with this name, oldest first"""
+        return store.current().customers.find(name.strip())
+
+    @classmethod
+    def all(cls) -> List[Customer]:
+        """Return all of the current store's live customers, oldest first"""
+        return list(store.current().customers)
+
+    @classmethod
+    @instrumentation.timed("most_aficionado")
     def most_aficionado(cls, coffee: Coffee) -> Optional['Customer']:
         """
         Returns the customer who has spent the most on the given coffee.
-        """
-        max_spent = Decimal('0')
-        top_customer = None
 
-        for customer in cls._all_customers:
-            # Calculate total spent by this customer on the given coffee
-            total = sum(Decimal(str(order.price)) for order in customer.orders() if order.coffee == coffee)
-            if total > max_spent:
-                max_spent = total
-                top_customer = customer
+        Reads the leader of the coffee's spend index, so this no longer
+        scans every customer's orders.
+        """
+        backend = storage.active()
+        if backend is not None:
+            return backend.most_aficionado(coffee)
+        return coffee._spend.leader()
 
-        return top_customer
     @property
     def name(self) -> str:
         """Get customer name"""
@@ -41,43 +93,101 @@ class Customer:
     @name.setter
     def name(self, value: str):
         """Set customer name with validation"""
-        if not isinstance(value, str):
-            raise TypeError("Name must be a string.")
-        if not 1 <= len(value.strip()) <= 15:
-            raise ValueError("Name must be a string between 1 and 15 characters.")
-        self._name = value.strip()
+        self._name = _validate_name(value)
+        if self._id is not None:
+            self._store.customers.rename(self._id, self._name)
+            backend = storage.active()
+            if backend is not None:
+                backend.customer_renamed(self)
+            instrumentation.emit("customer_renamed", self)
 
-    def orders(self) -> List[Order]:
-        """Return a COPY of the orders list to prevent modification"""
-        return self._orders.copy()
+    def orders(self) -> OrdersView:
+        """Return a read-only live view of the orders (no copy is made)"""
+        return OrdersView(self)
 
+    @memo.memoized
     def coffees(self) -> List[Coffee]:
-        """Return a list of unique coffees ordered by the customer"""
-        unique_coffees = {order.coffee.name: order.coffee for order in self._orders}
-        return list(unique_coffees.values())
+        """
+        Return a list of unique coffees ordered by the customer.
 
-    def create_order(self, coffee: Coffee, price: float) -> Order:
-        """Create a new order and add it to the orders list"""
+        Coffees sharing a name count once, as the newest of them; the list
+        is in creation order (by id) with either backend.
+        """
+        backend = storage.active()
+        # list() copies the dict atomically, so other threads may keep writing
+        ordered = backend.coffees(self) if backend is not None else list(self._coffee_counts)
+        unique_coffees: Dict[str, Coffee] = {}
+        for coffee in ordered:
+            kept = unique_coffees.get(coffee.name)
+            if kept is None or coffee._id > kept._id:
+                unique_coffees[coffee.name] = coffee
+        return sorted(unique_coffees.values(), key=lambda coffee: coffee._id)
+
+    @memo.memoized
+    def favorite_coffee(self) -> Optional[Coffee]:
+        """Return the coffee this customer ordered most often (ties go to the older coffee)"""
+        # list() copies the dict atomically, so other threads may keep writing
+        counts = list(self._coffee_counts.items())
+        if not counts:
+            return None
+        return min(counts, key=lambda item: (-item[1], item[0]._id))[0]
+
+    def _order_count(self) -> int:
+        """Return the number of orders, for OrdersView"""
+        return len(self._orders) + sum(
+            len(store._customer_rows[store._customer_index[self]]) for store in self._stores)
+
+    def _get_lock(self):
+        """Return the lock stripe guarding this customer"""
+        return concurrency.customer_stripe(self._id)
+
+    def _iter_orders(self) -> Iterator[Order]:
+        """Yield regular orders, then views of any columnar (OrderStore) orders"""
+        # list() copies the dict atomically, so other threads may keep writing
+        yield from list(self._orders) if concurrency.is_enabled() else self._orders
+        for store in self._stores:
+            yield from store._customer_orders(self)
+
+    @instrumentation.timed("create_order")
+    def create_order(self, coffee: Coffee, price: float, timestamp: Optional[float] = None,
+                     idempotency_key: Optional[Hashable] = None) -> Order:
+        """
+        Create a new order and add it to the orders list.
+
+        With an idempotency_key, a retried request returns the order created
+        the first time instead of a duplicate (for as long as the key is
+        retained by the store's idempotency_keys). Reusing a key for a
+        different customer, coffee or price raises ValueError.
+        """
         from lib.models.order import Order
-        order = Order(self, coffee, price)
-        if order not in self._orders:  # Prevent duplicates
-            print(f"Creating order for {self.name} with coffee {coffee.name} at price {price}")
-            self._orders.append(order)
+        if idempotency_key is None:
+            return Order(self, coffee, price, timestamp)
+        if concurrency.is_enabled():
+            with concurrency.locked(self, coffee):  # No two threads create the same key
+                return self._create_once(idempotency_key, coffee, price, timestamp)
+        return self._create_once(idempotency_key, coffee, price, timestamp)
+
+    def _create_once(self, key: Hashable, coffee: Coffee, price: float,
+                     timestamp: Optional[float]) -> Order:
+        """Return the order recorded for key, creating and recording it if there is none"""
+        from lib.models.order import Order
+        keys = self._store.idempotency_keys
+        recorded = keys.get(key)
+        if recorded is None:
+            order = Order(self, coffee, price, timestamp)
+            keys.put(key, ((self._id, coffee._id, order.cents), order))
+            return order
+        request, order = recorded  # Compare with the original request, not the order's current state
+        if request != (self._id, getattr(coffee, "_id", None), to_cents(price)):
+            raise ValueError("Idempotency key was already used for a different order.")
         return order
 
+    def create_orders(self, items: Iterable[Tuple[Coffee, float]]
+                      ) -> Tuple[List[Order], List[Tuple[int, Exception]]]:
+        """Create an order per (coffee, price) pair; see Order.bulk_create for the result"""
+        from lib.models.order import Order
+        return Order.bulk_create((self, *item) for item in items)
+
     def __repr__(self):
         return f"<Customer name='{self.name}'>"
 
-
-    def get_customer_name(customer_id: int) -> Optional[str]:
-       # Returns a string if the customer exists, otherwise None
-      if customer_id == 1:
-        return "Alice"
-      return None
-
-# Define a sample customer and coffee before creating the order
-sample_customer = Customer("Sample Customer")
-from lib.models.coffee import Coffee
-sample_coffee = Coffee("Sample Coffee")
-
-order = sample_customer.create_order(sample_coffee, 4.99)
\ No newline at end of file
@@ -0,0 +1,51 @@
+from __future__ import annotations
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional, Tuple
+
+
+class IdempotencyIndex:
+    """
+    Hashed index of recently used idempotency keys and what they produced.
+
+    Keys are kept for `ttl` seconds and at most `max_keys` are retained;
+    the oldest keys are evicted first. Lookups and inserts are O(1)
+    amortized: entries are stored in insertion (and so expiry) order, so
+    expired keys are always at the front.
+    """
+
+    def __init__(self, ttl: float = 24 * 60 * 60, max_keys: int = 100_000):
+        if not ttl > 0 or max_keys < 1:
+            raise ValueError("ttl must be positive and max_keys at least 1.")
+        self.ttl = ttl
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[Hashable, Tuple[float, Any]] = OrderedDict()  # key -> (expiry, value)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the value recorded under key, or None if unknown or expired"""
+        with self._lock:
+            self._expire(time.monotonic())
+            entry = self._entries.get(key)
+        return None if entry is None else entry[1]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """Record value under key, restarting its retention period"""
+        with self._lock:
+            now = time.monotonic()
+            self._entries.pop(key, None)
+            self._entries[key] = (now + self.ttl, value)
+            self._expire(now)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _expire(self, now: float) -> None:
+        """Drop expired keys and keys beyond max_keys, oldest first"""
+        entries = self._entries
+        while entries:
+            key, (expiry, _) = next(iter(entries.items()))
+            if expiry > now and len(entries) <= self.max_keys:
+                break
+            del entries[key]
@@ -0,0 +1,76 @@
+from __future__ import annotations
+from bisect import bisect_left, insort
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+
+class Leaderboard:
+    """Scores keyed by item, kept in rank order for cheap leader/top-n queries.
+
+    Ties are broken by ``rank_key(item)`` ascending, so the item with the
+    smaller key (e.g. the customer created first) ranks higher.
+    """
+
+    def __init__(self, rank_key: Callable[[Any], Any]):
+        self._rank_key = rank_key
+        self._entries: Dict[Hashable, Tuple] = {}  # item -> its entry in _ranking
+        self._ranking: List[Tuple] = []  # sorted (-score, rank_key, item)
+
+    def add(self, item: Hashable, delta) -> None:
+        """Add delta to item's score, dropping the item once it reaches zero"""
+        ranking = self._ranking
+        entry = self._entries.pop(item, None)
+        if entry is None:
+            score, key = delta, None
+        else:
+            del ranking[bisect_left(ranking, entry)]
+            score, key = delta - entry[0], entry[1]
+        if score > 0:
+            entry = (-score, self._rank_key(item) if key is None else key, item)
+            self._entries[item] = entry
+            insort(ranking, entry)
+
+    def update(self, deltas: Dict[Hashable, Any]) -> None:
+        """Apply many score deltas at once"""
+        # A rebuild costs a pass over every entry; per-item bisects only
+        # move list slots, so they win until a batch touches ~1/16 of the board
+        if len(deltas) * 16 < len(self._entries):
+            for item, delta in deltas.items():
+                self.add(item, delta)
+            return
+        scores = {item: -entry[0] for item, entry in self._entries.items()}
+        for item, delta in deltas.items():
+            score = scores.pop(item, 0) + delta
+            if score > 0:
+                scores[item] = score
+        rank_key = self._rank_key
+        self._entries = {item: (-score, rank_key(item), item) for item, score in scores.items()}
+        self._ranking = sorted(self._entries.values())
+
+    def discard(self, item: Hashable) -> None:
+        """Remove item and its score (no-op if absent)"""
+        entry = self._entries.pop(item, None)
+        if entry is not None:
+            del self._ranking[bisect_left(self._ranking, entry)]
+
+    def score(self, item: Hashable):
+        """Return item's current score (0 if absent)"""
+        entry = self._entries.get(item)
+        return 0 if entry is None else -entry[0]
+
+    def leader(self) -> Optional[Any]:
+        """Return the top-ranked item, or None if empty"""
+        return self._ranking[0][2] if self._ranking else None
+
+    def top(self, n: int) -> List[Any]:
+        """Return the n top-ranked items, best first"""
+        return [entry[2] for entry in self._ranking[:max(n, 0)]]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self):
+        """Iterate scored items (unranked)"""
+        return iter(self._entries)
+
+    def __contains__(self, item: Hashable) -> bool:
+        return item in self._entries
@@ -0,0 +1,135 @@
+from __future__ import annotations
+import threading
+import weakref
+from collections import OrderedDict
+from functools import wraps
+from itertools import count
+from typing import Any, Callable, Hashable, Tuple
+
+# Versions come from one global counter, so a bump never reuses a value an
+# earlier result may have been stamped with, even if two threads bump at once
+_versions = count(1)
+
+
+def bump(*objects: Any) -> None:
+    """Give each customer/coffee a new mutation version, invalidating its memoized results"""
+    for obj in objects:
+        obj._version = next(_versions)
+
+
+class MemoCache:
+    """
+    Shared LRU bound over derived per-instance results.
+
+    Results live in each instance's own _memo dict, so they die with it and
+    never keep objects alive; this cache only orders their keys. Each
+    result is stamped with the instance's mutation version at the time it
+    was computed and only served while the version is unchanged, so it is
+    recomputed exactly when its instance's relationships changed. At most
+    max_size results are kept across all instances; the least recently
+    used are evicted first.
+    """
+
+    def __init__(self, max_size: int = 10_000):
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1.")
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[Hashable, weakref.ref] = OrderedDict()  # (id, key) -> instance
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def lookup(self, obj: Any, key: Hashable, version: int) -> Tuple[bool, Any]:
+        """Return (True, value) if obj holds a result for key at version, else (False, None)"""
+        with self._lock:
+            entry = obj._memo.get(key) if obj._memo is not None else None
+            if entry is None or entry[0] != version:
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end((obj._id, key))
+            self.hits += 1
+            return True, entry[1]
+
+    def store(self, obj: Any, key: Hashable, version: int, value: Any) -> None:
+        """Record value as obj's result for key at version, evicting the oldest results if full"""
+        with self._lock:
+            if obj._memo is None:
+                obj._memo = {}
+            obj._memo[key] = (version, value)
+            self._entries[(obj._id, key)] = weakref.ref(obj)
+            self._entries.move_to_end((obj._id, key))
+            self._evict()
+
+    def resize(self, max_size: int) -> None:
+        """Change the size bound, evicting entries beyond it"""
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1.")
+        with self._lock:
+            self.max_size = max_size
+            self._evict()
+
+    def clear(self) -> None:
+        """Drop every entry and reset the statistics"""
+        with self._lock:
+            while self._entries:
+                self._pop_oldest()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> dict:
+        """Return hits, misses, evictions, hit rate, size and max_size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "size": len(self._entries),
+                "max_size": self.max_size,
+            }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _evict(self) -> None:
+        """Drop least recently used entries beyond max_size (lock held)"""
+        while len(self._entries) > self.max_size:
+            self._pop_oldest()
+            self.evictions += 1
+
+    def _pop_oldest(self) -> None:
+        """Drop the least recently used result from its instance, if still alive (lock held)"""
+        (_, key), ref = self._entries.popitem(last=False)
+        obj = ref()
+        if obj is not None:
+            del obj._memo[key]
+
+
+cache = MemoCache()
+
+
+class _ListResult(tuple):
+    """Immutable stored form of a list result"""
+
+
+def memoized(method: Callable) -> Callable:
+    """
+    Decorator memoizing a customer/coffee method per instance and arguments,
+    bounded by the shared cache. List results are stored immutably and
+    every call gets its own list copy.
+    """
+    name = method.__qualname__
+
+    @wraps(method)
+    def wrapper(self, *args):
+        key = (name, args)
+        version = self._version  # Read first: a write during the call makes the result stale
+        hit, value = cache.lookup(self, key, version)
+        if not hit:
+            value = method(self, *args)
+            if isinstance(value, list):
+                value = _ListResult(value)
+            cache.store(self, key, version, value)
+        return list(value) if type(value) is _ListResult else value
+    return wrapper
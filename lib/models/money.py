@@ -0,0 +1,49 @@
+from __future__ import annotations
+import math
+
+# Prices are held as integer cents everywhere inside the models, so sums,
+# averages and spend comparisons are exact integer arithmetic.
+MIN_CENTS = 100
+MAX_CENTS = 1000
+
+# One shared int object per valid amount, so orders don't each carry their own
+_INTERNED = tuple(range(MAX_CENTS + 1))
+
+
+def to_cents(price) -> int:
+    """Return price in integer cents, raising if it is not a number between 1.0 and 10.0"""
+    if not isinstance(price, (int, float)):
+        raise TypeError("Price must be a number.")
+    if isinstance(price, int):
+        cents = price * 100  # Exact for any size (math.isnan would overflow on huge ints)
+    elif math.isnan(price):
+        raise ValueError("Price must be at least 1.0.")
+    elif math.isinf(price):
+        raise ValueError("Price must not exceed 10.0." if price > 0 else "Price must be at least 1.0.")
+    else:
+        cents = round(price * 100)  # Sub-cent prices round to the nearest cent
+    if cents < MIN_CENTS:
+        raise ValueError("Price must be at least 1.0.")
+    if cents > MAX_CENTS:
+        raise ValueError("Price must not exceed 10.0.")
+    return _INTERNED[cents]
+
+
+def intern(cents: int) -> int:
+    """Return the shared int object for a valid amount in cents"""
+    return _INTERNED[cents]
+
+
+def to_price(cents: int) -> float:
+    """Return cents as a float price"""
+    return cents / 100
+
+
+def average(total_cents: int, count: int) -> float:
+    """Return total_cents / count as a price rounded to the cent (half to even), 0.0 if count is 0"""
+    if not count:
+        return 0.0
+    quotient, remainder = divmod(total_cents, count)
+    if 2 * remainder > count or (2 * remainder == count and quotient % 2):
+        quotient += 1
+    return quotient / 100
@@ -1,29 +1,74 @@
 from __future__ import annotations
-from typing import TYPE_CHECKING
+import math
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
 
-if TYPE_CHECKING:
-    from lib.models.customer import Customer
-    from lib.models.coffee import Coffee
+from lib import concurrency, instrumentation
+
+# Module-level so the setters don't re-import on every call; customer.py and
+# coffee.py only import this module lazily, so there is no import cycle.
+from lib.models.customer import Customer
+from lib.models.coffee import Coffee
+from lib.models import memo
+from lib.models.money import intern, to_cents, to_price
+from lib.models.views import writable_orders
+
+def _validate_price(price) -> float:
+    """Return price rounded to the cent, raising if it is not a number between 1.0 and 10.0"""
+    return to_price(to_cents(price))
+
+def _validate_timestamp(timestamp) -> float:
+    """Return timestamp (seconds since the epoch) as a float, raising if it is not a finite number"""
+    if isinstance(timestamp, bool) or not isinstance(timestamp, (int, float)):
+        raise TypeError("Timestamp must be a number.")
+    if not math.isfinite(timestamp):
+        raise ValueError("Timestamp must be finite.")
+    return float(timestamp)
+
+def _validate_store(customer: Customer, coffee: Coffee) -> None:
+    """Raise if customer and coffee belong to different stores"""
+    if customer._store is not coffee._store:
+        raise ValueError("Customer and coffee belong to different stores.")
 
 class Order:
-    def __init__(self, customer: Customer, coffee: Coffee, price: float):
-        if not isinstance(price, (int, float)):
-            raise TypeError("Price must be a number.")
-        if price < 1.0:  # Minimum price validation
-            raise ValueError("Price must be at least 1.0.")
-        if price > 10.0:  # Maximum price validation
-            raise ValueError("Price must not exceed 10.0.")
-        self._price = float(price)
+    __slots__ = ('_cents', '_customer', '_coffee', '_timestamp')
 
+    def __init__(self, customer: Customer, coffee: Coffee, price: float,
+                 timestamp: Optional[float] = None):
+        """Create an order placed at timestamp (seconds since the epoch, default now)"""
         self._customer = None
         self._coffee = None
-        self.customer = customer
-        self.coffee = coffee
+        try:
+            self._cents = to_cents(price)
+            self._timestamp = time.time() if timestamp is None else _validate_timestamp(timestamp)
+            if concurrency.is_enabled():
+                with concurrency.locked(customer, coffee):
+                    self.customer = customer
+                    self.coffee = coffee
+            else:
+                self.customer = customer
+                self.coffee = coffee
+        except (TypeError, ValueError):
+            self.cancel()  # Don't leave a half-wired order on the customer
+            instrumentation.increment("orders_rejected")
+            raise
+        instrumentation.increment("orders_created")
+        instrumentation.emit("order_created", self)
 
     @property
     def price(self) -> float:
         """Get the price (read-only)"""
-        return self._price
+        return self._cents / 100
+
+    @property
+    def cents(self) -> int:
+        """Get the price in integer cents (read-only)"""
+        return self._cents
+
+    @property
+    def timestamp(self) -> float:
+        """Get when the order was placed, in seconds since the epoch (read-only)"""
+        return self._timestamp
 
     @property
     def customer(self) -> 'Customer':
@@ -33,17 +78,30 @@ class Order:
     @customer.setter
     def customer(self, value: 'Customer'):
         """Set customer with type validation"""
-        from lib.models.customer import Customer  # Import here to avoid circular imports
         if not isinstance(value, Customer):
             raise TypeError("Invalid customer")
-        
-        # Remove the order from the old customer's orders list
+        if self._coffee is not None:
+            _validate_store(value, self._coffee)
+        if concurrency.is_enabled():
+            with concurrency.locked(self._customer, value, self._coffee):
+                self._set_customer(value)
+        else:
+            self._set_customer(value)
+
+    def _set_customer(self, value: Customer) -> None:
+        """Move the order to another customer (type already checked)"""
+        # Remove the order from the old customer's orders
         if self._customer is not None:
-            self._customer._orders.remove(self)
+            del writable_orders(self._customer)[self]
         
-        # Add the order to the new customer's orders list
-        value._orders.append(self)
-        self._customer = value
+        # Add the order to the new customer's orders
+        writable_orders(value)[self] = None
+        if self._coffee is not None:
+            self._coffee._transfer(self, value)
+            self._customer = value
+            instrumentation.emit("order_reassigned", self)
+        else:
+            self._customer = value
 
     @property
     def coffee(self) -> Coffee:
@@ -53,17 +111,132 @@ class Order:
     @coffee.setter
     def coffee(self, value: 'Coffee'):
         """Set coffee with type validation"""
-        from lib.models.coffee import Coffee  # Import here to avoid circular imports
         if not isinstance(value, Coffee):
             raise TypeError("Invalid coffee")
-        
+        if self._customer is not None:
+            _validate_store(self._customer, value)
+        if concurrency.is_enabled():
+            with concurrency.locked(self._customer, self._coffee, value):
+                self._set_coffee(value)
+        else:
+            self._set_coffee(value)
+
+    def _set_coffee(self, value: Coffee) -> None:
+        """Move the order to another coffee (type already checked)"""
         # Remove the order from the old coffee's orders list
         if self._coffee is not None:
-            self._coffee._orders.remove(self)
+            self._coffee._detach(self)
         
         # Add the order to the new coffee's orders list
-        value._orders.append(self)
+        previous = self._coffee
+        value._attach(self)
         self._coffee = value
+        memo.bump(self._customer)  # Customer.coffees() reads order.coffee, which only changes here
+        if previous is not None:  # Not the initial wiring, which is announced as order_created
+            instrumentation.emit("order_reassigned", self)
+
+    def cancel(self) -> None:
+        """Detach the order from its customer and coffee (no-op if already cancelled)"""
+        if concurrency.is_enabled():
+            with concurrency.locked(self._customer, self._coffee):
+                self._detach()
+        else:
+            self._detach()
+
+    def _detach(self) -> None:
+        """Remove the order from both sides"""
+        attached = self._coffee is not None
+        if attached:
+            self._coffee._detach(self)
+            self._coffee = None
+        if self._customer is not None:
+            del writable_orders(self._customer)[self]
+            self._customer = None
+        if attached:  # A half-built order rejected in __init__ was never announced
+            instrumentation.emit("order_cancelled", self)
+
+    @classmethod
+    def bulk_create(cls, rows: Iterable[tuple]) -> Tuple[List[Order], List[Tuple[int, Exception]]]:
+        """
+        Create many orders from (customer, coffee, price[, timestamp]) rows in one pass.
+
+        Each row is validated with the same rules as Order(...), but valid
+        rows are wired to their customer and coffee directly instead of
+        going through the property setters. Rows without a timestamp (or
+        with None) are stamped with the time of the call. Invalid rows
+        don't abort the batch: they are returned as (row index, exception)
+        pairs alongside the created orders.
+        """
+        now = time.time()
+        valid = []
+        errors = []
+        for index, row in enumerate(rows):
+            try:
+                customer, coffee, price, timestamp = row if len(row) == 4 else (*row, None)
+                cents = to_cents(price)
+                timestamp = now if timestamp is None else _validate_timestamp(timestamp)
+                if not isinstance(customer, Customer):
+                    raise TypeError("Invalid customer")
+                if not isinstance(coffee, Coffee):
+                    raise TypeError("Invalid coffee")
+                _validate_store(customer, coffee)
+            except (TypeError, ValueError) as error:
+                errors.append((index, error))
+                continue
+            valid.append((customer, coffee, cents, timestamp))
+        orders = cls._wire_many(valid)
+        instrumentation.increment("orders_created", len(orders))
+        instrumentation.increment("orders_rejected", len(errors))
+        if instrumentation.subscribed("order_created"):
+            for order in orders:
+                instrumentation.emit("order_created", order)
+        return orders, errors
+
+    @classmethod
+    def _restore_many(cls, rows: Iterable[Tuple[Customer, Coffee, int, float]]) -> List[Order]:
+        """
+        Rebuild saved orders with _wire_many and announce them as one
+        orders_restored event (so a running journal records them).
+        """
+        orders = cls._wire_many(rows)
+        if instrumentation.subscribed("orders_restored"):
+            instrumentation.emit("orders_restored", orders)
+        return orders
+
+    @classmethod
+    def _wire_many(cls, rows: Iterable[Tuple[Customer, Coffee, int, float]]) -> List[Order]:
+        """
+        Build orders from trusted (customer, coffee, cents, timestamp) rows and attach them,
+        skipping validation and the setters. Each coffee's index and aggregates
+        are updated once per batch instead of once per order.
+        """
+        if concurrency.is_enabled():
+            rows = list(rows)
+            # Every customer (stripe) and coffee the batch writes to, taken once in the global lock order
+            with concurrency.locked(*{row[0] for row in rows}, *{row[1] for row in rows}):
+                return cls._wire(rows)
+        return cls._wire(rows)
+
+    @classmethod
+    def _wire(cls, rows: Iterable[Tuple[Customer, Coffee, int, float]]) -> List[Order]:
+        """Build and attach orders for _wire_many (locks already held)"""
+        new = cls.__new__
+        orders = []
+        by_coffee: Dict[Coffee, List[Order]] = {}
+        for customer, coffee, cents, timestamp in rows:
+            order = new(cls)
+            order._cents = intern(cents)
+            order._timestamp = timestamp
+            order._customer = customer
+            order._coffee = coffee
+            writable_orders(customer)[order] = None
+            by_coffee.setdefault(coffee, []).append(order)
+            orders.append(order)
+        for coffee, coffee_orders in by_coffee.items():
+            coffee._attach_many(coffee_orders)
+        return orders
 
     def __repr__(self):
+        if self.customer is None:
+            return f"<Order cancelled price={self.price}>"
         return f"<Order customer={self.customer.name} coffee={self.coffee.name} price={self.price}>"
\ No newline at end of file
@@ -0,0 +1,245 @@
+from __future__ import annotations
+import time
+from array import array
+from typing import Dict, Hashable, Iterator, List, Optional
+
+from lib import instrumentation, storage
+from lib.models.customer import Customer
+from lib.models.coffee import Coffee
+from lib.models.money import to_cents
+from lib.models.order import Order, _validate_store, _validate_timestamp
+
+_CANCELLED = 0xFFFFFFFF  # Id column marker for cancelled rows
+
+class OrderStore:
+    """
+    Opt-in columnar storage for orders.
+
+    Each order is one row across four array columns (customer id, coffee
+    id, price in cents, timestamp) instead of a Python object, and each customer/coffee keeps
+    an array of its row numbers. Ids are local to the store. Order objects
+    are only materialized as StoredOrder views when read, and stored orders
+    feed the same spend index and aggregates as regular ones, so
+    Customer.orders(), Coffee.orders(), Coffee.average_price() and
+    Customer.most_aficionado() work unchanged.
+
+    Cancelled rows stay in the columns as tombstones; removing a row from
+    its customer/coffee row arrays is a linear scan of those arrays.
+    """
+
+    def __init__(self):
+        self._customer_ids = array('I')
+        self._coffee_ids = array('I')
+        self._cents = array('I')
+        self._timestamps = array('d')
+        self._customers: List[Customer] = []  # Local id -> Customer
+        self._coffees: List[Coffee] = []
+        self._customer_index: Dict[Customer, int] = {}  # Customer -> local id
+        self._coffee_index: Dict[Coffee, int] = {}
+        self._customer_rows: List[array] = []  # Local id -> row numbers
+        self._coffee_rows: List[array] = []
+        self._cancelled = 0
+
+    def add(self, customer: Customer, coffee: Coffee, price: float,
+            timestamp: Optional[float] = None) -> int:
+        """Validate and append an order row, returning its row number"""
+        try:
+            cents = to_cents(price)
+            timestamp = time.time() if timestamp is None else _validate_timestamp(timestamp)
+            if not isinstance(customer, Customer):
+                raise TypeError("Invalid customer")
+            if not isinstance(coffee, Coffee):
+                raise TypeError("Invalid coffee")
+            _validate_store(customer, coffee)
+        except (TypeError, ValueError):
+            instrumentation.increment("orders_rejected")
+            raise
+        row = len(self._cents)
+        customer_id = self._customer_id(customer)
+        coffee_id = self._coffee_id(coffee)
+        self._customer_ids.append(customer_id)
+        self._coffee_ids.append(coffee_id)
+        self._cents.append(cents)
+        self._timestamps.append(timestamp)
+        self._customer_rows[customer_id].append(row)
+        self._coffee_rows[coffee_id].append(row)
+        coffee._track(customer, cents, timestamp)
+        backend = storage.active()
+        if backend is not None:
+            backend.orders_added(coffee, (StoredOrder(self, row),))
+        instrumentation.increment("orders_created")
+        if instrumentation.subscribed("order_created"):
+            instrumentation.emit("order_created", StoredOrder(self, row))
+        return row
+
+    def order(self, row: int) -> StoredOrder:
+        """Materialize a view of the order stored at row"""
+        if not 0 <= row < len(self._cents):
+            raise IndexError("Order row out of range")
+        return StoredOrder(self, row)
+
+    def __len__(self) -> int:
+        """Return the number of live (not cancelled) orders"""
+        return len(self._cents) - self._cancelled
+
+    def __iter__(self) -> Iterator[StoredOrder]:
+        ids = self._coffee_ids
+        return (StoredOrder(self, row) for row in range(len(ids)) if ids[row] != _CANCELLED)
+
+    def _customer_orders(self, customer: Customer) -> Iterator[StoredOrder]:
+        """Yield views of the customer's stored orders"""
+        rows = self._customer_rows[self._customer_index[customer]]
+        return (StoredOrder(self, row) for row in rows)
+
+    def _coffee_orders(self, coffee: Coffee) -> Iterator[StoredOrder]:
+        """Yield views of the coffee's stored orders"""
+        rows = self._coffee_rows[self._coffee_index[coffee]]
+        return (StoredOrder(self, row) for row in rows)
+
+    def _customer_id(self, customer: Customer) -> int:
+        """Return the local id for customer, registering it on first use"""
+        customer_id = self._customer_index.get(customer)
+        if customer_id is None:
+            customer_id = len(self._customers)
+            self._customers.append(customer)
+            self._customer_index[customer] = customer_id
+            self._customer_rows.append(array('I'))
+            customer._stores += (self,)
+        return customer_id
+
+    def _coffee_id(self, coffee: Coffee) -> int:
+        """Return the local id for coffee, registering it on first use"""
+        coffee_id = self._coffee_index.get(coffee)
+        if coffee_id is None:
+            coffee_id = len(self._coffees)
+            self._coffees.append(coffee)
+            self._coffee_index[coffee] = coffee_id
+            self._coffee_rows.append(array('I'))
+            coffee._stores += (self,)
+        return coffee_id
+
+    def _check_live(self, row: int) -> None:
+        """Raise if the order at row has been cancelled"""
+        if self._coffee_ids[row] == _CANCELLED:
+            raise ValueError("Order has been cancelled.")
+
+    def _set_customer(self, row: int, customer: Customer) -> None:
+        """Move a stored order to another customer"""
+        if not isinstance(customer, Customer):
+            raise TypeError("Invalid customer")
+        self._check_live(row)
+        _validate_store(customer, self._coffees[self._coffee_ids[row]])
+        old_id = self._customer_ids[row]
+        new_id = self._customer_id(customer)
+        self._coffees[self._coffee_ids[row]]._transfer(StoredOrder(self, row), customer)
+        self._customer_rows[old_id].remove(row)
+        self._customer_rows[new_id].append(row)
+        self._customer_ids[row] = new_id
+        if instrumentation.subscribed("order_reassigned"):
+            instrumentation.emit("order_reassigned", StoredOrder(self, row))
+
+    def _set_coffee(self, row: int, coffee: Coffee) -> None:
+        """Move a stored order to another coffee"""
+        if not isinstance(coffee, Coffee):
+            raise TypeError("Invalid coffee")
+        self._check_live(row)
+        _validate_store(self._customers[self._customer_ids[row]], coffee)
+        old_id = self._coffee_ids[row]
+        new_id = self._coffee_id(coffee)
+        customer = self._customers[self._customer_ids[row]]
+        amount = self._cents[row]
+        timestamp = self._timestamps[row]
+        self._coffees[old_id]._untrack(customer, amount, timestamp)
+        coffee._track(customer, amount, timestamp)
+        self._coffee_rows[old_id].remove(row)
+        self._coffee_rows[new_id].append(row)
+        self._coffee_ids[row] = new_id
+        backend = storage.active()
+        if backend is not None:
+            backend.order_removed(StoredOrder(self, row))  # Re-inserted under the new coffee
+            backend.orders_added(coffee, (StoredOrder(self, row),))
+        if instrumentation.subscribed("order_reassigned"):
+            instrumentation.emit("order_reassigned", StoredOrder(self, row))
+
+    def _cancel(self, row: int) -> None:
+        """Tombstone a stored order and detach it from its customer and coffee"""
+        customer_id = self._customer_ids[row]
+        coffee_id = self._coffee_ids[row]
+        if coffee_id == _CANCELLED:
+            return
+        self._coffees[coffee_id]._untrack(self._customers[customer_id],
+                                          self._cents[row], self._timestamps[row])
+        self._customer_rows[customer_id].remove(row)
+        self._coffee_rows[coffee_id].remove(row)
+        self._customer_ids[row] = _CANCELLED
+        self._coffee_ids[row] = _CANCELLED
+        self._cancelled += 1
+        backend = storage.active()
+        if backend is not None:
+            backend.order_removed(StoredOrder(self, row))
+        if instrumentation.subscribed("order_cancelled"):
+            instrumentation.emit("order_cancelled", StoredOrder(self, row))
+
+def order_key(order: Order) -> Hashable:
+    """Return a key identifying order without referencing it (StoredOrder views are transient)"""
+    if isinstance(order, StoredOrder):
+        return id(order._store), order._row
+    return id(order)
+
+class StoredOrder(Order):
+    """Lightweight Order view over one row of an OrderStore"""
+
+    __slots__ = ('_store', '_row')
+
+    def __init__(self, store: OrderStore, row: int):
+        self._store = store
+        self._row = row
+
+    @property
+    def price(self) -> float:
+        """Get the price (read-only)"""
+        return self._store._cents[self._row] / 100
+
+    @property
+    def cents(self) -> int:
+        """Get the price in integer cents (read-only)"""
+        return self._store._cents[self._row]
+
+    @property
+    def timestamp(self) -> float:
+        """Get when the order was placed, in seconds since the epoch (read-only)"""
+        return self._store._timestamps[self._row]
+
+    @property
+    def customer(self) -> Customer:
+        """Get associated customer (None once cancelled)"""
+        customer_id = self._store._customer_ids[self._row]
+        return None if customer_id == _CANCELLED else self._store._customers[customer_id]
+
+    @customer.setter
+    def customer(self, value: Customer):
+        """Reassign the stored order's customer"""
+        self._store._set_customer(self._row, value)
+
+    @property
+    def coffee(self) -> Coffee:
+        """Get associated coffee (None once cancelled)"""
+        coffee_id = self._store._coffee_ids[self._row]
+        return None if coffee_id == _CANCELLED else self._store._coffees[coffee_id]
+
+    @coffee.setter
+    def coffee(self, value: Coffee):
+        """Reassign the stored order's coffee"""
+        self._store._set_coffee(self._row, value)
+
+    def cancel(self) -> None:
+        """Tombstone the stored order and detach it from its customer and coffee"""
+        self._store._cancel(self._row)
+
+    def __eq__(self, other):
+        if not isinstance(other, StoredOrder):
+            return NotImplemented
+        return self._store is other._store and self._row == other._row
+
+    def __hash__(self):
+        return hash((id(self._store), self._row))
@@ -0,0 +1,83 @@
+from __future__ import annotations
+import threading
+import weakref
+from itertools import count
+from typing import Any, Dict, Iterator, List, Optional
+
+
+class Registry:
+    """
+    Weak, id- and name-keyed index of live model instances.
+
+    Instances are held through weak references, so registering an object
+    never keeps it alive; its entries are dropped as soon as it is
+    collected. Ids are assigned in creation order and never reused.
+    Mutations are serialized by an internal reentrant lock (reentrant
+    because a weakref callback can fire mid-update on the same thread).
+    """
+
+    def __init__(self, ids: Optional[Iterator[int]] = None):
+        self._ids = count(1) if ids is None else ids  # Pass a shared counter to keep ids unique across registries
+        self._lock = threading.RLock()
+        self._refs: Dict[int, weakref.ref] = {}  # id -> weak reference
+        self._names: Dict[int, str] = {}  # id -> current name
+        self._by_name: Dict[str, Dict[int, None]] = {}  # name -> ids, oldest first
+
+    def register(self, obj: Any, name: str) -> int:
+        """Add obj under name and return its new id"""
+        with self._lock:
+            obj_id = next(self._ids)
+            self._refs[obj_id] = weakref.ref(obj, lambda ref, obj_id=obj_id: self._discard(obj_id))
+            self._names[obj_id] = name
+            self._by_name.setdefault(name, {})[obj_id] = None
+        return obj_id
+
+    def rename(self, obj_id: int, name: str) -> None:
+        """Move a registered id to a new name"""
+        with self._lock:
+            self._unindex(obj_id)
+            self._names[obj_id] = name
+            self._by_name.setdefault(name, {})[obj_id] = None
+
+    def get(self, obj_id: int) -> Optional[Any]:
+        """Return the live object with obj_id, or None"""
+        ref = self._refs.get(obj_id)
+        return ref() if ref is not None else None
+
+    def find(self, name: str) -> List[Any]:
+        """Return live objects registered under name, oldest first"""
+        ids = self._by_name.get(name, ())
+        return [obj for obj in map(self.get, list(ids)) if obj is not None]
+
+    def first(self, name: str) -> Optional[Any]:
+        """Return the oldest live object registered under name, or None"""
+        for obj_id in list(self._by_name.get(name, ())):
+            obj = self.get(obj_id)
+            if obj is not None:
+                return obj
+        return None
+
+    def __len__(self) -> int:
+        return len(self._refs)
+
+    def __iter__(self) -> Iterator[Any]:
+        """Iterate live objects, oldest first"""
+        for ref in list(self._refs.values()):
+            obj = ref()
+            if obj is not None:
+                yield obj
+
+    def _unindex(self, obj_id: int) -> None:
+        """Remove obj_id from its current name bucket"""
+        name = self._names[obj_id]
+        bucket = self._by_name[name]
+        del bucket[obj_id]
+        if not bucket:
+            del self._by_name[name]
+
+    def _discard(self, obj_id: int) -> None:
+        """Weakref callback: forget a collected object"""
+        with self._lock:
+            if self._refs.pop(obj_id, None) is not None:
+                self._unindex(obj_id)
+                del self._names[obj_id]
@@ -0,0 +1,104 @@
+from __future__ import annotations
+import time
+from collections import deque
+from math import floor
+from typing import Callable
+
+
+class RollingWindow:
+    """
+    Order count and revenue over the last `span` seconds, in fixed buckets.
+
+    The span is split into `buckets` buckets of span / buckets seconds; the
+    window covers the bucket holding "now" and the buckets before it, so
+    its edge is accurate to one bucket width. Only non-empty buckets inside
+    the window are kept, so memory is bounded by `buckets` (plus pending
+    buckets, below) however long the shop runs. Running totals are adjusted as buckets enter and expire,
+    which makes every update and query O(1) amortized.
+
+    Time only moves forward: the window end is the latest `now` seen by
+    count() or revenue(), or the bucket of the latest order dated no later
+    than clock(). Orders dated after clock() wait in a pending bucket until
+    time reaches them, so a future-dated order (a skewed terminal clock, an
+    imported row) can't push the window ahead and expire the real ones.
+    Pending buckets add one per distinct future bucket to the memory bound.
+    Orders older than the window are ignored.
+    """
+
+    __slots__ = ('span', 'buckets', 'width', 'clock', '_buckets', '_pending', '_end', '_count', '_total')
+
+    def __init__(self, span: float, buckets: int = 60, clock: Callable[[], float] = time.time):
+        if not span > 0 or buckets < 1:
+            raise ValueError("Window span must be positive and buckets at least 1.")
+        self.span = float(span)
+        self.buckets = buckets
+        self.width = self.span / buckets
+        self.clock = clock  # Current time in seconds, like the order timestamps
+        self._buckets = deque()  # [bucket index, count, total] inside the window, oldest first
+        self._pending = deque()  # Buckets after the window end, oldest first
+        self._end = None  # Index of the newest bucket in the window (None until the first order or query)
+        self._count = 0
+        self._total = 0  # Cents
+
+    def add(self, timestamp: float, amount: int) -> None:
+        """Count one order of amount cents at timestamp"""
+        self._apply(floor(timestamp / self.width), 1, amount)
+
+    def remove(self, timestamp: float, amount: int) -> None:
+        """Uncount an order previously added at timestamp (no-op once it has expired)"""
+        self._apply(floor(timestamp / self.width), -1, -amount)
+
+    def count(self, now: float) -> int:
+        """Return the number of orders in the window ending at now"""
+        self._advance(floor(now / self.width))
+        return self._count
+
+    def revenue(self, now: float) -> int:
+        """Return the sum of order prices in the window ending at now, in cents"""
+        self._advance(floor(now / self.width))
+        return self._total
+
+    def _apply(self, index: int, count: int, amount: int) -> None:
+        """Add count and amount to the bucket at index, creating or dropping it as needed"""
+        if self._end is None or index > self._end:
+            self._advance(min(index, floor(self.clock() / self.width)))  # Only orders ahead of the clock wait
+        if index > self._end:
+            _bump(self._pending, index, count, amount)  # Counted once a query reaches it
+        elif index > self._end - self.buckets and _bump(self._buckets, index, count, amount):
+            self._count += count
+            self._total += amount
+
+    def _advance(self, index: int) -> None:
+        """Move the window end forward to index, counting pending buckets that entered and expiring old ones"""
+        if self._end is not None and index <= self._end:
+            return
+        self._end = index
+        buckets, pending = self._buckets, self._pending
+        while pending and pending[0][0] <= index:
+            bucket = pending.popleft()
+            buckets.append(bucket)
+            self._count += bucket[1]
+            self._total += bucket[2]
+        oldest = index - self.buckets
+        while buckets and buckets[0][0] <= oldest:
+            _, count, total = buckets.popleft()
+            self._count -= count
+            self._total -= total
+
+
+def _bump(buckets: deque, index: int, count: int, amount: int) -> bool:
+    """Add count and amount to the bucket at index in a sorted deque; return False if there was nothing to remove"""
+    position = len(buckets)
+    while position and buckets[position - 1][0] > index:  # Late orders scan back
+        position -= 1
+    if position and buckets[position - 1][0] == index:
+        bucket = buckets[position - 1]
+        bucket[1] += count
+        bucket[2] += amount
+        if not bucket[1]:
+            del buckets[position - 1]
+    elif count > 0:
+        buckets.insert(position, [index, count, amount])
+    else:
+        return False  # Removing from a bucket that was never counted
+    return True
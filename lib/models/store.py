@@ -0,0 +1,81 @@
+from __future__ import annotations
+import weakref
+from contextvars import ContextVar
+from itertools import count
+from typing import List, Tuple
+
+from lib.models.idempotency import IdempotencyIndex
+from lib.models.leaderboard import Leaderboard
+from lib.models.registry import Registry
+
+# One id counter per class shared by every store, so customer and coffee ids
+# stay unique across stores (caches, storage backends and journals key by them)
+_customer_ids = count(1)
+_coffee_ids = count(1)
+_stores: weakref.WeakSet = weakref.WeakSet()
+
+
+class Store:
+    """
+    One shop location's model state.
+
+    A store owns its customer and coffee registries, its customer count,
+    its coffee rankings and its idempotency keys, so several locations (or
+    shards of one big location) can live side by side in one process.
+    Customers and coffees belong to the store that is current when they
+    are created, and an order can only link a customer and a coffee of the
+    same store.
+    Class-level lookups (Customer.get/find/all, Coffee.get/intern/
+    most_popular/top_revenue) answer for the current store:
+
+        downtown = Store("Downtown")
+        with downtown:
+            latte = Coffee("Latte")
+
+    Outside any `with` block (and in new threads) the current store is
+    DEFAULT_STORE. Each thread and asyncio task has its own current store,
+    so tasks on one event loop may enter the same store concurrently.
+    """
+
+    def __init__(self, name: str = "default"):
+        self.name = name
+        self.customers = Registry(_customer_ids)
+        self.coffees = Registry(_coffee_ids)
+        self.customer_count = 0
+        # Rankings by order count and revenue, keyed by coffee id so they
+        # don't keep coffees alive; ids of collected coffees are dropped when read
+        self.popularity = Leaderboard(int)
+        self.revenue = Leaderboard(int)
+        self.ranking_dirty = False  # Set when coffees buffer ranking changes (locking mode)
+        # Recently used create_order idempotency keys; replace to change retention
+        self.idempotency_keys = IdempotencyIndex()
+        _stores.add(self)
+
+    def __enter__(self) -> Store:
+        _tokens.set(_tokens.get() + (_current.set(self),))
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        tokens = _tokens.get()
+        _tokens.set(tokens[:-1])
+        _current.reset(tokens[-1])
+
+    def __repr__(self):
+        return f"<Store name='{self.name}'>"
+
+
+DEFAULT_STORE = Store()
+_current: ContextVar[Store] = ContextVar("store", default=DEFAULT_STORE)
+# Tokens of the open `with store:` blocks, kept per context (thread or asyncio
+# task) so overlapping tasks each reset their own
+_tokens: ContextVar[Tuple] = ContextVar("store_tokens", default=())
+
+
+def current() -> Store:
+    """Return the store new customers and coffees join and class-level lookups read"""
+    return _current.get()
+
+
+def all_stores() -> List[Store]:
+    """Return every live store"""
+    return list(_stores)
@@ -0,0 +1,83 @@
+from __future__ import annotations
+from collections.abc import Sequence
+from itertools import islice
+from typing import Any, Dict, Iterator
+
+from lib import concurrency
+
+
+def writable_orders(owner: Any) -> Dict:
+    """Return owner's orders dict for a write, first copying it if a view iteration may be walking it"""
+    if owner._orders_shared:
+        owner._orders = dict(owner._orders)
+        owner._orders_shared = False
+    return owner._orders
+
+
+class OrdersView(Sequence):
+    """
+    Read-only, live view of a customer's or coffee's orders.
+
+    Returned by Customer.orders() and Coffee.orders() instead of a copy:
+    it always reflects the current orders, cannot be mutated, and costs
+    nothing to create. len() and ``in`` are cheap. Iteration walks the
+    orders as they were when it started, so a loop may move or cancel the
+    orders it visits: the owner's orders are copied on the first write
+    after an iteration starts, not on every read. Integer indexing walks
+    the orders (from the end for negative indexes), so call list() on the
+    view if you need repeated random access.
+    """
+
+    __slots__ = ('_owner',)
+
+    def __init__(self, owner: Any):
+        self._owner = owner
+
+    def __len__(self) -> int:
+        return self._owner._order_count()
+
+    def __iter__(self) -> Iterator:
+        owner = self._owner
+        if owner._stores or concurrency.is_enabled():
+            return iter(list(owner._iter_orders()))  # Columnar rows and other threads' writes aren't copy-on-write
+        owner._orders_shared = True
+        return iter(owner._orders)
+
+    def __reversed__(self) -> Iterator:
+        owner = self._owner
+        if owner._stores or concurrency.is_enabled():
+            return reversed(list(owner._iter_orders()))
+        owner._orders_shared = True
+        return reversed(owner._orders)
+
+    def __contains__(self, order) -> bool:
+        if order in self._owner._orders:
+            return True
+        # Only columnar (OrderStore) orders need a scan
+        return bool(self._owner._stores) and any(order == other for other in self._owner._iter_orders())
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return list(self)[index]
+        owner = self._owner
+        if index < 0:
+            if owner._stores or concurrency.is_enabled():
+                index += len(self)
+            else:  # Count back from the newest order
+                for order in islice(reversed(owner._orders), -index - 1, None):
+                    return order
+                raise IndexError("OrdersView index out of range")
+        if index >= 0:
+            for order in islice(owner._iter_orders(), index, None):
+                return order
+        raise IndexError("OrdersView index out of range")
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, (list, tuple, OrdersView)):
+            return NotImplemented
+        return len(self) == len(other) and all(a == b for a, b in zip(self._owner._iter_orders(), other))
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"OrdersView({list(self._owner._iter_orders())!r})"
@@ -0,0 +1,354 @@
+"""
+Optional fixed-memory, mergeable approximate analytics over the order stream.
+
+A ShopSketch subscribes to order_created and summarizes every order as it
+is created, in memory that does not grow with the number of orders or
+customers:
+
+    from lib.sketches import ShopSketch
+    sketch = ShopSketch()
+    sketch.attach()                       # Feed it every new order
+    sketch.distinct_customers(latte)      # HyperLogLog
+    sketch.top_spenders(10)               # Count-Min sketch + top-k
+    sketch.top_coffees(10)
+    sketch.price_quantile(0.99)
+
+Sketches of different shards (threads, processes, stores) merge into the
+sketch of the combined stream with merge(), as long as they share their
+parameters and identify customers and coffees by the same keys.
+
+Error bounds, with m = 2 ** precision registers and a Count-Min table of
+width w and depth d over a stream of total weight N:
+
+    distinct_customers   relative standard error 1.04 / sqrt(m)
+                         (1.6% at the default precision 12; linear
+                         counting makes small counts nearly exact)
+    spend / popularity   never underestimates; overestimates by at most
+                         e / w * N with probability 1 - exp(-d)
+                         (0.13% of N with probability 99.3% at the defaults)
+    top-k                every key whose true weight is above the k-th
+                         estimate + e / w * N is listed (same probability)
+    price_quantile       exact: prices are whole cents between 1.0 and 10.0,
+                         so one counter per cent is a complete, fixed-size
+                         summary
+
+The sketches summarize created orders; later reassignments and
+cancellations are not reflected.
+"""
+from __future__ import annotations
+import hashlib
+import math
+import threading
+from array import array
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from lib import instrumentation
+from lib.models.customer import Customer
+from lib.models.coffee import Coffee
+from lib.models import store
+from lib.models.money import MAX_CENTS, MIN_CENTS
+
+_MASK64 = (1 << 64) - 1
+
+
+def _mix64(z: int) -> int:
+    """splitmix64 finalizer: cheap and well mixed, even for sequential inputs"""
+    z = (z * 0x9E3779B97F4A7C15) & _MASK64
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return z ^ (z >> 31)
+
+
+def hash64(key: Hashable) -> int:
+    """Return a 64-bit hash of key that is the same in every process (unlike hash())"""
+    if isinstance(key, int):
+        return _mix64(key)
+    return int.from_bytes(hashlib.blake2b(str(key).encode("utf-8"), digest_size=8).digest(), "little")
+
+
+class HyperLogLog:
+    """Distinct-count sketch in 2 ** precision one-byte registers"""
+
+    __slots__ = ('precision', 'registers')
+
+    _INVERSE_POWERS = [2.0 ** -rank for rank in range(65)]
+
+    def __init__(self, precision: int = 12):
+        if not 4 <= precision <= 16:
+            raise ValueError("precision must be between 4 and 16.")
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+
+    def add(self, key: Hashable) -> None:
+        """Count key (repeats don't change the estimate)"""
+        self.add_hash(hash64(key))
+
+    def add_hash(self, h: int) -> None:
+        """Count an already hashed key"""
+        bits = 64 - self.precision
+        index = h >> bits
+        rank = bits - (h & ((1 << bits) - 1)).bit_length() + 1  # Position of the first 1 bit
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def count(self) -> int:
+        """Return the estimated number of distinct keys"""
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        powers = self._INVERSE_POWERS
+        estimate = alpha * m * m / sum(powers[rank] for rank in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * math.log(m / zeros)  # Linear counting for small cardinalities
+        return round(estimate)
+
+    def merge(self, other: HyperLogLog) -> None:
+        """Fold in another sketch of the same precision"""
+        if other.precision != self.precision:
+            raise ValueError("Can only merge sketches of the same precision.")
+        self.registers = bytearray(map(max, self.registers, other.registers))
+
+
+class CountMinSketch:
+    """Approximate per-key totals in a depth x width table of counters"""
+
+    __slots__ = ('width', 'depth', 'total', 'rows')
+
+    def __init__(self, width: int = 2048, depth: int = 5):
+        if width < 1 or depth < 1:
+            raise ValueError("width and depth must be at least 1.")
+        self.width = width
+        self.depth = depth
+        self.total = 0
+        self.rows = [array('q', bytes(8 * width)) for _ in range(depth)]
+
+    def _cells(self, h: int) -> List[int]:
+        """Return one column per row, re-mixing the 64-bit hash per row so rows collide independently"""
+        # Double hashing (low + i * high) would make two keys collide in every
+        # row with probability 1 / width ** 2, breaking the 1 - exp(-depth) bound
+        width = self.width
+        return [h % width] + [_mix64(h ^ i) % width for i in range(1, self.depth)]
+
+    def add(self, key: Hashable, amount: int = 1) -> int:
+        """Add amount to key and return the key's new estimate"""
+        return self.add_hash(hash64(key), amount)
+
+    def add_hash(self, h: int, amount: int = 1) -> int:
+        """Add amount to an already hashed key and return its new estimate"""
+        self.total += amount
+        estimate = None
+        for row, cell in zip(self.rows, self._cells(h)):
+            row[cell] += amount
+            if estimate is None or row[cell] < estimate:
+                estimate = row[cell]
+        return estimate
+
+    def estimate(self, key: Hashable) -> int:
+        """Return an upper estimate of key's total"""
+        return min(row[cell] for row, cell in zip(self.rows, self._cells(hash64(key))))
+
+    def error_bound(self) -> float:
+        """Return e / width * total, the overestimate bound (holds with probability 1 - exp(-depth))"""
+        return math.e / self.width * self.total
+
+    def merge(self, other: CountMinSketch) -> None:
+        """Fold in another sketch of the same shape"""
+        if (other.width, other.depth) != (self.width, self.depth):
+            raise ValueError("Can only merge sketches of the same width and depth.")
+        for row, other_row in zip(self.rows, other.rows):
+            for i, value in enumerate(other_row):
+                if value:
+                    row[i] += value
+        self.total += other.total
+
+
+class HeavyHitters:
+    """Count-Min sketch plus the k keys with the largest estimates"""
+
+    __slots__ = ('k', 'counts', 'top')
+
+    def __init__(self, k: int = 20, width: int = 2048, depth: int = 5):
+        if k < 1:
+            raise ValueError("k must be at least 1.")
+        self.k = k
+        self.counts = CountMinSketch(width, depth)
+        self.top: Dict[Hashable, int] = {}  # Key -> estimate, at most k entries
+
+    def add(self, key: Hashable, amount: int = 1) -> None:
+        """Add amount to key, promoting it into the top k if its estimate is large enough"""
+        estimate = self.counts.add(key, amount)
+        top = self.top
+        if key in top or len(top) < self.k:
+            top[key] = estimate
+            return
+        smallest = min(top, key=top.__getitem__)
+        if estimate > top[smallest]:
+            del top[smallest]
+            top[key] = estimate
+
+    def most_common(self, n: Optional[int] = None) -> List[Tuple[Hashable, int]]:
+        """Return up to n (key, estimate) pairs, largest first (ties by key)"""
+        ranked = sorted(self.top.items(), key=lambda item: (-item[1], item[0]))
+        return ranked if n is None else ranked[:n]
+
+    def merge(self, other: HeavyHitters) -> None:
+        """Fold in another sketch of the same shape, re-ranking both candidate lists"""
+        self.counts.merge(other.counts)
+        candidates = set(self.top) | set(other.top)
+        estimates = {key: self.counts.estimate(key) for key in candidates}
+        self.top = dict(sorted(estimates.items(), key=lambda item: (-item[1], item[0]))[:self.k])
+
+
+class PriceQuantiles:
+    """Exact streaming quantiles of prices, as one counter per cent"""
+
+    __slots__ = ('counts', 'total')
+
+    def __init__(self):
+        self.counts = array('q', bytes(8 * (MAX_CENTS - MIN_CENTS + 1)))
+        self.total = 0
+
+    def add(self, cents: int, count: int = 1) -> None:
+        """Count count orders at cents"""
+        self.counts[cents - MIN_CENTS] += count
+        self.total += count
+
+    def quantile(self, q: float) -> float:
+        """Return the smallest price with at least q of all orders at or below it (0.0 if empty)"""
+        if not 0 <= q <= 1:
+            raise ValueError("q must be between 0 and 1.")
+        if not self.total:
+            return 0.0
+        rank = max(1, math.ceil(q * self.total))
+        seen = 0
+        for offset, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return (offset + MIN_CENTS) / 100
+        raise AssertionError("unreachable: counts add up to total")
+
+    def merge(self, other: PriceQuantiles) -> None:
+        """Fold in another summary"""
+        for i, count in enumerate(other.counts):
+            if count:
+                self.counts[i] += count
+        self.total += other.total
+
+
+def _registry_id(obj: Any) -> int:
+    return obj._id
+
+
+class ShopSketch:
+    """
+    All the sketches for one stream of orders: distinct customers per coffee,
+    heavy hitters by customer spend (cents) and coffee popularity (orders),
+    and price quantiles overall.
+
+    Customers and coffees are identified by customer_key / coffee_key,
+    their registry ids by default; ids differ between processes, so shards
+    in other processes should key by something shared, such as
+    operator.attrgetter("name") (key functions must pickle to cross
+    processes). Results are resolved back to live objects only with the
+    default keys, through the registries of location (the store current
+    when the sketch is created) and then of the other stores. Sketches hold
+    keys, never objects. Updates and queries hold the sketch's lock, so an
+    attached sketch can be fed from several register threads.
+    """
+
+    def __init__(self, precision: int = 12, width: int = 2048, depth: int = 5, k: int = 20,
+                 customer_key: Optional[Callable[[Customer], Hashable]] = None,
+                 coffee_key: Optional[Callable[[Coffee], Hashable]] = None,
+                 location: Optional[store.Store] = None):
+        HyperLogLog(precision)  # Validate now rather than on the first order
+        self.precision = precision
+        self.location = location or store.current()
+        self.customer_key = customer_key or _registry_id
+        self.coffee_key = coffee_key or _registry_id
+        self.distinct: Dict[Hashable, HyperLogLog] = {}  # Coffee key -> distinct customers
+        self.spend = HeavyHitters(k, width, depth)
+        self.popularity = HeavyHitters(k, width, depth)
+        self.prices = PriceQuantiles()
+        self._lock = threading.RLock()
+
+    def __getstate__(self) -> dict:
+        with self._lock:
+            state = dict(self.__dict__)
+        del state["_lock"]
+        del state["location"]  # Stores don't cross processes; unpickled sketches use the current one
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self.location = store.current()
+        self._lock = threading.RLock()
+
+    def add(self, order) -> None:
+        """Summarize one order"""
+        customer = self.customer_key(order.customer)
+        coffee = self.coffee_key(order.coffee)
+        cents = order.cents
+        with self._lock:
+            distinct = self.distinct.get(coffee)
+            if distinct is None:
+                distinct = self.distinct[coffee] = HyperLogLog(self.precision)
+            distinct.add(customer)
+            self.spend.add(customer, cents)
+            self.popularity.add(coffee)
+            self.prices.add(cents)
+
+    def attach(self) -> None:
+        """Feed the sketch every order created from now on"""
+        instrumentation.subscribe("order_created", self.add)
+
+    def detach(self) -> None:
+        """Stop feeding the sketch"""
+        instrumentation.unsubscribe("order_created", self.add)
+
+    def distinct_customers(self, coffee: Coffee) -> int:
+        """Return the estimated number of distinct customers who ordered coffee"""
+        with self._lock:
+            distinct = self.distinct.get(self.coffee_key(coffee))
+            return 0 if distinct is None else distinct.count()
+
+    def top_spenders(self, n: int = 10) -> List[Tuple[Any, float]]:
+        """Return up to n (customer, estimated spend) pairs, highest first"""
+        with self._lock:
+            top = self.spend.most_common(n)
+        return [(self._resolve("customers", self.customer_key, key), cents / 100) for key, cents in top]
+
+    def top_coffees(self, n: int = 10) -> List[Tuple[Any, int]]:
+        """Return up to n (coffee, estimated order count) pairs, highest first"""
+        with self._lock:
+            top = self.popularity.most_common(n)
+        return [(self._resolve("coffees", self.coffee_key, key), count) for key, count in top]
+
+    def price_quantile(self, q: float) -> float:
+        """Return the q-quantile of order prices (see PriceQuantiles.quantile)"""
+        with self._lock:
+            return self.prices.quantile(q)
+
+    def merge(self, other: ShopSketch) -> None:
+        """Fold in the sketch of another shard"""
+        if other.precision != self.precision:
+            raise ValueError("Can only merge sketches of the same precision.")
+        first, second = sorted((self, other), key=id)  # One lock order, so crossed merges can't deadlock
+        with first._lock, second._lock:
+            for coffee, distinct in other.distinct.items():
+                mine = self.distinct.get(coffee)
+                if mine is None:
+                    mine = self.distinct[coffee] = HyperLogLog(self.precision)
+                mine.merge(distinct)
+            self.spend.merge(other.spend)
+            self.popularity.merge(other.popularity)
+            self.prices.merge(other.prices)
+
+    def _resolve(self, registry: str, key_function: Callable, key: Hashable) -> Any:
+        """Map a key back to the live object when keyed by registry id, else return the key"""
+        if key_function is not _registry_id:
+            return key
+        for location in (self.location, *store.all_stores()):  # Ids are unique across stores
+            obj = getattr(location, registry).get(key)
+            if obj is not None:
+                return obj
+        return None
@@ -0,0 +1,154 @@
+"""
+Compact binary snapshot and restore of the whole shop object graph.
+
+A snapshot holds two string tables (customer names, coffee names) and the
+orders as four packed columns (customer index, coffee index, cents, timestamp):
+
+    header   <4sBBxxIII   magic, version, byte order, #customers, #coffees, #orders
+    offsets  uint32[#customers + 1], uint32[#coffees + 1]   into the name blob
+    names    UTF-8 blob, padded to 8 bytes
+    columns  uint32 customer index, uint32 coffee index, uint32 cents,
+             float64 timestamp (each padded)
+
+Versions 1 and 2 stored float64 prices, and version 1 had no timestamps.
+
+load() memory-maps the file and reads the columns through memoryview casts,
+then rebuilds customers, coffees and orders without re-running validation.
+Restored objects are registered like live ones (Customer.get/find,
+Coffee.intern, ...). Orders come back grouped by customer, so
+Coffee.orders() follows that order rather than the original interleaving.
+Orders from older snapshots are converted on load; version 1 orders are
+stamped with the load time.
+"""
+from __future__ import annotations
+import mmap
+import struct
+import sys
+import time
+from array import array
+from itertools import repeat
+from typing import Iterable, List, Optional, Tuple
+
+from lib.models import store
+from lib.models.customer import Customer
+from lib.models.coffee import Coffee
+from lib.models.order import Order
+
+MAGIC = b"CSHP"
+VERSION = 3
+_HEADER = struct.Struct("<4sBBxxIII")
+_LITTLE, _BIG = 0, 1
+_NATIVE = _LITTLE if sys.byteorder == "little" else _BIG
+
+
+def _padding(size: int) -> bytes:
+    """Zero bytes bringing size up to a multiple of 8"""
+    return b"\0" * (-size % 8)
+
+
+def _name_table(names: List[str]) -> Tuple[array, bytes]:
+    """Return (offsets, blob) for a list of names"""
+    offsets = array("I", [0])
+    chunks = []
+    for name in names:
+        encoded = name.encode("utf-8")
+        chunks.append(encoded)
+        offsets.append(offsets[-1] + len(encoded))
+    return offsets, b"".join(chunks)
+
+
+def save(path: str, customers: Optional[Iterable[Customer]] = None,
+         coffees: Optional[Iterable[Coffee]] = None) -> int:
+    """
+    Write customers, coffees and every order of those customers to path.
+
+    Defaults to the current store's live customers and coffees. Coffees
+    referenced by an order are always included. Returns the number of orders written.
+    """
+    current = store.current()
+    customers = list(current.customers if customers is None else customers)
+    coffees = list(current.coffees if coffees is None else coffees)
+    customer_index = {customer: i for i, customer in enumerate(customers)}
+    coffee_index = {coffee: i for i, coffee in enumerate(coffees)}
+
+    customer_col, coffee_col, cents_col, time_col = array("I"), array("I"), array("I"), array("d")
+    for customer in customers:
+        for order in customer._iter_orders():
+            coffee = order.coffee
+            if coffee not in coffee_index:
+                coffee_index[coffee] = len(coffees)
+                coffees.append(coffee)
+            customer_col.append(customer_index[customer])
+            coffee_col.append(coffee_index[coffee])
+            cents_col.append(order.cents)
+            time_col.append(order.timestamp)
+
+    customer_offsets, customer_blob = _name_table([c.name for c in customers])
+    coffee_offsets, coffee_blob = _name_table([c.name for c in coffees])
+    blob = customer_blob + coffee_blob
+    with open(path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, _NATIVE, len(customers), len(coffees), len(cents_col)))
+        for part in (customer_offsets.tobytes(), coffee_offsets.tobytes(), blob,
+                     customer_col.tobytes(), coffee_col.tobytes(), cents_col.tobytes(),
+                     time_col.tobytes()):
+            f.write(part)
+            f.write(_padding(len(part)))
+    return len(cents_col)
+
+
+def load(path: str) -> Tuple[List[Customer], List[Coffee], List[Order]]:
+    """Restore a snapshot written by save(), returning (customers, coffees, orders)"""
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        view = memoryview(mapped)
+        try:
+            return _restore(view)
+        finally:
+            view.release()
+
+
+def _restore(view: memoryview) -> Tuple[List[Customer], List[Coffee], List[Order]]:
+    magic, version, byte_order, n_customers, n_coffees, n_orders = _HEADER.unpack_from(view)
+    if magic != MAGIC or version not in (1, 2, VERSION):
+        raise ValueError("Not a shop snapshot (or unsupported version).")
+    position = _HEADER.size
+    swap = byte_order != _NATIVE
+
+    def column(typecode: str, count: int):
+        """Read the next padded column, zero-copy when the byte order matches"""
+        nonlocal position
+        size = count * array(typecode).itemsize
+        raw = view[position:position + size]
+        position += size + (-size % 8)
+        if not swap:
+            return raw.cast(typecode)
+        values = array(typecode, raw.tobytes())
+        values.byteswap()
+        return values
+
+    customer_offsets = column("I", n_customers + 1)
+    coffee_offsets = column("I", n_coffees + 1)
+    blob_size = customer_offsets[-1] + coffee_offsets[-1]
+    blob = bytes(view[position:position + blob_size])
+    position += blob_size + (-blob_size % 8)
+    customer_ids = column("I", n_orders)
+    coffee_ids = column("I", n_orders)
+    if version >= 3:
+        cents = column("I", n_orders)
+    else:
+        prices = column("d", n_orders)
+        cents = [round(price * 100) for price in prices]
+        if isinstance(prices, memoryview):
+            prices.release()
+    timestamps = column("d", n_orders) if version >= 2 else repeat(time.time(), n_orders)
+
+    base = customer_offsets[-1]
+    customers = [Customer._restore(blob[customer_offsets[i]:customer_offsets[i + 1]].decode("utf-8"))
+                 for i in range(n_customers)]
+    coffees = [Coffee._restore(blob[base + coffee_offsets[i]:base + coffee_offsets[i + 1]].decode("utf-8"))
+               for i in range(n_coffees)]
+    orders = Order._restore_many((customers[c], coffees[k], p, t)
+                                 for c, k, p, t in zip(customer_ids, coffee_ids, cents, timestamps))
+    for col in (customer_offsets, coffee_offsets, customer_ids, coffee_ids, cents, timestamps):
+        if isinstance(col, memoryview):
+            col.release()
+    return customers, coffees, orders
@@ -0,0 +1,63 @@
+"""
+Optional database storage for the model layer.
+
+Off by default: the models keep everything in memory. With a backend
+active, every customer, coffee and order write is also mirrored into the
+database, and Coffee.num_orders(), Coffee.average_price(),
+Coffee.customers(), Customer.coffees() and Customer.most_aficionado()
+are answered there by indexed SQL aggregates:
+
+    from lib import storage
+    customers, coffees, orders = storage.use_sqlite("shop.db")  # Restores what the file holds
+    ...
+    storage.use_memory()  # Flush, close and go back to memory only
+
+Objects already live when a backend is switched on are written to it
+first, so the database always matches the object graph. Switch backends
+only while no other thread is using the models.
+"""
+from __future__ import annotations
+from typing import TYPE_CHECKING, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from lib.models.customer import Customer
+    from lib.models.coffee import Coffee
+    from lib.models.order import Order
+    from lib.storage.sqlite import SqliteBackend
+
+_backend: Optional[SqliteBackend] = None
+
+
+def active() -> Optional[SqliteBackend]:
+    """Return the active backend, or None while the models are memory-only"""
+    return _backend
+
+
+def use_sqlite(path: str = ":memory:", batch_size: int = 1000
+               ) -> Tuple[List[Customer], List[Coffee], List[Order]]:
+    """
+    Switch to a SQLite database at path and return (customers, coffees, orders)
+    restored from it. Writes are committed in transactions of up to
+    batch_size statements (and before every query).
+    """
+    global _backend
+    from lib.storage.sqlite import SqliteBackend
+    use_memory()
+    backend = SqliteBackend(path, batch_size)
+    restored = backend.open()
+    _backend = backend
+    return restored
+
+
+def use_memory() -> None:
+    """Flush and close the active backend, if any"""
+    global _backend
+    backend, _backend = _backend, None
+    if backend is not None:
+        backend.close()
+
+
+def flush() -> None:
+    """Commit writes the active backend is still batching"""
+    if _backend is not None:
+        _backend.flush()
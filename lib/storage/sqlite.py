@@ -0,0 +1,238 @@
+from __future__ import annotations
+import gc
+import sqlite3
+import threading
+from itertools import chain, groupby
+from operator import itemgetter
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+
+from lib.models import store
+from lib.models.customer import Customer
+from lib.models.coffee import Coffee
+from lib.models.money import average
+from lib.models.order import Order
+from lib.models.order_store import order_key
+from lib.models.registry import Registry
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS customers (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS coffees (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS orders (
+    id INTEGER PRIMARY KEY,
+    customer_id INTEGER NOT NULL REFERENCES customers (id),
+    coffee_id INTEGER NOT NULL REFERENCES coffees (id),
+    cents INTEGER NOT NULL,
+    timestamp REAL NOT NULL
+);
+-- Covering indexes: per-coffee aggregates never touch the table itself
+CREATE INDEX IF NOT EXISTS orders_by_coffee ON orders (coffee_id, customer_id, cents);
+CREATE INDEX IF NOT EXISTS orders_by_customer ON orders (customer_id, coffee_id);
+"""
+
+_INSERT_CUSTOMER = "INSERT INTO customers (id, name) VALUES (?, ?)"
+_RENAME_CUSTOMER = "UPDATE customers SET name = ? WHERE id = ?"
+_INSERT_COFFEE = "INSERT INTO coffees (id, name) VALUES (?, ?)"
+_INSERT_ORDER = "INSERT INTO orders (id, customer_id, coffee_id, cents, timestamp) VALUES (?, ?, ?, ?, ?)"
+_MOVE_ORDER = "UPDATE orders SET customer_id = ? WHERE id = ?"
+_DELETE_ORDER = "DELETE FROM orders WHERE id = ?"
+
+_COUNT = "SELECT COUNT(*), COALESCE(SUM(cents), 0) FROM orders WHERE coffee_id = ?"
+# Distinct customers / coffees of an order history; the models put them in one order for both backends
+_CUSTOMERS = "SELECT DISTINCT customer_id FROM orders WHERE coffee_id = ?"
+_COFFEES = "SELECT DISTINCT coffee_id FROM orders WHERE customer_id = ?"
+# Every customer tied for the highest spend; ties are broken by creation order in Python
+_TOP_SPENDERS = """
+WITH spend AS (
+    SELECT customer_id, SUM(cents) AS total FROM orders WHERE coffee_id = ? GROUP BY customer_id
+)
+SELECT customer_id FROM spend WHERE total = (SELECT MAX(total) FROM spend)
+"""
+
+
+class SqliteBackend:
+    """
+    Mirror of the object graph in a SQLite database.
+
+    Rows get their own ids; the backend maps them to registry ids of
+    customers and coffees and to the identity of live orders, without
+    keeping any of them alive. Objects that are collected without being
+    cancelled stay in the database (and are restored on the next open).
+    Writes are queued and committed as one transaction per batch_size
+    statements, and every query first commits what is queued, so reads
+    always see all earlier writes. Calls are serialized by one lock, so
+    the backend works with concurrency.enable().
+    """
+
+    def __init__(self, path: str = ":memory:", batch_size: int = 1000):
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1.")
+        self.path = path
+        self.batch_size = batch_size
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.RLock()
+        self._pending: List[Tuple[str, tuple]] = []
+        self._customer_rows: Dict[int, int] = {}  # Customer registry id -> row id
+        self._customer_ids: Dict[int, int] = {}  # Row id -> customer registry id
+        self._coffee_rows: Dict[int, int] = {}
+        self._coffee_ids: Dict[int, int] = {}
+        self._order_rows: Dict[Hashable, int] = {}  # Order key -> row id
+        self._next_customer = self._next_coffee = self._next_order = 1
+
+    def open(self) -> Tuple[List[Customer], List[Coffee], List[Order]]:
+        """Create the schema, restore the stored graph and write out every live object"""
+        with self._lock:
+            self._conn.executescript(SCHEMA)
+            restored = self._restore()
+            gc.collect()  # Unreachable objects may still sit in the registries
+            self._sync()
+            self.flush()
+        return restored
+
+    def close(self) -> None:
+        """Commit queued writes and close the connection"""
+        with self._lock:
+            self.flush()
+            self._conn.close()
+
+    def flush(self) -> None:
+        """Commit queued writes as one transaction"""
+        with self._lock:
+            if not self._pending:
+                return
+            pending, self._pending = self._pending, []
+            with self._conn:
+                for sql, group in groupby(pending, key=itemgetter(0)):
+                    self._conn.executemany(sql, [params for _, params in group])
+
+    # Writes, called by the models
+
+    def customer_added(self, customer: Customer) -> None:
+        """Queue a new customer row"""
+        with self._lock:
+            row = self._next_customer
+            self._next_customer += 1
+            self._map(self._customer_rows, self._customer_ids, customer._id, row)
+            self._write(_INSERT_CUSTOMER, (row, customer.name))
+
+    def customer_renamed(self, customer: Customer) -> None:
+        """Queue a customer's new name"""
+        with self._lock:
+            self._write(_RENAME_CUSTOMER, (customer.name, self._customer_rows[customer._id]))
+
+    def coffee_added(self, coffee: Coffee) -> None:
+        """Queue a new coffee row"""
+        with self._lock:
+            row = self._next_coffee
+            self._next_coffee += 1
+            self._map(self._coffee_rows, self._coffee_ids, coffee._id, row)
+            self._write(_INSERT_COFFEE, (row, coffee.name))
+
+    def orders_added(self, coffee: Coffee, orders: Iterable[Order]) -> None:
+        """Queue rows for orders just attached to coffee (their coffee attribute may still be the old one)"""
+        with self._lock:
+            coffee_row = self._coffee_rows[coffee._id]
+            for order in orders:
+                row = self._next_order
+                self._next_order += 1
+                self._order_rows[order_key(order)] = row
+                self._write(_INSERT_ORDER, (row, self._customer_rows[order.customer._id], coffee_row,
+                                            order.cents, order.timestamp))
+
+    def order_moved(self, order: Order, customer: Customer) -> None:
+        """Queue an order's move to another customer"""
+        with self._lock:
+            self._write(_MOVE_ORDER, (self._customer_rows[customer._id], self._order_rows[order_key(order)]))
+
+    def order_removed(self, order: Order) -> None:
+        """Queue the deletion of an order detached from its coffee"""
+        with self._lock:
+            self._write(_DELETE_ORDER, (self._order_rows.pop(order_key(order)),))
+
+    # Queries
+
+    def num_orders(self, coffee: Coffee) -> int:
+        """Return the number of orders for coffee"""
+        return self._query(_COUNT, self._coffee_rows[coffee._id])[0][0]
+
+    def average_price(self, coffee: Coffee) -> float:
+        """Return the average order price for coffee, rounded like Coffee.average_price"""
+        count, total = self._query(_COUNT, self._coffee_rows[coffee._id])[0]
+        return average(total, count)
+
+    def customers(self, coffee: Coffee) -> List[Customer]:
+        """Return the distinct customers who ordered coffee (Coffee.customers orders them)"""
+        rows = self._query(_CUSTOMERS, self._coffee_rows[coffee._id])
+        return self._resolve(coffee._store.customers, self._customer_ids, rows)
+
+    def coffees(self, customer: Customer) -> List[Coffee]:
+        """Return the distinct coffees the customer ordered (Customer.coffees picks one per name and orders them)"""
+        rows = self._query(_COFFEES, self._customer_rows[customer._id])
+        return self._resolve(customer._store.coffees, self._coffee_ids, rows)
+
+    def most_aficionado(self, coffee: Coffee) -> Optional[Customer]:
+        """Return the customer who spent the most on coffee (ties go to the earliest customer)"""
+        rows = self._query(_TOP_SPENDERS, self._coffee_rows[coffee._id])
+        return min(self._resolve(coffee._store.customers, self._customer_ids, rows), key=lambda c: c._id, default=None)
+
+    # Internals
+
+    def _write(self, sql: str, params: tuple) -> None:
+        """Queue a statement, committing the batch once it is full (lock held)"""
+        self._pending.append((sql, params))
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def _query(self, sql: str, key: int) -> List[tuple]:
+        """Commit queued writes, then run a query"""
+        with self._lock:
+            self.flush()
+            return self._conn.execute(sql, (key,)).fetchall()
+
+    @staticmethod
+    def _map(rows: Dict[int, int], ids: Dict[int, int], obj_id: int, row: int) -> None:
+        rows[obj_id] = row
+        ids[row] = obj_id
+
+    @staticmethod
+    def _resolve(registry: Registry, ids: Dict[int, int], rows: List[tuple]) -> list:
+        """Map row ids to live objects of registry (the queried object's store, which an order never leaves)"""
+        return [registry.get(ids[row]) for row, in rows]
+
+    def _restore(self) -> Tuple[List[Customer], List[Coffee], List[Order]]:
+        """Rebuild the stored customers, coffees and orders as new objects"""
+        execute = self._conn.execute
+        customers = {}
+        for row, name in execute("SELECT id, name FROM customers ORDER BY id"):
+            customer = customers[row] = Customer._restore(name)
+            self._map(self._customer_rows, self._customer_ids, customer._id, row)
+        coffees = {}
+        for row, name in execute("SELECT id, name FROM coffees ORDER BY id"):
+            coffee = coffees[row] = Coffee._restore(name)
+            self._map(self._coffee_rows, self._coffee_ids, coffee._id, row)
+        rows = execute("SELECT id, customer_id, coffee_id, cents, timestamp FROM orders ORDER BY id").fetchall()
+        orders = Order._restore_many((customers[customer], coffees[coffee], cents, timestamp)
+                                     for _, customer, coffee, cents, timestamp in rows)
+        self._order_rows.update(zip(map(order_key, orders), map(itemgetter(0), rows)))
+        self._next_customer = max(customers, default=0) + 1
+        self._next_coffee = max(coffees, default=0) + 1
+        self._next_order = rows[-1][0] + 1 if rows else 1
+        return list(customers.values()), list(coffees.values()), orders
+
+    def _sync(self) -> None:
+        """Queue rows for every live object (of every store) the database doesn't hold yet"""
+        stores = store.all_stores()
+        for customer in chain.from_iterable(s.customers for s in stores):
+            if customer._id not in self._customer_rows:
+                self.customer_added(customer)
+        coffees = [coffee for s in stores for coffee in s.coffees]
+        for coffee in coffees:
+            if coffee._id not in self._coffee_rows:
+                self.coffee_added(coffee)
+        for coffee in coffees:
+            self.orders_added(coffee, (order for order in coffee._iter_orders() if order_key(order) not in self._order_rows))
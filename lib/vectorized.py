@@ -0,0 +1,173 @@
+"""
+Optional NumPy-backed analytics over the whole order history.
+
+Orders are exported once as three parallel arrays (coffee ids, customer ids,
+prices in cents); every statistic is then a vectorized group-by over those arrays
+instead of a Python loop over model objects. Requires numpy, which is not a
+dependency of the models themselves:
+
+    from lib import vectorized
+    arrays = vectorized.export_arrays()
+    vectorized.price_percentiles(arrays, (50, 90, 99))[latte]
+    vectorized.top_spenders(arrays)[latte]
+
+Results are keyed by Coffee / Customer, resolved through the stores the
+exported coffees belong to. Sums are carried in integer cents, so spend
+comparisons and ties are exact, like the models'.
+"""
+from __future__ import annotations
+from array import array
+from typing import Any, Callable, Dict, Iterable, NamedTuple, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised only without numpy
+    np = None
+
+from lib.models import store
+from lib.models.customer import Customer
+from lib.models.coffee import Coffee
+from lib.models.money import average
+
+
+class OrderArrays(NamedTuple):
+    """Parallel per-order columns: coffee ids, customer ids and prices in cents, plus the stores they came from"""
+    coffee_ids: "np.ndarray"
+    customer_ids: "np.ndarray"
+    cents: "np.ndarray"
+    stores: Tuple[store.Store, ...] = ()  # Ids are resolved here (default: the current store)
+
+    @property
+    def prices(self) -> "np.ndarray":
+        """Prices as floats"""
+        return self.cents / 100
+
+
+def _require_numpy() -> None:
+    if np is None:
+        raise ImportError("lib.vectorized requires numpy (pip install numpy).")
+
+
+def _export_rows(coffees: Iterable[Coffee]) -> Tuple[array, array, array]:
+    """Return (coffee ids, customer ids, cents) columns for every order of the coffees"""
+    coffee_ids, customer_ids, cents = array("q"), array("q"), array("q")
+    for coffee in coffees:
+        for order in coffee._iter_orders():
+            coffee_ids.append(coffee._id)
+            customer_ids.append(order.customer._id)
+            cents.append(order.cents)
+    return coffee_ids, customer_ids, cents
+
+
+def export_arrays(coffees: Optional[Iterable[Coffee]] = None) -> OrderArrays:
+    """Export every order of the coffees (default: the current store's) as NumPy arrays"""
+    _require_numpy()
+    coffees = list(store.current().coffees if coffees is None else coffees)
+    stores = tuple(dict.fromkeys(coffee._store for coffee in coffees))
+    # The array.array buffers are wrapped without copying
+    columns = (np.frombuffer(column, dtype=np.int64) for column in _export_rows(coffees))
+    return OrderArrays(*columns, stores)
+
+
+def _resolver(arrays: OrderArrays, registry: str) -> Callable[[int], Any]:
+    """Return a function mapping an exported id to its live coffee or customer through the arrays' stores"""
+    registries = [getattr(location, registry) for location in arrays.stores or (store.current(),)]
+    if len(registries) == 1:
+        return registries[0].get
+
+    def resolve(key: int) -> Any:
+        for candidates in registries:  # Ids are unique across stores
+            obj = candidates.get(key)
+            if obj is not None:
+                return obj
+        return None
+    return resolve
+
+
+def _groups(keys: "np.ndarray", values: "np.ndarray"):
+    """Yield (key, values sorted ascending) for each distinct key"""
+    order = np.lexsort((values, keys))
+    sorted_keys, sorted_values = keys[order], values[order]
+    unique, starts = np.unique(sorted_keys, return_index=True)
+    bounds = np.append(starts, len(sorted_keys))
+    for i, key in enumerate(unique.tolist()):
+        yield key, sorted_values[bounds[i]:bounds[i + 1]]
+
+
+def coffee_stats(arrays: OrderArrays) -> Dict[Coffee, dict]:
+    """Return count, revenue, mean (rounded like average_price), median, min and max per coffee"""
+    _require_numpy()
+    unique, inverse, counts = np.unique(arrays.coffee_ids, return_inverse=True, return_counts=True)
+    totals = np.bincount(inverse, weights=arrays.cents, minlength=len(unique))  # Exact below 2**53
+    medians = {key: float(np.median(prices)) for key, prices in _groups(arrays.coffee_ids, arrays.prices)}
+    mins = np.full(len(unique), np.iinfo(np.int64).max)
+    maxs = np.full(len(unique), np.iinfo(np.int64).min)
+    np.minimum.at(mins, inverse, arrays.cents)
+    np.maximum.at(maxs, inverse, arrays.cents)
+    coffee = _resolver(arrays, "coffees")
+    stats = {}
+    for i, key in enumerate(unique.tolist()):
+        count, total = int(counts[i]), int(totals[i])
+        stats[coffee(key)] = {
+            "count": count,
+            "revenue": total / 100,
+            "mean": average(total, count),
+            "median": medians[key],
+            "min": int(mins[i]) / 100,
+            "max": int(maxs[i]) / 100,
+        }
+    return stats
+
+
+def price_percentiles(arrays: OrderArrays, percentiles: Sequence[float] = (50, 90, 99)
+                      ) -> Dict[Coffee, Dict[float, float]]:
+    """Return {percentile: price} per coffee (linear interpolation, as numpy.percentile)"""
+    _require_numpy()
+    coffee = _resolver(arrays, "coffees")
+    return {
+        coffee(key): dict(zip(percentiles, np.percentile(prices, percentiles).tolist()))
+        for key, prices in _groups(arrays.coffee_ids, arrays.prices)
+    }
+
+
+def price_histograms(arrays: OrderArrays, bins: int = 9, price_range: Tuple[float, float] = (1.0, 10.0)
+                     ) -> Tuple["np.ndarray", Dict[Coffee, "np.ndarray"]]:
+    """Return (shared bin edges, counts per coffee) for a fixed-width price histogram"""
+    _require_numpy()
+    edges = np.linspace(price_range[0], price_range[1], bins + 1)
+    # Bin every order at once, then count (coffee, bin) pairs in one bincount
+    bin_index = np.clip(np.searchsorted(edges, arrays.prices, side="right") - 1, 0, bins - 1)
+    unique, inverse = np.unique(arrays.coffee_ids, return_inverse=True)
+    counts = np.bincount(inverse * bins + bin_index, minlength=len(unique) * bins)
+    counts = counts.reshape(len(unique), bins)
+    coffee = _resolver(arrays, "coffees")
+    return edges, {coffee(key): counts[i] for i, key in enumerate(unique.tolist())}
+
+
+def lifetime_spend(arrays: OrderArrays) -> Dict[Customer, float]:
+    """Return total spend per customer across all coffees"""
+    _require_numpy()
+    unique, inverse = np.unique(arrays.customer_ids, return_inverse=True)
+    totals = np.bincount(inverse, weights=arrays.cents, minlength=len(unique))
+    customer = _resolver(arrays, "customers")
+    return {customer(key): int(total) / 100 for key, total in zip(unique.tolist(), totals.tolist())}
+
+
+def top_spenders(arrays: OrderArrays) -> Dict[Coffee, Customer]:
+    """
+    Return the customer who spent the most on each coffee.
+
+    Matches Customer.most_aficionado: ties go to the customer created first.
+    """
+    _require_numpy()
+    # Group by (coffee, customer) through one combined integer key
+    width = int(arrays.customer_ids.max()) + 1 if len(arrays.customer_ids) else 1
+    pairs, inverse = np.unique(arrays.coffee_ids * width + arrays.customer_ids, return_inverse=True)
+    spend = np.bincount(inverse, weights=arrays.cents, minlength=len(pairs))
+    coffees, customers = pairs // width, pairs % width
+    # Per coffee: highest spend first, then lowest customer id
+    order = np.lexsort((customers, -spend, coffees))
+    firsts = order[np.unique(coffees[order], return_index=True)[1]]
+    coffee, customer = _resolver(arrays, "coffees"), _resolver(arrays, "customers")
+    return {coffee(coffee_id): customer(customer_id)
+            for coffee_id, customer_id in zip(coffees[firsts].tolist(), customers[firsts].tolist())}